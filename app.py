@@ -1,9 +1,23 @@
-from flask import Flask, render_template, request, send_from_directory
+from flask import Flask, Response, abort, g, jsonify, render_template, request, send_file
+from jinja2 import FileSystemBytecodeCache
 import os
-from pylaform.commands.db.query import Get
-from pylaform.commands.db.update import Post
-from pylaform.latex_templates import hybrid, onePage
+import time
+from io import BytesIO
+from pylaform.commands.db import connect, trace
+from pylaform.latex_templates.context import GenerationContext
+from pylaform.latex_templates.render import GENERATORS, render
+from pylaform.utilities import metrics, profiling, tailor
+from pylaform.utilities.admission import Admission, Rejected
 from pylaform.utilities.commands import fatten, listify
+from pylaform.utilities.tenants import Tenant, Tenants
+
+# Edit page of each searchable table.
+SEARCH_PAGES: dict[str, str] = {
+    "achievement": "/achievements",
+    "skill": "/skills",
+    "summary": "/summary",
+    "glossary": "/glossary",
+}
 
 app = Flask(__name__,
             static_url_path="",
@@ -13,91 +27,280 @@ app = Flask(__name__,
 # Not currently used.
 app.jinja_env.add_extension('jinja2.ext.do')
 
-resume_query = Get()
-resume_update = Post()
-uploads: str = os.path.join(app.root_path, 'data')
+# Opt-in profiling, see 'pylaform.utilities.profiling'.
+app.wsgi_app = profiling.ProfilingMiddleware(app.wsgi_app)
+
+# Keep compiled templates between processes.
+app.jinja_env.bytecode_cache = FileSystemBytecodeCache()
+
+# Open profiles, one database file each.
+tenants = Tenants(
+    capacity=int(os.environ.get("PYLAFORM_TENANT_CACHE", 128)),
+    idle=float(os.environ.get("PYLAFORM_TENANT_IDLE", 300)),
+    render_html=os.environ.get("PYLAFORM_VIEW_CACHE_HTML", "1") != "0")
+
+# Limit concurrent pdflatex work.
+admission = Admission(
+    concurrency=int(os.environ.get("PYLAFORM_COMPILE_CONCURRENCY", 2)),
+    queue=int(os.environ.get("PYLAFORM_COMPILE_QUEUE", 8)),
+    per_client=int(os.environ.get("PYLAFORM_COMPILE_PER_CLIENT", 2)),
+    timeout=float(os.environ.get("PYLAFORM_COMPILE_WAIT", 30)))
+
+
+def tenant() -> Tenant:
+    """
+    Profile of the request, from the 'X-Pylaform-Tenant' header, the 'tenant' parameter or cookie.
+    Only profiles created beforehand are opened, see 'pylaform tenant create'. Held until the request ends.
+    :return Tenant: Open profile.
+    """
+
+    if "tenant" not in g:
+        name: str = (request.headers.get("X-Pylaform-Tenant") or request.args.get("tenant")
+                     or request.cookies.get("pylaform_tenant") or connect.DEFAULT_TENANT)
+        if not connect.valid(name):
+            abort(400, "Invalid tenant.")
+        if not connect.exists(name):
+            abort(404, "Unknown tenant.")
+        g.tenant = tenants.acquire(name)
+    return g.tenant
+
+
+def render_view(template: str, table: str) -> str:
+    """
+    Render an edit page from the view cache, rebuilding it only once the table changed.
+    :param str template: Name of the template.
+    :param str table: Name of cached table feeding the template.
+    :return str: Rendered HTML.
+    """
+
+    profile: Tenant = tenant()
+    version: tuple[int, ...] = profile.query.version(table)
+    views = profile.views
+
+    def context() -> dict:
+        with profiling.phase("query"):
+            raw: list[dict[str, str | int | bool]] = getattr(profile.query, "get_" + table)()
+        with profiling.phase("fatten"):
+            return fatten(raw)
+
+    def page() -> str:
+        payload: dict = views.context(table, version, context)
+        with profiling.phase("render"):
+            return render_template(template, **payload)
+
+    return views.page(template, version, page)
+
+
+def saved(changes: dict) -> None:
+    """
+    Purge the views depending on a saved form and keep its change summary for the response.
+    :param dict changes: Change summary of a 'Post.update_*' call.
+    :return None: None
+    """
+
+    tenant().query.invalidate(*changes["tables"])
+    g.changes = changes
+
+
+@app.before_request
+def start_timer() -> None:
+    """
+    Start timing the request.
+    :return None: None
+    """
+
+    g.start = time.perf_counter()
+
+
+@app.after_request
+def observe_request(response: Response) -> Response:
+    """
+    Record the request latency against its route and report the change summary of saved forms.
+    :param Response response: Outgoing response.
+    :return Response: Response.
+    """
+
+    if "start" in g:
+        metrics.REQUEST_DURATION.observe(
+            time.perf_counter() - g.start,
+            route=request.url_rule.rule if request.url_rule else "unmatched",
+            method=request.method,
+            status=str(response.status_code))
+    if "changes" in g:
+        response.headers["X-Pylaform-Changes"] = ", ".join(
+            f"{kind}={g.changes[kind]}"
+            for kind in ("inserted", "updated", "deleted", "unchanged", "lookups", "lookup_queries"))
+    return response
+
+
+@app.after_request
+def remember_tenant(response: Response) -> Response:
+    """
+    Keep a profile chosen through the 'tenant' parameter for the following pages.
+    :param Response response: Outgoing response.
+    :return Response: Response.
+    """
+
+    name: str | None = request.args.get("tenant")
+    if name is not None and connect.exists(name):
+        response.set_cookie("pylaform_tenant", name, samesite="Lax")
+    return response
+
+
+@app.teardown_request
+def release_tenant(error: BaseException | None = None) -> None:
+    """
+    Hand the profile of the request back to the cache.
+    :param BaseException | None error: Unhandled error, if any.
+    :return None: None
+    """
+
+    if "tenant" in g:
+        tenants.release(g.pop("tenant"))
+
+
+@app.errorhandler(Rejected)
+def busy(error: Rejected) -> Response:
+    """
+    Answer rejected compile work fast instead of queueing it.
+    :param Rejected error: Admission rejection.
+    :return Response: 503 with Retry-After.
+    """
+
+    return Response(error.reason, status=503, headers={"Retry-After": str(error.retry_after)})
+
+
+@app.route("/metrics", methods=["GET"])
+def metrics_exposition():
+    return Response(metrics.registry.exposition(), mimetype="text/plain; version=0.0.4")
+
+
+@app.route("/debug/sql", methods=["GET"])
+def sql_trace():
+    """
+    Recent statements and the slow-query log. Only served when PYLAFORM_DEBUG_SQL=1,
+    the log holds bound parameters.
+    """
+
+    if os.environ.get("PYLAFORM_DEBUG_SQL", "0") != "1":
+        abort(404)
+    return jsonify(trace.tracer.report())
 
 
 @app.route("/")
 def landing():
-    return render_template("landing.html", **fatten(resume_query.get_identification()))
+    return render_view("landing.html", "identification")
 
 
 @app.route("/information", methods=["GET", "POST"])
 def information():
     if request.method == 'POST':
-        resume_update.update_identification(request.form)
-        resume_query.purge_cache("identification")
-    return render_template("information.html", **fatten(resume_query.get_identification()))
+        saved(tenant().update.update_identification(request.form))
+    return render_view("information.html", "identification")
 
 
 @app.route("/summary", methods=["GET", "POST"])
 def summary():
     if request.method == 'POST':
-        resume_update.update_summary(request.form)
-        resume_query.purge_cache("summary")
-    return render_template("summary_index.html", **fatten(resume_query.get_summary()))
+        saved(tenant().update.update_summary(request.form))
+    return render_view("summary_index.html", "summary")
 
 @app.route("/education", methods=["GET", "POST"])
 def education():
     if request.method == 'POST':
-        resume_update.update_education(request.form)
-        resume_query.purge_cache("education")
-    return render_template("education_index.html", **fatten(resume_query.get_education()))
+        saved(tenant().update.update_education(request.form))
+    return render_view("education_index.html", "education")
 
 
 @app.route("/certifications", methods=["GET", "POST"])
 def certifications():
     if request.method == 'POST':
-        resume_update.update_certifications(request.form)
-        resume_query.purge_cache("certificaitons")
-    return render_template("certifications_index.html", **fatten(resume_query.get_certifications()))
+        saved(tenant().update.update_certifications(request.form))
+    return render_view("certifications_index.html", "certifications")
 
 
 @app.route("/skills", methods=["GET", "POST"])
 def skills():
     if request.method == 'POST':
-        resume_update.update_skills(request.form)
-        resume_query.purge_cache()
-    return render_template("skills_index.html", **fatten(resume_query.get_skills()))
+        saved(tenant().update.update_skills(request.form))
+    return render_view("skills_index.html", "skills")
 
 
 @app.route("/employment", methods=["GET", "POST"])
 def positions():
     if request.method == 'POST':
-        resume_update.update_positions(request.form)
-        resume_query.purge_cache("positions")
-    return render_template("employment_index.html", **fatten(resume_query.get_positions()))
+        saved(tenant().update.update_positions(request.form))
+    return render_view("employment_index.html", "positions")
 
 
 @app.route("/achievements", methods=["GET", "POST"])
 def achievements():
     if request.method == 'POST':
-        resume_update.update_achievements(request.form)
-        resume_query.purge_cache("achievements")
-    return render_template("achievements_index.html", **fatten(resume_query.get_achievements()))
+        saved(tenant().update.update_achievements(request.form))
+    return render_view("achievements_index.html", "achievements")
 
 
 @app.route("/glossary", methods=["GET", "POST"])
 def glossary():
     if request.method == 'POST':
-        resume_update.update_glossary(request.form)
-        resume_query.purge_cache("glossary")
-    return render_template("glossary_index.html", **fatten(resume_query.get_glossary()))
+        saved(tenant().update.update_glossary(request.form))
+    return render_view("glossary_index.html", "glossary")
+
+
+@app.route("/search", methods=["GET"])
+def search():
+    """
+    Ranked search over achievements, skills, summaries and glossary terms, JSON with '?format=json'.
+    """
+
+    text: str = request.args.get("q", "")
+    results: list[dict[str, str | int | float]] = tenant().query.search(text, request.args.get("limit", 20, type=int))
+    if request.args.get("format") == "json":
+        return jsonify(results)
+    for result in results:
+        result["page"] = SEARCH_PAGES[result["table"]]
+    return render_template("search.html", q=text, results=results, payload=[])
+
+
+@app.route("/tailor", methods=["GET", "POST"])
+def tailor_view():
+    """
+    Ranks achievements and skills against a pasted job description, and renders a resume of the best ones.
+    """
+
+    profile: Tenant = tenant()
+    text: str = request.form.get("job", "")
+    ranked: dict[str, list[tuple[int, float]]] = tailor.tailor(
+        profile.query, text, request.form.get("achievements", 12, type=int), request.form.get("skills", 15, type=int))
+    template: str = request.form.get("template", "")
+    if template in GENERATORS:
+        if not any(ranked.values()):
+            abort(400, "The job description matches no achievement or skill.")
+        with admission.slot(request.remote_addr or ""):
+            context = GenerationContext(profile.name, tailor.selection(ranked))
+            try:
+                pdf: bytes = render(template, context)
+            finally:
+                context.close()
+        return send_file(BytesIO(pdf), mimetype="application/pdf", download_name=f"{template}.pdf")
+    results: dict[str, list[dict[str, str | int | float]]] = {
+        source: [dict(profile.query.rows(table)[row_id], score=score) for row_id, score in ranked[source]]
+        for source, (table, _) in tailor.SOURCES.items()}
+    return render_template("tailor.html", job=text, results=results, payload=[])
 
 
 @app.route("/generate/one-page", methods=["GET"])
 def one_page_doc():
-    generator = onePage.Generator()
-    generator.run()
-    return send_from_directory(uploads, 'one-page.pdf')
+    with admission.slot(request.remote_addr or ""):
+        pdf: bytes = render("one-page", tenant=tenant().name)
+    return send_file(BytesIO(pdf), mimetype="application/pdf", download_name="one-page.pdf")
 
 
 @app.route("/generate/hybrid", methods=["GET"])
 def hybrid_doc():
-    generator = hybrid.Generator()
-    generator.run()
-    return send_from_directory(uploads, 'hybrid.pdf')
+    with admission.slot(request.remote_addr or ""):
+        pdf: bytes = render("hybrid", tenant=tenant().name)
+    return send_file(BytesIO(pdf), mimetype="application/pdf", download_name="hybrid.pdf")
 
 
 if __name__ == '__main__':
@@ -0,0 +1,133 @@
+import argparse
+import json
+import os
+import sys
+
+from pylaform.commands.db import connect
+from pylaform.commands.db.snapshots import Snapshots
+from pylaform.commands.db.transfer import FORMATS, TABLES, Transfer
+from pylaform.latex_templates.context import GenerationContext
+from pylaform.latex_templates.render import GENERATORS, render
+from pylaform.utilities import profiling
+
+
+def main(argv: list[str] | None = None) -> int:
+    """
+    Command line entry point: 'python -m pylaform'.
+    :param list[str] | None argv: Arguments, defaults to sys.argv.
+    :return int: Exit code.
+    """
+
+    parser = argparse.ArgumentParser(prog="pylaform", description="Build resumes from the local database.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    generate = commands.add_parser("generate",
+                                   help="Generate a resume PDF into the data directory of a profile, or to --output.")
+    generate.add_argument("template", choices=sorted(GENERATORS))
+    generate.add_argument("--tenant", default=connect.DEFAULT_TENANT, help="Profile to generate.")
+    generate.add_argument("--profile", action="store_true",
+                          help="Profile the run with cProfile and tracemalloc.")
+    generate.add_argument("--profiles", default=None,
+                          help="Directory receiving profiles, defaults to data/profiles.")
+    generate.add_argument("--output", default=None,
+                          help="Write the PDF to this file, '-' for stdout, compiled in a private temporary directory.")
+
+    export = commands.add_parser("export", help="Stream tables to JSON Lines or a directory of CSV files.")
+    export.add_argument("target", help="JSON Lines file, '-' for stdout, or CSV directory.")
+    importer = commands.add_parser("import", help="Load tables from JSON Lines or a directory of CSV files.")
+    importer.add_argument("source", help="JSON Lines file, '-' for stdin, or CSV directory.")
+    importer.add_argument("--replace", action="store_true", help="Empty the imported tables first.")
+    for transfer in (export, importer):
+        transfer.add_argument("--tenant", default=connect.DEFAULT_TENANT, help="Profile to read or write.")
+        transfer.add_argument("--format", choices=FORMATS,
+                              help="Defaults to csv for directories and jsonl otherwise.")
+        transfer.add_argument("--tables", nargs="+", choices=TABLES, default=list(TABLES))
+        transfer.add_argument("--batch", type=int, default=5000, help="Rows per query and transaction.")
+
+    snapshot = commands.add_parser("snapshot", help="Keep, list, restore and re-render content-addressed snapshots.")
+    snapshots = snapshot.add_subparsers(dest="action", required=True)
+    take = snapshots.add_parser("take", help="Record the resume tables, and a PDF with --template.")
+    take.add_argument("name", help="Label, e.g. the company applied to.")
+    take.add_argument("--template", choices=sorted(GENERATORS), help="Also render and keep this template.")
+    listing = snapshots.add_parser("list", help="Report the snapshots with their sizes.")
+    restore = snapshots.add_parser("restore", help="Replace the resume tables with a snapshot.")
+    restore.add_argument("id", type=int)
+    restore.add_argument("--into", default=None, help="Profile restored into, the snapshot's own by default.")
+    output = snapshots.add_parser("render", help="Write the PDF of a snapshot, re-rendering it if none was kept.")
+    output.add_argument("id", type=int)
+    output.add_argument("template", choices=sorted(GENERATORS))
+    output.add_argument("--output", required=True, help="PDF file, '-' for stdout.")
+    for action in (take, listing, restore, output):
+        action.add_argument("--tenant", default=connect.DEFAULT_TENANT, help="Profile of the snapshots.")
+
+    profile = commands.add_parser("tenant", help="Manage profiles, the web app only serves existing ones.")
+    profiles = profile.add_subparsers(dest="action", required=True)
+    create = profiles.add_parser("create", help="Create a profile from the template database.")
+    create.add_argument("tenant", help="Profile name.")
+
+    args = parser.parse_args(argv)
+    if not connect.valid(args.tenant):
+        parser.error(f"invalid tenant: {args.tenant!r}")
+    match args.command:
+        case "generate":
+            with profiling.profile("generate-" + args.template, args.profile, args.profiles) as running:
+                if args.output is None:
+                    GENERATORS[args.template](args.tenant).run()
+                else:
+                    pdf: bytes = render(args.template, tenant=args.tenant)
+            if args.output == "-":
+                sys.stdout.buffer.write(pdf)
+            elif args.output is not None:
+                with open(args.output, "wb") as output:
+                    output.write(pdf)
+            if running is not None:
+                print(f"Profile written to {running.path}", file=sys.stderr if args.output == "-" else sys.stdout)
+        case "tenant":
+            if connect.exists(args.tenant):
+                parser.error(f"tenant exists: {args.tenant!r}")
+            print(json.dumps({"tenant": args.tenant, "database": connect.path(args.tenant)}), file=sys.stderr)
+        case "snapshot":
+            store = Snapshots(args.tenant)
+            try:
+                match args.action:
+                    case "take":
+                        pdf: bytes | None = render(args.template, tenant=args.tenant) if args.template else None
+                        result: dict | list = store.take(args.name, pdf, args.template or "")
+                    case "list":
+                        result = store.report()
+                    case "restore":
+                        if args.into is not None and not connect.valid(args.into):
+                            parser.error(f"invalid tenant: {args.into!r}")
+                        result = store.restore(args.id, args.into)
+                    case _:
+                        pdf = store.pdf(args.id) if store.report(args.id)[0]["template"] == args.template else None
+                        if pdf is None:
+                            # Rebuild the snapshot in a temporary database, no profile is created or touched.
+                            with store.checkout(args.id) as conn:
+                                pdf = render(args.template, GenerationContext(args.tenant, conn=conn))
+                        if args.output == "-":
+                            sys.stdout.buffer.write(pdf)
+                        else:
+                            with open(args.output, "wb") as file:
+                                file.write(pdf)
+                        result = {"id": args.id, "bytes": len(pdf)}
+            except KeyError as e:
+                parser.error(str(e.args[0]))
+            finally:
+                store.close()
+            print(json.dumps(result), file=sys.stderr)
+        case "export" | "import":
+            location: str = args.target if args.command == "export" else args.source
+            form: str = args.format or ("csv" if os.path.isdir(location) or location.endswith(os.sep) else "jsonl")
+            transfer = Transfer(args.tenant, args.batch)
+            if args.command == "export":
+                result: dict = transfer.export(location, form, args.tables)
+            else:
+                result = transfer.load(location, form, args.replace, args.tables)
+            # Keep stdout for the exported rows.
+            print(json.dumps(result), file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,75 @@
+import argparse
+import json
+import os
+import platform
+import sqlite3
+import sys
+import tempfile
+from datetime import datetime, timezone
+
+from . import suite, synthetic
+
+
+def main(argv: list[str] | None = None) -> int:
+    """
+    Benchmark entry point: 'python -m pylaform.benchmarks'.
+    Prints one JSON document so runs can be stored and compared over time.
+    :param list[str] | None argv: Arguments, defaults to sys.argv.
+    :return int: Exit code.
+    """
+
+    parser = argparse.ArgumentParser(prog="pylaform.benchmarks", description="Time the data layer and renderers.")
+    parser.add_argument("--size", type=int, default=10, help="Scale of the synthetic database.")
+    parser.add_argument("--employers", type=int, help="Employers, defaults to size.")
+    parser.add_argument("--positions", type=int, default=3, help="Positions per employer.")
+    parser.add_argument("--achievements", type=int, default=5, help="Achievements per position.")
+    parser.add_argument("--skills", type=int, help="Skills, defaults to 5 x size.")
+    parser.add_argument("--glossary", type=int, help="Glossary terms, defaults to 2 x size.")
+    parser.add_argument("--disabled", type=float, default=0.0, help="Share of rows hidden from the resume.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per scenario.")
+    parser.add_argument("--compile", action="store_true", help="Run pdflatex in the generator scenarios.")
+    parser.add_argument("--storage", action="store_true",
+                        help="Also compare reads from the file and from its in-memory copy.")
+    parser.add_argument("--output", help="Write the JSON report to a file instead of stdout.")
+    args = parser.parse_args(argv)
+
+    sizes: dict[str, int] = {
+        "employers": args.employers if args.employers is not None else args.size,
+        "positions": args.positions,
+        "achievements": args.achievements,
+        "skills": args.skills if args.skills is not None else 5 * args.size,
+        "glossary": args.glossary if args.glossary is not None else 2 * args.size,
+    }
+
+    with tempfile.TemporaryDirectory() as directory:
+        database: str = os.path.join(directory, "resume.db")
+        rows: dict[str, int] = synthetic.build(database, disabled=args.disabled, seed=args.seed, **sizes)
+        results: list[dict] = suite.run(database, args.repeat, args.compile)
+        if args.storage:
+            results += suite.storage(database, args.repeat)
+
+    report: dict = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+            "sizes": sizes,
+            "rows": rows,
+            "disabled": args.disabled,
+            "seed": args.seed,
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
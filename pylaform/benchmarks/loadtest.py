@@ -0,0 +1,316 @@
+import argparse
+import importlib
+import json
+import os
+import queue
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from typing import Callable
+
+from werkzeug.datastructures.structures import MultiDict
+
+from . import synthetic
+from .suite import form_data
+from ..commands.db.query import Get
+from ..utilities import metrics
+
+# Edit pages read by the 'get' mix.
+PAGES: tuple[str, ...] = ("/", "/information", "/summary", "/education", "/certifications",
+                          "/skills", "/employment", "/achievements", "/glossary")
+
+# Form posts of the 'post' mix, by route and the 'Get' table feeding its form.
+FORMS: tuple[tuple[str, str], ...] = (("/employment", "positions"), ("/skills", "skills"), ("/glossary", "glossary"))
+
+# Generators of the 'generate' mix.
+DOCUMENTS: tuple[str, ...] = ("/generate/hybrid", "/generate/one-page")
+
+
+def percentile(values: list[float], share: float) -> float:
+    """
+    Nearest-rank percentile.
+    :param list[float] values: Sorted samples.
+    :param float share: Percentile between 0 and 1.
+    :return float: Sample at the percentile, 0 when empty.
+    """
+
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, max(0, int(round(share * len(values) + 0.5)) - 1))]
+
+
+class Client:
+    """
+    Sends requests either in-process through the Flask test client or to a running server.
+    :return None: None
+    """
+
+    def __init__(self, url: str | None = None, app_path: str = "app:app") -> None:
+        self.url: str | None = url.rstrip("/") if url else None
+        self.app = None
+        self.local = threading.local()
+        if self.url is None:
+            module, attr = app_path.split(":")
+            self.app = getattr(importlib.import_module(module), attr)
+            self.app.config["PROPAGATE_EXCEPTIONS"] = True
+
+    def request(self, method: str, path: str, form: list[tuple[str, str]] | None = None) -> tuple[int, str]:
+        """
+        Send one request.
+        :param str method: HTTP method.
+        :param str path: Route.
+        :param list[tuple[str, str]] | None form: Form fields for POST.
+        :return tuple[int, str]: Status code and error text, empty when successful.
+        """
+
+        if self.app is not None:
+            if not hasattr(self.local, "client"):
+                self.local.client = self.app.test_client()
+            try:
+                response = self.local.client.open(path, method=method, data=MultiDict(form) if form else None)
+                response.close()
+                return response.status_code, ""
+            except Exception as e:
+                return 500, f"{type(e).__name__}: {e}"
+
+        data: bytes | None = urllib.parse.urlencode(form).encode() if form is not None else None
+        try:
+            with urllib.request.urlopen(urllib.request.Request(self.url + path, data, method=method)) as response:
+                response.read()
+                return response.status, ""
+        except urllib.error.HTTPError as e:
+            return e.code, e.read().decode(errors="replace")[:200]
+        except OSError as e:
+            return 0, f"{type(e).__name__}: {e}"
+
+    def metric(self, name: str) -> float:
+        """
+        Total of a metric reported by the application, over every label.
+        :param str name: Sample name, e.g. 'pylaform_write_batch_size_count'.
+        :return float: Sum of the matching samples.
+        """
+
+        if self.app is not None:
+            lines: list[str] = metrics.registry.exposition().splitlines()
+        else:
+            try:
+                with urllib.request.urlopen(self.url + "/metrics") as response:
+                    lines = response.read().decode().splitlines()
+            except OSError:
+                return 0.0
+        return sum(float(line.rsplit(" ", 1)[1]) for line in lines
+                   if line.split("{", 1)[0].split(" ", 1)[0] == name)
+
+    def retries(self) -> float:
+        """
+        Total tenacity retries reported by the application.
+        :return float: Retry count.
+        """
+
+        return self.metric("pylaform_retries_total")
+
+    def writes(self) -> dict[str, float]:
+        """
+        Totals of the write queue reported by the application.
+        :return dict[str, float]: Group commits, mutations and seconds spent queued.
+        """
+
+        return {"commits": self.metric("pylaform_write_batch_size_count"),
+                "mutations": self.metric("pylaform_write_batch_size_sum"),
+                "queued": self.metric("pylaform_write_queue_seconds_sum")}
+
+
+class LoadTest:
+    """
+    Open-loop load generator mixing page reads, form posts and document generation.
+    Latency is measured from the scheduled send time, so queueing inside the harness counts.
+    :return None: None
+    """
+
+    def __init__(self, client: Client, rates: dict[str, float], duration: float, workers: int) -> None:
+        self.client: Client = client
+        self.rates: dict[str, float] = rates
+        self.duration: float = duration
+        self.workers: int = workers
+        self.jobs: queue.Queue = queue.Queue()
+        self.lock = threading.Lock()
+        self.samples: dict[str, list[tuple[float, int, str]]] = {kind: [] for kind in rates}
+        self.forms: dict[str, list[tuple[str, str]]] = {}
+
+    def prepare(self) -> None:
+        """
+        Build the form posts from the current content, as the edit pages would send them.
+        :return None: None
+        """
+
+        query = Get()
+        for route, table in FORMS:
+            self.forms[route] = list(form_data(getattr(query, "get_" + table)()).items(multi=True))
+
+    def work(self, kind: str, index: int) -> Callable[[], tuple[int, str]]:
+        """
+        Pick the request for one scheduled job.
+        :param str kind: 'get', 'post' or 'generate'.
+        :param int index: Sequence number of the job within its kind.
+        :return Callable: Sends the request.
+        """
+
+        match kind:
+            case "get":
+                path: str = PAGES[index % len(PAGES)]
+                return lambda: self.client.request("GET", path)
+            case "post":
+                route: str = FORMS[index % len(FORMS)][0]
+                return lambda: self.client.request("POST", route, self.forms[route])
+            case _:
+                document: str = DOCUMENTS[index % len(DOCUMENTS)]
+                return lambda: self.client.request("GET", document)
+
+    def schedule(self, kind: str, rate: float, start: float) -> None:
+        """
+        Queue jobs of one kind at a fixed rate.
+        :param str kind: 'get', 'post' or 'generate'.
+        :param float rate: Requests per second.
+        :param float start: Monotonic start time.
+        :return None: None
+        """
+
+        index: int = 0
+        while True:
+            due: float = start + index / rate
+            if due - start >= self.duration:
+                return
+            time.sleep(max(0.0, due - time.monotonic()))
+            self.jobs.put((kind, due, self.work(kind, index)))
+            index += 1
+
+    def worker(self) -> None:
+        while True:
+            job = self.jobs.get()
+            if job is None:
+                return
+            kind, due, send = job
+            status, error = send()
+            with self.lock:
+                self.samples[kind].append((time.monotonic() - due, status, error))
+
+    def run(self) -> dict:
+        """
+        Drive the load and summarise it.
+        :return dict: Throughput, latency percentiles, error rates and lock contention.
+        """
+
+        self.prepare()
+        retries: float = self.client.retries()
+        writes: dict[str, float] = self.client.writes()
+        workers: list[threading.Thread] = [threading.Thread(target=self.worker, daemon=True)
+                                           for _ in range(self.workers)]
+        for thread in workers:
+            thread.start()
+
+        start: float = time.monotonic()
+        schedulers: list[threading.Thread] = [
+            threading.Thread(target=self.schedule, args=(kind, rate, start), daemon=True)
+            for kind, rate in self.rates.items() if rate > 0]
+        for thread in schedulers:
+            thread.start()
+        for thread in schedulers:
+            thread.join()
+        for _ in workers:
+            self.jobs.put(None)
+        for thread in workers:
+            thread.join()
+        elapsed: float = time.monotonic() - start
+
+        report: dict = {"elapsed": elapsed, "workers": self.workers, "rates": self.rates, "kinds": {}}
+        everything: list[tuple[float, int, str]] = []
+        for kind, samples in self.samples.items():
+            report["kinds"][kind] = self.summarise(samples, elapsed)
+            everything += samples
+        report["total"] = self.summarise(everything, elapsed)
+        report["total"]["retries"] = self.client.retries() - retries
+        written: dict[str, float] = {key: value - writes[key] for key, value in self.client.writes().items()}
+        report["writes"] = {
+            "commits": written["commits"],
+            "mutations": written["mutations"],
+            "throughput": written["mutations"] / elapsed if elapsed else 0.0,
+            "batch_mean": written["mutations"] / written["commits"] if written["commits"] else 0.0,
+            "queue_mean": written["queued"] / written["mutations"] if written["mutations"] else 0.0,
+        }
+        return report
+
+    @staticmethod
+    def summarise(samples: list[tuple[float, int, str]], elapsed: float) -> dict:
+        """
+        Summarise latency samples.
+        :param list[tuple[float, int, str]] samples: Latency, status and error per request.
+        :param float elapsed: Test duration in seconds.
+        :return dict: Summary.
+        """
+
+        latencies: list[float] = sorted(sample[0] for sample in samples)
+        errors: int = sum(1 for sample in samples if sample[1] == 0 or sample[1] >= 500)
+        locked: int = sum(1 for sample in samples if "database is locked" in sample[2])
+        return {
+            "requests": len(samples),
+            "throughput": len(samples) / elapsed if elapsed else 0.0,
+            "errors": errors,
+            "error_rate": errors / len(samples) if samples else 0.0,
+            "rejected": sum(1 for sample in samples if sample[1] == 503),
+            "lock_errors": locked,
+            "p50": percentile(latencies, 0.50),
+            "p90": percentile(latencies, 0.90),
+            "p99": percentile(latencies, 0.99),
+            "max": latencies[-1] if latencies else 0.0,
+        }
+
+
+def main(argv: list[str] | None = None) -> int:
+    """
+    Load test entry point: 'python -m pylaform.benchmarks.loadtest'.
+    :param list[str] | None argv: Arguments, defaults to sys.argv.
+    :return int: Exit code.
+    """
+
+    parser = argparse.ArgumentParser(prog="pylaform.benchmarks.loadtest", description="Load test the Flask routes.")
+    parser.add_argument("--url", help="Base URL of a running server. Runs in-process when omitted.")
+    parser.add_argument("--app", default="app:app", help="Flask application for in-process runs.")
+    parser.add_argument("--size", type=int, default=10,
+                        help="Scale of the synthetic database used in-process, 0 keeps data/resume.db.")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds of load.")
+    parser.add_argument("--workers", type=int, default=8, help="Concurrent connections.")
+    parser.add_argument("--get-rate", type=float, default=20.0, help="Page reads per second.")
+    parser.add_argument("--post-rate", type=float, default=2.0, help="Form posts per second.")
+    parser.add_argument("--generate-rate", type=float, default=0.0, help="Document generations per second.")
+    parser.add_argument("--output", help="Write the JSON report to a file instead of stdout.")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as directory:
+        if args.url is None and args.size > 0:
+            os.environ["PYLAFORM_DB"] = os.path.join(directory, "resume.db")
+            synthetic.build(os.environ["PYLAFORM_DB"], employers=args.size, skills=5 * args.size,
+                            glossary=2 * args.size)
+        if os.curdir not in sys.path:
+            sys.path.insert(0, os.curdir)
+
+        rates: dict[str, float] = {"get": args.get_rate, "post": args.post_rate, "generate": args.generate_rate}
+        report: dict = LoadTest(Client(args.url, args.app), rates, args.duration, args.workers).run()
+        report["sqlite"] = sqlite3.sqlite_version
+        report["target"] = args.url or args.app
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,186 @@
+import os
+import sqlite3
+import statistics
+import time
+from typing import Callable
+
+from pylatex import Document
+from werkzeug.datastructures.structures import ImmutableMultiDict
+
+from ..commands.db import memory
+from ..commands.db.query import Get
+from ..commands.latex import Commands
+from ..latex_templates import hybrid, onePage
+from ..latex_templates.common import Common
+from ..utilities import tailor
+from ..utilities.commands import fatten, listify, slim, transform_get_id, unique
+
+# Cached tables served by 'Get.get_*'.
+TABLES: tuple[str, ...] = ("identification", "summary", "skills", "positions", "achievements",
+                           "glossary", "education", "certifications")
+
+# Job description ranked by the 'tailor.*' scenarios.
+JOB: str = ("Platform engineer to scale our service infrastructure, reduce latency and improve release quality "
+            "with automated pipelines, monitoring and security reviews.")
+
+# Sections rendered by 'Common'.
+SECTIONS: tuple[str, ...] = ("modern_contact_header", "retro_contact_header", "modern_summary_details",
+                             "retro_summary_details", "modern_skills", "retro_skills",
+                             "modern_work_history", "retro_work_history")
+
+
+def measure(name: str, func: Callable, repeat: int, setup: Callable | None = None) -> dict[str, str | int | float]:
+    """
+    Time a scenario several times.
+    :param str name: Scenario name.
+    :param Callable func: Timed work.
+    :param int repeat: Number of timed runs.
+    :param Callable | None setup: Untimed work run before each timed run.
+    :return dict[str, str | int | float]: Timings in seconds.
+    """
+
+    timings: list[float] = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start: float = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+
+    return {
+        "name": name,
+        "repeat": repeat,
+        "min": min(timings),
+        "median": statistics.median(timings),
+        "mean": statistics.fmean(timings),
+        "max": max(timings),
+    }
+
+
+def form_data(raw: list[dict[str, str | int | bool]]) -> ImmutableMultiDict:
+    """
+    Build the form an edit page would post back for a raw table list.
+    :param list[dict[str, str | int | bool]] raw: Raw return grouped by 'id/attr/value/state.'
+    :return ImmutableMultiDict: Form data.
+    """
+
+    # Nested display names are posted under their column name.
+    columns: dict[str, str] = {"employername": "employer", "positionname": "position", "schoolname": "school"}
+    fields: list[tuple[str, str]] = []
+    for item in raw:
+        item_id: str = str(item["id"]).split("_")[-1]
+        attr: str = columns.get(item["attr"], item["attr"])
+        fields.append((f"{item_id}_{attr}", str(item["value"])))
+        if item["state"]:
+            fields.append((f"{item_id}_{attr}_enabled", "on"))
+    return ImmutableMultiDict(fields)
+
+
+def run(database: str, repeat: int = 5, compile_pdf: bool = False) -> list[dict[str, str | int | float]]:
+    """
+    Run every scenario against a database.
+    :param str database: Database file, usually built by 'synthetic.build'.
+    :param int repeat: Number of timed runs per scenario.
+    :param bool compile_pdf: Also run pdflatex in the 'generator.*' scenarios.
+    :return list[dict[str, str | int | float]]: One timing record per scenario.
+    """
+
+    os.environ["PYLAFORM_DB"] = database
+    results: list[dict[str, str | int | float]] = []
+    query = Get()
+
+    # Data layer.
+    for table in TABLES:
+        getter: Callable = getattr(query, "get_" + table)
+        results.append(measure(f"get.{table}", getter, repeat, lambda table=table: query.purge_cache(table)))
+    for text in ("platform", "se", "reduced latency"):
+        results.append(measure(f"search.{text.replace(' ', '_')}", lambda text=text: query.search(text), repeat))
+    results.append(measure("tailor.index", lambda: tailor.index(query), repeat, tailor.indexes.clear))
+    results.append(measure("tailor.rank", lambda: tailor.tailor(query, JOB), repeat))
+
+    raw: dict[str, list[dict[str, str | int | bool]]] = {table: getattr(query, "get_" + table)() for table in TABLES}
+    for table in TABLES:
+        rows = raw[table]
+        results.append(measure(f"listify.{table}", lambda rows=rows: listify(rows), repeat))
+        results.append(measure(f"fatten.{table}", lambda rows=rows: fatten(rows), repeat))
+        results.append(measure(f"slim.{table}", lambda rows=rows: slim(rows), repeat))
+        results.append(measure(f"unique.{table}", lambda rows=rows: unique(rows), repeat))
+        form = form_data(rows)
+        results.append(measure(f"transform_get_id.{table}", lambda form=form: transform_get_id(form), repeat))
+
+    # Renderers.
+    cmd = Commands()
+    texts: list[str] = [item["value"] for item in raw["summary"] + raw["achievements"] if item["attr"] == "longdesc"]
+    for link_type in ("modern", "retro"):
+        results.append(measure(
+            f"glossary_inject.{link_type}",
+            lambda link_type=link_type: [cmd.glossary_inject(text, link_type) for text in texts], repeat))
+
+    common = Common()
+
+    def cold() -> None:
+        for table in TABLES:
+            common.resume_data.purge_cache(table)
+            common.cmd.queries.purge_cache(table)
+
+    for section in SECTIONS:
+        results.append(measure(
+            f"common.{section}", lambda section=section: getattr(common, section)(Document()), repeat, cold))
+
+    for name, module in (("hybrid", hybrid), ("one-page", onePage)):
+        def full_run(module=module) -> None:
+            generator = module.Generator()
+            if not compile_pdf:
+                generator.generate = lambda: None
+            generator.run()
+        results.append(measure(f"generator.{name}" + ("" if compile_pdf else ".no_compile"), full_run, repeat))
+
+    return results
+
+
+def storage(database: str, repeat: int = 5) -> list[dict[str, str | int | float]]:
+    """
+    Compare reads from the database file with reads from its in-memory copy, and time copy refreshes.
+    :param str database: Database file, usually built by 'synthetic.build'.
+    :param int repeat: Number of timed runs per scenario.
+    :return list[dict[str, str | int | float]]: One timing record per scenario.
+    """
+
+    os.environ["PYLAFORM_DB"] = database
+    previous: str | None = os.environ.get("PYLAFORM_HOT_COPY")
+    results: list[dict[str, str | int | float]] = []
+    try:
+        for mode, flag in (("file", "0"), ("memory", "1")):
+            os.environ["PYLAFORM_HOT_COPY"] = flag
+            memory.copies.clear()
+            query = Get()
+            for table in TABLES:
+                getter: Callable = getattr(query, "get_" + table)
+                results.append(measure(f"storage.{mode}.get.{table}", getter, repeat,
+                                       lambda table=table: query.purge_cache(table)))
+            for name, module in (("hybrid", hybrid), ("one-page", onePage)):
+                def render(module=module) -> None:
+                    generator = module.Generator()
+                    generator.generate = lambda: None
+                    generator.run()
+                results.append(measure(f"storage.{mode}.generator.{name}.no_compile", render, repeat))
+
+        # Refreshes after a write to one table, and after a full reload.
+        hot: memory.HotCopy = memory.copy()
+        writer: sqlite3.Connection = sqlite3.connect(database)
+
+        def touch() -> None:
+            writer.execute("UPDATE `glossary` SET `state` = `state` WHERE `id` = (SELECT MIN(`id`) FROM `glossary`)")
+            writer.commit()
+
+        results.append(measure("storage.refresh.incremental", hot.current, repeat, touch))
+        results.append(measure("storage.refresh.full", hot.full, repeat))
+        writer.close()
+    finally:
+        memory.copies.clear()
+        if previous is None:
+            os.environ.pop("PYLAFORM_HOT_COPY", None)
+        else:
+            os.environ["PYLAFORM_HOT_COPY"] = previous
+
+    return results
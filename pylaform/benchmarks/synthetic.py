@@ -0,0 +1,111 @@
+import os
+import random
+import shutil
+import sqlite3
+
+# Schema source shipped with the package.
+TEMPLATE: str = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "resources", "resume.db")
+
+# Tables emptied before the synthetic rows are written.
+TABLES: tuple[str, ...] = ("identification", "employer", "position", "achievement", "skill",
+                           "summary", "glossary", "school", "focus", "certification")
+
+WORDS: tuple[str, ...] = (
+    "designed", "built", "migrated", "automated", "scaled", "led", "reduced", "improved", "deployed",
+    "monitored", "platform", "pipeline", "service", "cluster", "latency", "throughput", "team", "customers",
+    "release", "infrastructure", "database", "network", "security", "budget", "roadmap", "quality")
+
+
+def sentence(rng: random.Random, terms: list[str], length: int = 14) -> str:
+    """
+    Build a sentence, sometimes mentioning glossary terms so 'glossary_inject' has work to do.
+    :param random.Random rng: Seeded generator.
+    :param list[str] terms: Glossary terms.
+    :param int length: Number of words.
+    :return str: Sentence.
+    """
+
+    words: list[str] = [rng.choice(WORDS) for _ in range(length)]
+    if terms and rng.random() < 0.5:
+        words.insert(rng.randrange(1, length), rng.choice(terms))
+    return " ".join(words).capitalize() + "."
+
+
+def build(path: str, employers: int = 10, positions: int = 3, achievements: int = 5,
+          skills: int = 50, glossary: int = 20, disabled: float = 0.0, seed: int = 0) -> dict[str, int]:
+    """
+    Create a synthetic resume database with the schema of 'resources/resume.db'.
+    :param str path: Target database file, replaced if it exists.
+    :param int employers: Number of employers.
+    :param int positions: Positions per employer.
+    :param int achievements: Achievements per position.
+    :param int skills: Number of skills.
+    :param int glossary: Number of glossary terms.
+    :param float disabled: Share of summaries, achievements and skills hidden from the resume.
+    :param int seed: Random seed.
+    :return dict[str, int]: Rows written per table.
+    """
+
+    rng = random.Random(seed)
+    shutil.copyfile(TEMPLATE, path)
+    conn = sqlite3.connect(path)
+    cursor = conn.cursor()
+    for table in TABLES:
+        cursor.execute(f"DELETE FROM `{table}`")
+
+    cursor.executemany(
+        "INSERT INTO `identification` (`id`, `attr`, `value`, `state`) VALUES (?, ?, ?, 1)",
+        [(1, "name", "Synthetic Person"), (2, "phone", "1234567890"), (3, "email", "person@example.com"),
+         (4, "www", "example.com"), (5, "location", "Seattle, WA"), (6, "description", "Synthetic resume")])
+
+    terms: list[str] = [f"Term{i}" for i in range(glossary)]
+    cursor.executemany(
+        "INSERT INTO `glossary` (`term`, `url`, `description`, `state`) VALUES (?, ?, ?, 1)",
+        [(term, f"https://example.com/{term.lower()}", sentence(rng, [])) for term in terms])
+
+    cursor.executemany(
+        "INSERT INTO `summary` (`shortdesc`, `longdesc`, `summaryorder`, `state`) VALUES (?, ?, ?, ?)",
+        [(f"Tenet {i}", sentence(rng, terms), i, int(rng.random() >= disabled))
+         for i in range(max(3, employers // 2))])
+
+    position_ids: list[tuple[int, int]] = []
+    for e in range(employers):
+        cursor.execute(
+            "INSERT INTO `employer` (`employer`, `startdate`, `enddate`, `location`, `state`) VALUES (?, ?, ?, ?, 1)",
+            (f"Employer {e}", f"{1990 + e}-01-01", f"{1991 + e}-01-01", "City, Region"))
+        employer_id: int = cursor.lastrowid
+        for p in range(positions):
+            cursor.execute(
+                "INSERT INTO `position` (`employer`, `position`, `startdate`, `enddate`, `state`)"
+                " VALUES (?, ?, ?, ?, 1)",
+                (employer_id, f"Position {e}.{p}", f"{1990 + e}-{p + 1:02d}-01",
+                 "9999-01-01" if e == employers - 1 and p == positions - 1 else f"{1990 + e}-{p + 2:02d}-01"))
+            position_ids.append((employer_id, cursor.lastrowid))
+            cursor.executemany(
+                "INSERT INTO `achievement` (`position`, `employer`, `shortdesc`, `longdesc`, `state`)"
+                " VALUES (?, ?, ?, ?, ?)",
+                [(cursor.lastrowid, employer_id, sentence(rng, terms, 8), sentence(rng, terms),
+                  int(rng.random() >= disabled)) for _ in range(achievements)])
+
+    rows: list[tuple] = []
+    for s in range(skills):
+        employer_id, position_id = rng.choice(position_ids) if position_ids else (0, 0)
+        rows.append((employer_id, position_id, f"Skill {s}", sentence(rng, terms), f"Category {s % 5}",
+                     f"Subcategory {s % 15}", s % 5, s, int(rng.random() >= disabled)))
+    cursor.executemany(
+        "INSERT INTO `skill` (`employer`, `position`, `shortdesc`, `longdesc`, `category`, `subcategory`,"
+        " `categoryorder`, `skillorder`, `state`) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+
+    cursor.execute(
+        "INSERT INTO `school` (`school`, `location`, `state`) VALUES ('Synthetic University', 'Seattle, WA', 1)")
+    cursor.execute(
+        "INSERT INTO `focus` (`school`, `focus`, `startdate`, `enddate`, `state`)"
+        " VALUES (?, 'Computer Science', '1986-09-01', '1990-06-01', 1)", (cursor.lastrowid,))
+    cursor.execute(
+        "INSERT INTO `certification` (`certification`, `year`, `state`) VALUES ('Certified Thing', 2020, 1)")
+    conn.commit()
+
+    result: dict[str, int] = {table: cursor.execute(f"SELECT COUNT(*) FROM `{table}`").fetchone()[0]
+                              for table in TABLES}
+    conn.close()
+    return result
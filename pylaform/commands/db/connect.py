@@ -1,18 +1,206 @@
 import os
+import re
 import shutil
 import sqlite3
+import tempfile
+import threading
 
+from ...utilities import metrics
 
-def db() -> sqlite3.Connection:
+# Profile served when a request names none.
+DEFAULT_TENANT: str = "default"
+
+# Database every new profile starts from.
+TEMPLATE: str = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+                             "resources", "resume.db")
+
+# Profile names double as directory names.
+TENANT = re.compile(r"^[A-Za-z0-9][A-Za-z0-9_.-]{0,63}$")
+
+# Prepared statements kept per connection, above the number of registered statements.
+STATEMENT_CACHE: int = int(os.environ.get("PYLAFORM_STATEMENT_CACHE", 256))
+
+# Every resume table, parents before the tables referencing them.
+TABLES: tuple[str, ...] = ("identification", "employer", "position", "achievement", "skill",
+                           "summary", "school", "focus", "certification", "glossary")
+
+# Searchable tables: kind stored in the low bits of the 'search' rowid, title and body columns.
+SEARCH: dict[str, tuple[int, str, str]] = {
+    "achievement": (0, "shortdesc", "longdesc"),
+    "skill": (1, "shortdesc", "longdesc"),
+    "summary": (2, "shortdesc", "longdesc"),
+    "glossary": (3, "term", "description"),
+}
+# Bits of the 'search' rowid holding the kind, 'rowid = id * 8 + kind'.
+SEARCH_BITS: int = 3
+
+# Database files given a 'table_version' table in this process.
+migrated: set[str] = set()
+migrating = threading.Lock()
+
+
+def valid(tenant: str) -> bool:
+    """
+    Whether a profile name is acceptable.
+    :param str tenant: Profile name.
+    :return bool: Name is valid.
+    """
+
+    return bool(TENANT.match(tenant)) and tenant.strip(".") == tenant
+
+
+def location(tenant: str = DEFAULT_TENANT) -> str:
+    """
+    Data directory of a profile, without creating it.
+    The default profile keeps 'data/', the others live under PYLAFORM_TENANTS (default 'data/tenants').
+    :param str tenant: Profile name.
+    :return str: Directory.
+    """
+
+    if not valid(tenant):
+        raise ValueError(f"Invalid tenant: {tenant!r}")
+    path: str = os.path.join(os.path.abspath(os.curdir), "data")
+    if tenant != DEFAULT_TENANT:
+        path = os.path.join(os.environ.get("PYLAFORM_TENANTS", os.path.join(path, "tenants")), tenant)
+    return path
+
+
+def directory(tenant: str = DEFAULT_TENANT) -> str:
+    """
+    Data directory of a profile, holding its database and generated documents, see 'location'.
+    :param str tenant: Profile name.
+    :return str: Existing directory.
+    """
+
+    path: str = location(tenant)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def exists(tenant: str) -> bool:
+    """
+    Whether a profile was created, without creating it. The default profile always exists.
+    :param str tenant: Profile name.
+    :return bool: Profile has a database.
+    """
+
+    return valid(tenant) and (tenant == DEFAULT_TENANT or os.path.isfile(os.path.join(location(tenant), "resume.db")))
+
+
+def path(tenant: str = DEFAULT_TENANT) -> str:
+    """
+    Database file of a profile, created from 'resources/resume.db' on first use.
+    The PYLAFORM_DB environment variable points the default profile at another file, e.g. for benchmarks.
+    :param str tenant: Profile name.
+    :return str: Database file.
+    """
+
+    database: str = os.environ.get("PYLAFORM_DB", "") if tenant == DEFAULT_TENANT else ""
+    if not database:
+        database = os.path.join(directory(tenant), "resume.db")
+        if not os.path.exists(database):
+            try:
+                # Copy next to the target and rename, racing requests never see a partial file.
+                handle, partial = tempfile.mkstemp(dir=os.path.dirname(database), suffix=".partial")
+                os.close(handle)
+                shutil.copyfile(TEMPLATE, partial)
+                os.replace(partial, database)
+            except Exception as e:
+                raise RuntimeError(f"Do you have write permissions for the container? Error: {e}")
+    return database
+
+
+def db(tenant: str = DEFAULT_TENANT) -> sqlite3.Connection:
     """
     Connects to the local database resource.
+    :param str tenant: Profile name.
     :return sqlite3.Connection: DB connection session.
     """
-    path: str = os.path.abspath(os.curdir)
-    if not os.path.exists(os.path.join(path, 'data/resume.db')):
-        try:
-            shutil.copyfile(os.path.join(path, 'pylaform/resources/resume.db'), os.path.join(path, 'data/resume.db'))
-        except Exception as e:
-            raise f"Do you have write permissions for the container? Error: {e}"
 
-    return sqlite3.connect(os.path.join(path, "data/resume.db"), check_same_thread=False)
+    database: str = path(tenant)
+    conn: sqlite3.Connection = sqlite3.connect(database, check_same_thread=False,
+                                                 cached_statements=STATEMENT_CACHE)
+    conn.set_trace_callback(metrics.trace_statement)
+    with migrating:
+        if database not in migrated:
+            migrate(conn)
+            migrated.add(database)
+    return conn
+
+
+def scratch(directory: str) -> sqlite3.Connection:
+    """
+    Connects to a new database created from 'TEMPLATE' in a directory, for throwaway work that must not touch
+    any profile, e.g. re-rendering a snapshot. The caller removes the directory.
+    :param str directory: Existing directory.
+    :return sqlite3.Connection: DB connection session.
+    """
+
+    database: str = os.path.join(directory, "resume.db")
+    shutil.copyfile(TEMPLATE, database)
+    conn: sqlite3.Connection = sqlite3.connect(database, check_same_thread=False, cached_statements=STATEMENT_CACHE)
+    conn.set_trace_callback(metrics.trace_statement)
+    migrate(conn)
+    return conn
+
+
+def migrate(conn: sqlite3.Connection) -> None:
+    """
+    Adds the 'table_version' table, counting the writes of every resume table through triggers.
+    Statement-level triggers do not exist in SQLite, every written row counts.
+    Adds the FTS5 'search' index over the 'SEARCH' tables, filled once and kept in sync by triggers.
+    :param sqlite3.Connection conn: DB connection session.
+    :return None: None
+    """
+
+    statements: list[str] = [
+        """
+        CREATE TABLE IF NOT EXISTS `table_version` (
+            `name`    TEXT    NOT NULL PRIMARY KEY,
+            `version` INTEGER NOT NULL DEFAULT 0
+        );
+        """]
+    for table in TABLES:
+        statements.append(f"INSERT OR IGNORE INTO `table_version` (`name`) VALUES ('{table}');")
+        for event in ("INSERT", "UPDATE", "DELETE"):
+            statements.append(
+                f"""
+                CREATE TRIGGER IF NOT EXISTS `{table}_version_{event.lower()}`
+                AFTER {event} ON `{table}`
+                BEGIN
+                    UPDATE `table_version` SET `version` = `version` + 1 WHERE `name` = '{table}';
+                END;
+                """)
+    indexed: bool = bool(conn.execute("SELECT 1 FROM `sqlite_master` WHERE `name` = 'search';").fetchone())
+    statements.append(
+        """
+        CREATE VIRTUAL TABLE IF NOT EXISTS `search` USING fts5(`title`, `body`, prefix = '2 3');
+        """)
+    for table, (kind, title, body) in SEARCH.items():
+        row: str = f"`id` * {1 << SEARCH_BITS} + {kind}"
+        if not indexed:
+            statements.append(
+                f"""
+                INSERT OR REPLACE INTO `search` (`rowid`, `title`, `body`)
+                SELECT {row}, `{title}`, `{body}` FROM `{table}`;
+                """)
+        # Only edits of the indexed text reindex a row, not state or order changes.
+        for event in ("INSERT", f"UPDATE OF `{title}`, `{body}`"):
+            statements.append(
+                f"""
+                CREATE TRIGGER IF NOT EXISTS `{table}_search_{event.split()[0].lower()}`
+                AFTER {event} ON `{table}`
+                BEGIN
+                    INSERT OR REPLACE INTO `search` (`rowid`, `title`, `body`)
+                    VALUES (new.{row}, new.`{title}`, new.`{body}`);
+                END;
+                """)
+        statements.append(
+            f"""
+            CREATE TRIGGER IF NOT EXISTS `{table}_search_delete`
+            AFTER DELETE ON `{table}`
+            BEGIN
+                DELETE FROM `search` WHERE `rowid` = old.{row};
+            END;
+            """)
+    conn.executescript("BEGIN IMMEDIATE;\n" + "\n".join(statements) + "\nCOMMIT;")
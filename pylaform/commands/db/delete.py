@@ -1,8 +1,17 @@
 from sqlite3 import Connection, Cursor
+from typing import Callable, Iterable
 
-from tenacity import retry, stop_after_delay
+from . import connect, statements, trace
+from .query import DEPENDENCIES
+from .writer import Writer, mutation
+from ...utilities import metrics, resilience
 
-from . import connect
+# Rows removed with each table, by referencing table and column.
+REFERENCES: dict[str, tuple[tuple[str, str], ...]] = {
+    "employer": (("position", "employer"), ("achievement", "employer"), ("skill", "employer")),
+    "position": (("achievement", "position"), ("skill", "position")),
+    "school": (("focus", "school"),),
+}
 
 
 class Delete:
@@ -12,60 +21,103 @@ class Delete:
     :return None: None
     """
     
-    @retry(stop=(stop_after_delay(10)))
-    def __init__(self) -> None:
-        self.conn: Connection = connect.db()
+    @resilience.retrying()
+    def __init__(self, writer: Writer | None = None, tenant: str = connect.DEFAULT_TENANT) -> None:
+        self.writer: Writer = writer if writer is not None else Writer.open(tenant)
+        self.conn: Connection = self.writer.conn
         self.cursor: Cursor = self.conn.cursor()
 
-    def delete_association(self, associated_id: str, associated_table: str, target_table: str) -> None:
+    def plan(self, table: str, ids: Iterable[int], plan: dict[str, set[int]] | None = None) -> dict[str, set[int]]:
         """
-        Dynamically find a resource and delete its association.
-        :param str associated_id: Find target by associated ID.
-        :param str associated_table: Associated table.
-        :param str target_table: Target table.
+        Computes every row removed with a set of rows, following 'REFERENCES'.
+        :param str table: Table of the deleted rows.
+        :param Iterable[int] ids: IDs of the deleted rows.
+        :param dict[str, set[int]] | None plan: Plan to extend.
+        :return dict[str, set[int]]: IDs to delete per table.
+        """
+
+        if table not in DEPENDENCIES:
+            raise ValueError(f"Unknown table: {table}")
+        plan = {} if plan is None else plan
+        pending: list[tuple[str, set[int]]] = [(table, {int(row_id) for row_id in ids})]
+        while pending:
+            table, ids = pending.pop(0)
+            ids -= plan.setdefault(table, set())
+            if not ids:
+                continue
+            plan[table] |= ids
+            for child, column in REFERENCES.get(table, ()):
+                children: set[int] = set()
+                for chunk in statements.chunks(ids):
+                    children.update(row[0] for row in trace.fetch(
+                        self.cursor, *statements.template("children", child, column, chunk)))
+                pending.append((child, children))
+
+        return plan
+
+    def run(self, build: Callable[[], dict[str, set[int]]]) -> None:
+        """
+        Builds and deletes a plan in the running mutation, one statement per table and 'statements.CHUNK' rows.
+        The writer holds the write lock while planning, so the plan stays complete.
+        :param Callable build: Returns the IDs to delete per table.
         :return None: None
         """
 
-        find_target = self.cursor.execute(
-            f"""
-            SELECT {target_table}
-            FROM {associated_table}
-            WHERE `id` = {int(associated_id)};
-            """)
-
-        # If no other associations to target.
-        if len(find_target.fetchall()) <= 1:
-            self.cursor.execute(
-                f"""
-                DELETE FROM {target_table}
-                WHERE `id` = {int(associated_id)};
-                """)
-
-        # Delete association
-        self.cursor.execute(
-            f"""
-            DELETE FROM {associated_table}
-            WHERE `id` = {int(associated_id)};
-            """)
-
-        # Commit changes.
-        self.conn.commit()
-        return
-
-    def delete_target(self, target_id: str, target_table: str) -> None:
+        for table, ids in reversed(build().items()):
+            for chunk in statements.chunks(ids):
+                trace.execute(self.cursor, *statements.template("delete", table, values=chunk))
+
+    @mutation
+    @trace.writes
+    @metrics.instrument
+    def delete_rows(self, table: str, ids: Iterable[int]) -> dict:
+        """
+        Deletes rows with everything referencing them in one transaction.
+        :param str table: Table of the deleted rows.
+        :param Iterable[int] ids: IDs of the deleted rows.
+        :return dict: Change summary, see 'trace.summary()'.
+        """
+
+        self.run(lambda: self.plan(table, ids))
+
+    @mutation
+    @trace.writes
+    @metrics.instrument
+    def delete_association(self, associated_id: str, associated_table: str, target_table: str) -> dict:
+        """
+        Deletes a target row, and its associated row once no other target refers to it.
+        :param str associated_id: ID of the target row.
+        :param str associated_table: Associated table, e.g. the employer of a position.
+        :param str target_table: Target table.
+        :return dict: Change summary, see 'trace.summary()'.
+        """
+
+        def build() -> dict[str, set[int]]:
+            associated: list[tuple] = trace.fetch(
+                self.cursor, statements.template("associated", target_table, associated_table)[0],
+                (int(associated_id),))
+            plan: dict[str, set[int]] = self.plan(target_table, [int(associated_id)])
+
+            # If no other associations to target.
+            for row in associated:
+                others: list[tuple] = trace.fetch(
+                    self.cursor, statements.template("others", target_table, associated_table)[0],
+                    (row[0], int(associated_id)))
+                if len(others) == 0:
+                    self.plan(associated_table, [row[0]], plan)
+            return plan
+
+        self.run(build)
+
+    @mutation
+    @trace.writes
+    @metrics.instrument
+    def delete_target(self, target_id: str, target_table: str) -> dict:
         """
         Deletes target.
         :param str target_id: Target ID to find and delete.
         :param str target_table: Target table.
-        :return None: None
+        :return dict: Change summary, see 'trace.summary()'.
         """
 
-        self.cursor.execute(
-            f"""
-            DELETE FROM {target_table}
-            WHERE `id` = {int(target_id)};
-            """)
-
-        # Commit changes.
-        self.conn.commit()
-        return
+        self.run(lambda: self.plan(target_table, [int(target_id)]))
@@ -0,0 +1,163 @@
+import os
+import sqlite3
+import threading
+import time
+from sqlite3 import Connection, Cursor
+
+from . import connect, trace
+from ...utilities import metrics
+
+REFRESHES = metrics.registry.counter(
+    "pylaform_hot_copy_refreshes_total", "Rebuilds of the in-memory copy by kind.", ("kind",))
+REFRESH_DURATION = metrics.registry.histogram(
+    "pylaform_hot_copy_refresh_seconds", "Duration of in-memory copy rebuilds by kind.", ("kind",))
+
+# In-memory copies by database file.
+copies: dict[str, "HotCopy"] = {}
+opening = threading.Lock()
+
+
+def enabled() -> bool:
+    """
+    Whether reads are served from an in-memory copy, see 'PYLAFORM_HOT_COPY'.
+    :return bool: True when enabled.
+    """
+
+    return os.environ.get("PYLAFORM_HOT_COPY", "0") == "1"
+
+
+def copy(tenant: str = connect.DEFAULT_TENANT) -> "HotCopy":
+    """
+    Returns the in-memory copy of a profile's database, loading it if needed.
+    :param str tenant: Profile name, see 'connect.valid'.
+    :return HotCopy: Shared copy.
+    """
+
+    database: str = connect.path(tenant)
+    with opening:
+        hot: HotCopy | None = copies.get(database)
+        if hot is None:
+            hot = copies[database] = HotCopy(tenant)
+        return hot
+
+
+def drop(tenant: str = connect.DEFAULT_TENANT) -> None:
+    """
+    Forgets the in-memory copy of a profile, its generations close once their readers let go.
+    :param str tenant: Profile name, see 'connect.valid'.
+    :return None: None
+    """
+
+    with opening:
+        copies.pop(connect.path(tenant), None)
+
+
+class HotCopy:
+    """
+    Read-only in-memory copies of one database, loaded through the backup API.
+    Each write produces a new generation, readers keep the generation they started on.
+    Changed tables are copied from the file into the new generation, the others from the previous one.
+    :return None: None
+    """
+
+    def __init__(self, tenant: str = connect.DEFAULT_TENANT, threshold: float = 0.5) -> None:
+        self.tenant: str = tenant
+        self.path: str = connect.path(tenant)
+        # Share of changed tables above which the whole file is copied again.
+        self.threshold: float = threshold
+        self.disk: Connection = connect.db(tenant)
+        self.lock = threading.Lock()
+        self.data_version: int = self.read_data_version()
+        self.conn: Connection = self.full()
+        self.versions: dict[str, int] = self.read_versions(self.conn)
+
+    def read_data_version(self) -> int:
+        """
+        Commit counter of the file, moved by every other connection. This one never writes.
+        :return int: 'PRAGMA data_version'.
+        """
+
+        return trace.fetch(self.disk.cursor(), "PRAGMA data_version")[0][0]
+
+    @staticmethod
+    def read_versions(conn: Connection) -> dict[str, int]:
+        """
+        Table versions of a database, see 'connect.migrate'.
+        :param Connection conn: Database connection.
+        :return dict[str, int]: Version per database table.
+        """
+
+        return dict(trace.fetch(conn.cursor(), "SELECT `name`, `version` FROM `table_version`;"))
+
+    def current(self) -> Connection:
+        """
+        Returns the latest generation, refreshing it first when the file moved on.
+        :return Connection: In-memory connection, read only.
+        """
+
+        # Cheap check first, the table versions are only read once something was committed.
+        data_version: int = self.read_data_version()
+        if data_version == self.data_version:
+            return self.conn
+        with self.lock:
+            self.data_version = data_version
+            versions: dict[str, int] = self.read_versions(self.disk)
+            if versions != self.versions:
+                changed: int = sum(1 for table in connect.TABLES if versions.get(table) != self.versions.get(table))
+                conn: Connection = self.full() if changed > self.threshold * len(connect.TABLES) else self.incremental()
+                # Publish, readers of the old generation finish on it.
+                self.conn, self.versions = conn, self.read_versions(conn)
+            return self.conn
+
+    def full(self) -> Connection:
+        """
+        Copies the whole file into a new generation.
+        :return Connection: New in-memory connection.
+        """
+
+        start: float = time.perf_counter()
+        conn: Connection = sqlite3.connect(":memory:", check_same_thread=False,
+                                           cached_statements=connect.STATEMENT_CACHE)
+        conn.set_trace_callback(metrics.trace_statement)
+        self.disk.backup(conn)
+        # The copy takes its versions from the file, counting its own writes would only slow refreshes.
+        cursor: Cursor = conn.cursor()
+        for table in connect.TABLES:
+            for event in ("insert", "update", "delete"):
+                trace.execute(cursor, f"DROP TRIGGER IF EXISTS `{table}_version_{event}`")
+        conn.commit()
+        REFRESHES.inc(kind="full")
+        REFRESH_DURATION.observe(time.perf_counter() - start, kind="full")
+        return conn
+
+    def incremental(self) -> Connection:
+        """
+        Copies the previous generation, then replaces the tables changed since with their rows on file.
+        :return Connection: New in-memory connection.
+        """
+
+        start: float = time.perf_counter()
+        conn: Connection = sqlite3.connect(":memory:", check_same_thread=False,
+                                           cached_statements=connect.STATEMENT_CACHE)
+        conn.set_trace_callback(metrics.trace_statement)
+        self.conn.backup(conn)
+        cursor: Cursor = conn.cursor()
+        trace.execute(cursor, "ATTACH DATABASE ? AS `disk`", (self.path,))
+        try:
+            # One read transaction on the file, so the tables and versions match.
+            trace.execute(cursor, "BEGIN")
+            versions: dict[str, int] = dict(trace.fetch(cursor, "SELECT `name`, `version` FROM disk.`table_version`;"))
+            for table in connect.TABLES:
+                if versions.get(table) == self.versions.get(table):
+                    continue
+                trace.execute(cursor, f"DELETE FROM main.`{table}`")
+                trace.execute(cursor, f"INSERT INTO main.`{table}` SELECT * FROM disk.`{table}`")
+            # Versions of the rows just copied.
+            trace.execute(cursor, "DELETE FROM main.`table_version`")
+            trace.execute(cursor, "INSERT INTO main.`table_version` SELECT * FROM disk.`table_version`")
+            conn.commit()
+        finally:
+            trace.execute(cursor, "DETACH DATABASE `disk`")
+        REFRESHES.inc(kind="incremental")
+        REFRESH_DURATION.observe(time.perf_counter() - start, kind="incremental")
+        return conn
@@ -1,9 +1,38 @@
+import html
 import sqlite3
 from sqlite3 import Cursor, Connection
+from typing import Iterable
 
-from tenacity import retry, stop_after_delay
+from . import connect, memory, statements, trace
+from ...utilities import metrics, resilience
 
-from . import connect
+# Cached results embedding each database table.
+DEPENDENCIES: dict[str, tuple[str, ...]] = {
+    "certification": ("certifications",),
+    "school": ("education",),
+    "focus": ("education",),
+    "identification": ("identification",),
+    "summary": ("summary",),
+    "glossary": ("glossary",),
+    "skill": ("skills",),
+    "achievement": ("achievements",),
+    "employer": ("positions", "achievements", "skills"),
+    "position": ("positions", "achievements", "skills"),
+}
+
+# Tables looked up by name, the name column is named after the table.
+NAMES: tuple[str, ...] = ("employer", "position", "school")
+
+# Every cached result.
+CACHES: tuple[str, ...] = ("certifications", "education", "identification", "skills",
+                           "achievements", "glossary", "positions", "summary")
+
+# Database tables embedded in each cached result.
+SOURCES: dict[str, tuple[str, ...]] = {
+    cache: tuple(sorted(table for table, caches in DEPENDENCIES.items() if cache in caches)) for cache in CACHES}
+
+INVALIDATIONS = metrics.registry.counter(
+    "pylaform_cache_invalidations_total", "Cached results purged after writes, by cache.", ("cache",))
 
 
 class Get:
@@ -13,9 +42,15 @@ class Get:
     :return None: None
     """
 
-    @retry(stop=(stop_after_delay(10)))
-    def __init__(self) -> None:
-        self.conn: Connection = connect.db()
+    @resilience.retrying()
+    def __init__(self, tenant: str = connect.DEFAULT_TENANT, conn: Connection | None = None,
+                 selection: dict[str, set[int]] | None = None) -> None:
+        self.tenant: str = tenant
+        # Row ids kept per cached list, e.g. a tailored set of achievements. Stored states are left alone.
+        self.selection: dict[str, set[int]] = selection if selection is not None else {}
+        # Read through a given connection to see its uncommitted writes, e.g. the writer's.
+        self.hot: memory.HotCopy | None = memory.copy(tenant) if conn is None and memory.enabled() else None
+        self.conn: Connection = conn if conn is not None else self.hot.current() if self.hot else connect.db(tenant)
         self.cursor: Cursor = self.conn.cursor()
         self.result_certifications: list[dict[str, str | int | bool]] = []
         self.result_education: list[dict[str, str | int | bool]] = []
@@ -25,14 +60,85 @@ class Get:
         self.result_glossary: list[dict[str, str | int | bool]] = []
         self.result_positions: list[dict[str, str | int | bool]] = []
         self.result_summary: list[dict[str, str | int | bool]] = []
+        self.result_rows: dict[str, dict[int, dict[str, str | int]]] = {}
+        self.result_ids: dict[str, dict[str, int]] = {}
+        self.built: dict[str, tuple[int, ...]] = {}
 
-    def purge_cache(self, table: str) -> None:
+    def close(self) -> None:
+        """
+        Closes the connection, or forgets the in-memory copy it reads from.
+        :return None: None
+        """
+
+        if self.hot is not None:
+            memory.drop(self.tenant)
+        else:
+            self.conn.close()
+
+    def table_versions(self) -> dict[str, int]:
+        """
+        Returns the write counters of every database table, kept by the triggers of 'connect.migrate'.
+        Unlike 'PRAGMA data_version' they also move for writes on this connection.
+        :return dict[str, int]: Version per database table.
+        """
+
+        return dict(self.query(statements.sql("table_versions")))
+
+    def version(self, table: str) -> tuple[int, ...]:
+        """
+        Returns the version of a cached table, made of the versions of the database tables it embeds.
+        :param str table: Name of cached table, or of a database table.
+        :return tuple[int, ...]: Version counters.
+        """
+
+        versions: dict[str, int] = self.table_versions()
+        return tuple(versions.get(source, 0) for source in SOURCES.get(table, (table,)))
+
+    def stale(self, key: str, table: str) -> bool:
+        """
+        Checks whether a cache entry was built from older table versions, recording the current ones.
+        :param str key: Name of the cache entry.
+        :param str table: Name of cached table, or of a database table.
+        :return bool: True when the entry must be rebuilt.
+        """
+
+        version: tuple[int, ...] = self.version(table)
+        if self.built.get(key) == version:
+            return False
+        self.built[key] = version
+        return True
+
+    def invalidate(self, *tables: str) -> int:
+        """
+        Purges every cached result depending on the written database tables.
+        :param str tables: Names of written database tables.
+        :return int: Number of cached results purged.
+        """
+
+        for table in tables:
+            self.result_rows.pop(table, None)
+            self.result_ids.pop(table, None)
+        caches: set[str] = {cache for table in tables for cache in DEPENDENCIES.get(table, ())}
+        for cache in caches:
+            self.purge_cache(cache)
+            INVALIDATIONS.inc(cache=cache)
+        return len(caches)
+
+    def purge_cache(self, table: str | None = None) -> None:
         """
         Purges local cache from python application for associated table
-        :param str table:  Name of table to purge.
+        :param str | None table:  Name of table to purge, every table when omitted.
         :return None: None
         """
 
+        if table is None:
+            for cache in CACHES:
+                self.purge_cache(cache)
+            self.result_rows = {}
+            self.result_ids = {}
+            return
+
+        self.built.pop(table, None)
         match table:
             case "certifications":
                 self.result_certifications = []
@@ -51,23 +157,123 @@ class Get:
             case "summary":
                 self.result_summary = []
 
-    @retry
-    def query(self, query: str) -> sqlite3.Cursor:
+    def cache_miss(self, table: str) -> bool:
+        """
+        Checks whether the cached list of a table must be (re)loaded, counting hits and misses.
+        :param str table: Name of cached table.
+        :return bool: True when the cache is empty or older than its tables.
+        """
+
+        # Also catches writes of other connections, e.g. 'python -m pylaform import'.
+        if self.stale(table, table):
+            setattr(self, "result_" + table, [])
+        miss: bool = len(getattr(self, "result_" + table)) == 0
+        metrics.cache_lookup(table, not miss)
+        return miss
+
+    def selected(self, key: str, row_id: int) -> bool:
+        """
+        Whether a row belongs in a cached list, see 'selection'.
+        :param str key: Cached list, e.g. 'achievements'.
+        :param int row_id: Row id.
+        :return bool: True without a selection for the list.
+        """
+
+        chosen: set[int] | None = self.selection.get(key)
+        return chosen is None or row_id in chosen
+
+    def rows(self, table: str) -> dict[int, dict[str, str | int]]:
+        """
+        Returns the stored rows of a database table by id, cached until the table is written.
+        :param str table: Name of database table.
+        :return dict[int, dict[str, str | int]]: Columns by row id.
+        """
+
+        if table not in DEPENDENCIES:
+            raise ValueError(f"Unknown table: {table}")
+        cached: dict[int, dict[str, str | int]] | None = self.result_rows.get(table)
+        if self.stale("rows:" + table, table):
+            cached = None
+        metrics.cache_lookup("rows", cached is not None)
+        if cached is not None:
+            return cached
+
+        result: list[tuple] = self.query(statements.template("rows", table)[0])
+        columns: list[str] = [column[0] for column in self.cursor.description]
+        cached = {row[0]: dict(zip(columns, row)) for row in result}
+        self.result_rows[table] = cached
+        return cached
+
+    @metrics.instrument
+    def resolve_ids(self, table: str, names: Iterable[str]) -> dict[str, int]:
+        """
+        Resolves names to IDs, querying every name not cached yet at once. Unknown names resolve to 0.
+        :param str table: Table to search, one of 'NAMES'.
+        :param Iterable[str] names: Names to search.
+        :return dict[str, int]: ID per name.
+        """
+
+        if table not in NAMES:
+            raise ValueError(f"Unknown table: {table}")
+        if self.stale("ids:" + table, table):
+            self.result_ids.pop(table, None)
+        cached: dict[str, int] = self.result_ids.setdefault(table, {})
+        wanted: list[str] = list(dict.fromkeys(str(name) for name in names))
+        missing: list[str] = [name for name in wanted if name not in cached]
+        if missing:
+            cached.update(dict.fromkeys(missing, 0))
+            # Latest row wins on duplicate names, as in 'query_id'.
+            for chunk in statements.chunks(missing):
+                for name, row_id in self.query(*statements.template("ids", table, values=chunk)):
+                    cached[str(name)] = int(row_id)
+                trace.report("lookup_queries", 1)
+        trace.report("lookups", len(wanted))
+        return {name: cached[name] for name in wanted}
+
+    def remember_id(self, table: str, name: str, row_id: int) -> None:
+        """
+        Adds an inserted row to the name cache.
+        :param str table: Table written, one of 'NAMES'.
+        :param str name: Name of the new row.
+        :param int row_id: ID of the new row.
+        :return None: None
+        """
+
+        if table in self.result_ids:
+            self.result_ids[table][str(name)] = int(row_id)
+
+    def forget_ids(self, *tables: str) -> None:
+        """
+        Drops the name cache of tables rows were deleted from.
+        :param str tables: Names of written tables.
+        :return None: None
+        """
+
+        for table in tables:
+            self.result_ids.pop(table, None)
+
+    @resilience.retrying()
+    def query(self, query: str, parameters: tuple = ()) -> list[tuple]:
         """
         Query worker that handles all main SELECT requests.
         :param str query: Query String.
-        :return sqlite3.Cursor: Iterable cursor.
+        :param tuple parameters: Bound parameters.
+        :return list[tuple]: Result rows.
         """
 
+        if self.hot is not None:
+            # Move on to the latest in-memory generation between queries.
+            conn: Connection = self.hot.current()
+            if conn is not self.conn:
+                self.conn, self.cursor = conn, conn.cursor()
         try:
-            self.cursor.execute(query)
+            return trace.fetch(self.cursor, query, parameters)
         except sqlite3.Error as e:
             print(f"Error querying database: {e}")
             raise
-        return self.cursor
 
+    @metrics.instrument
     def query_id(self, value: str, attr: str) -> int:
-        # TODO: Consider refactoring to use the attribute as the FROM/WHERE as "attr + 's'"
         """
         Queries the associated name to return the ID in order to detect if new or not.
         :param str value: Name to search.
@@ -75,35 +281,12 @@ class Get:
         :return int: ID associated with Name.
         """
 
-        sub_result: sqlite3.Cursor = self.query()
-        if attr == "employer":
-            sub_result = self.query(
-                f"""
-                SELECT `id`
-                FROM `employer`
-                WHERE `employer` = '{value}';
-                """)
-        if attr == "position":
-            sub_result = self.query(
-                f"""
-                SELECT `id`
-                FROM `position`
-                WHERE `position` = '{value}'
-                """)
-        if attr == "school":
-            sub_result = self.query(
-                f"""
-                SELECT `id`
-                FROM `school`
-                WHERE `school` = '{value}'
-                """)
-        result: int = 0
-        for item in sub_result:
-            result = int(item[0])
-        return result
+        if attr not in NAMES:
+            return 0
+        return self.resolve_ids(attr, [value])[str(value)]
 
+    @metrics.instrument
     def query_name(self, value: int, attr: str) -> str:
-        # TODO: Consider refactoring to use the attribute as the FROM/WHERE as "attr + 's'"
         """
         Queries the associated ID to return the name for display.
         :param int value: ID to search.
@@ -112,37 +295,46 @@ class Get:
         """
 
         result: str = ""
-        sub_result: sqlite3.Cursor = self.query()
-        if attr == "employer":
-            sub_result = self.query(
-                f"""
-                SELECT `employer`
-                FROM `employer`
-                WHERE `id` = '{value}';
-                """)
-        if attr == "position":
-            sub_result = self.query(
-                f"""
-                SELECT `position`
-                FROM `position`
-                WHERE `id` = '{value}'
-                """)
+        sub_result: list[tuple] = []
+        if attr in ("employer", "position"):
+            sub_result = self.query(statements.sql("name." + attr), (value,))
         for item in sub_result:
             result = str(item[0])
         return result
 
+    @metrics.instrument
+    def search(self, text: str, limit: int = 20) -> list[dict[str, str | int | float]]:
+        """
+        Ranked full-text search over achievements, skills, summaries and glossary terms, see 'connect.SEARCH'.
+        :param str text: Words to find, each matched as a prefix.
+        :param int limit: Most results.
+        :return list[dict[str, str | int | float]]: Table, id, title, HTML snippet with <mark> and bm25 score per hit.
+        """
+
+        terms: str = statements.match(text)
+        if not terms:
+            return []
+        kinds: dict[int, str] = {kind: table for table, (kind, _, _) in connect.SEARCH.items()}
+        result: list[dict[str, str | int | float]] = []
+        for row_id, title, snippet, score in self.query(statements.sql("search"), (terms, limit)):
+            result.append({
+                "table": kinds[row_id & ((1 << connect.SEARCH_BITS) - 1)],
+                "id": row_id >> connect.SEARCH_BITS,
+                "title": title,
+                "snippet": html.escape(snippet).replace("\x02", "<mark>").replace("\x03", "</mark>"),
+                "score": score,
+            })
+        return result
+
+    @metrics.instrument
     def get_certifications(self) -> list[dict[str, str | int | bool]]:
         """
         Return certification list from database.
         :return list[dict[str, str | int | bool]]: Raw return grouped by 'id/attr/value/state.'
         """
 
-        if len(self.result_certifications) == 0:
-            result = self.query(
-                """
-                SELECT `id`, `certification`, `year`, `state`
-                FROM `certification`
-                """)
+        if self.cache_miss("certifications"):
+            result: list[tuple] = self.query(statements.sql("get.certifications"))
 
             # Create raw list based on id/attr/value/state
             for certification_id, certification, year, state in result:
@@ -161,21 +353,15 @@ class Get:
 
         return self.result_certifications
 
+    @metrics.instrument
     def get_education(self) -> list[dict[str, str | int | bool]]:
         """
         Return education NESTED list objects from database by school.
         :return list[dict[str, str | int | bool]]: Raw return grouped by 'id/attr/value/state.'
         """
 
-        if len(self.result_education) == 0:
-            result: Cursor = self.query(
-                """
-                SELECT f.id, f.focus, f.startdate, f.enddate, f.state,
-                       s.id, s.school, s.location, s.state
-                FROM `school` AS s
-                JOIN `focus` AS f on s.id = f.school
-                ORDER BY f.startdate DESC
-                """)
+        if self.cache_miss("education"):
+            result: list[tuple] = self.query(statements.sql("get.education"))
 
             # Create raw NESTED list based on 'origin_ + id/attr/value/state.'
             for (focusid, focus, startdate, enddate, focusstate,
@@ -219,18 +405,15 @@ class Get:
 
         return self.result_education
 
+    @metrics.instrument
     def get_identification(self) -> list[dict[str, str | int | bool]]:
         """
         Return identification list objects from database.
         :return list[dict[str, str | int | bool]]: Raw return grouped by 'id/attr/value/state.'
         """
 
-        if len(self.result_identification) == 0:
-            result: Cursor = self.query(
-                """
-                SELECT `id`, `attr`, `value`, `state`
-                FROM `identification`
-                """)
+        if self.cache_miss("identification"):
+            result: list[tuple] = self.query(statements.sql("get.identification"))
 
             # Create raw list based on 'id/attr/value/state.'
             for identification_id, attr, value, state in result:
@@ -254,19 +437,15 @@ class Get:
 
         return self.result_identification
 
+    @metrics.instrument
     def get_summary(self) -> list[dict[str, str | int | bool]]:
         """
         Return summary list objects from database.
         :return list[dict[str, str | int | bool]]: Raw return grouped by 'id/attr/value/state.'
         """
 
-        if len(self.result_summary) == 0:
-            result: Cursor = self.query(
-                """
-                SELECT `id`, `shortdesc`, `longdesc`, `state`
-                FROM `summary`
-                ORDER BY `summaryorder`
-                """)
+        if self.cache_miss("summary"):
+            result: list[tuple] = self.query(statements.sql("get.summary"))
 
             # Create raw list based on 'id/attr/value/state.'
             for summary_id, shortdesc, longdesc, state in result:
@@ -285,23 +464,20 @@ class Get:
 
         return self.result_summary
 
+    @metrics.instrument
     def get_skills(self) -> list[dict[str, str | int | bool]]:
         """
         Return skills list objects from database.
         :return list[dict[str, str | int | bool]]: Raw return grouped by 'id/attr/value/state.'
         """
 
-        if len(self.result_skills) == 0:
-            result: Cursor = self.query(
-                """
-                SELECT s.id, s.category, s.subcategory, e.employer, p.position, s.shortdesc, s.longdesc, s.state
-                FROM `skill` s, `position` p, `employer` e
-                WHERE p.id = s.position and e.id = s.employer
-                ORDER BY `categoryorder`, `skillorder`;
-                """)
+        if self.cache_miss("skills"):
+            result: list[tuple] = self.query(statements.sql("get.skills"))
 
             # Create raw list based on 'id/attr/value/state.'
             for skills_id, category, subcategory, employer, position, shortdesc, longdesc, state in result:
+                if not self.selected("skills", skills_id):
+                    continue
                 self.result_skills.append({
                     "id": skills_id,
                     "attr": "category",
@@ -335,19 +511,15 @@ class Get:
 
         return self.result_skills
 
+    @metrics.instrument
     def get_glossary(self) -> list[dict[str, str | int | bool]]:
         """
         Return glossary list objects from database.
         :return list[dict[str, str | int | bool]]: Raw return grouped by 'id/attr/value/state.'
         """
 
-        if len(self.result_glossary) == 0:
-            result: Cursor = self.query(
-                """
-                SELECT `id`, `term`, `url`, `description`, `state`
-                FROM `glossary`
-                ORDER BY `term`;
-                """)
+        if self.cache_miss("glossary"):
+            result: list[tuple] = self.query(statements.sql("get.glossary"))
 
             # Create raw list based on 'id/attr/value/state.'
             for glossary_id, term, url, description, state in result:
@@ -372,21 +544,15 @@ class Get:
 
         return self.result_glossary
 
+    @metrics.instrument
     def get_positions(self) -> list[dict[str, str | int | bool]]:
         """
         Return positions NESTED list objects from database by school.
         :return list[dict[str, str | int | bool]]: Raw return grouped by 'id/attr/value/state.'
         """
 
-        if len(self.result_positions) == 0:
-            result: Cursor = self.query(
-                """
-                SELECT e.id, e.employer, e.location, e.state,
-                       p.id, p.position, p.startdate, p.enddate, p.state
-                FROM `employer` AS e
-                JOIN `position` AS p on e.id = p.employer
-                ORDER BY p.startdate DESC
-                """)
+        if self.cache_miss("positions"):
+            result: list[tuple] = self.query(statements.sql("get.positions"))
 
             # Create raw NESTED list based on 'origin_ + id/attr/value/state.'
             for (employer_id, employer, location, employer_state,
@@ -420,27 +586,22 @@ class Get:
 
         return self.result_positions
 
+    @metrics.instrument
     def get_achievements(self) -> list[dict[str, str | int | bool]]:
         """
         Return achievements NESTED list objects from database by school.
         :return list[dict[str, str | int | bool]]: Raw return grouped by 'id/attr/value/state.'
         """
 
-        if len(self.result_achievements) == 0:
-            result: Cursor = self.query(
-                """
-                SELECT e.id, e.employer, e.state as employer_state,
-                       p.id as position_id, p.position, p.state as position_state,
-                       a.id as achievement_id, a.shortdesc, a.longdesc, a.state as achievement_state
-                FROM `achievement` a
-                JOIN `position` p ON a.position = p.id AND a.employer = p.employer
-                JOIN `employer` e ON a.employer = e.id;
-                """)
+        if self.cache_miss("achievements"):
+            result: list[tuple] = self.query(statements.sql("get.achievements"))
 
             # Create raw NESTED list based on 'origin_ + id/attr/value/state.'
             for (employer_id, employer, employer_state,
                  position_id, position, position_state,
                  achievement_id, shortdesc, longdesc, achievement_state) in result:
+                if not self.selected("achievements", achievement_id):
+                    continue
                 self.result_achievements.append({
                     "id": "employer_" + str(employer_id),
                     "attr": "employername",
@@ -0,0 +1,320 @@
+import hashlib
+import json
+import os
+import sqlite3
+import tempfile
+import time
+import zlib
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from sqlite3 import Connection, Cursor
+from typing import Iterable, Iterator
+
+from . import connect, trace, transfer
+from .connect import TABLES
+from .transfer import Transfer
+from ...utilities import metrics, resilience
+
+# Hashes looked up per query when checking which objects are stored already.
+LOOKUP: int = 500
+
+SCHEMA: str = """
+    CREATE TABLE IF NOT EXISTS `object` (
+        `hash`     TEXT    NOT NULL PRIMARY KEY,
+        `size`     INTEGER NOT NULL,
+        `stored`   INTEGER NOT NULL,
+        `snapshot` INTEGER NOT NULL,
+        `data`     BLOB    NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS `snapshot` (
+        `id`       INTEGER NOT NULL PRIMARY KEY,
+        `name`     TEXT    NOT NULL,
+        `created`  TEXT    NOT NULL,
+        `manifest` TEXT    NOT NULL,
+        `template` TEXT    NOT NULL DEFAULT '',
+        `pdf`      TEXT
+    );
+    """
+
+
+def digest(data: bytes) -> str:
+    """
+    Content address of an object.
+    :param bytes data: Object content.
+    :return str: SHA-256 in hex.
+    """
+
+    return hashlib.sha256(data).hexdigest()
+
+
+def encode(value: object) -> bytes:
+    """
+    Canonical JSON of a row, manifest or table, so equal content always hashes the same.
+    :param object value: JSON value.
+    :return bytes: UTF-8 JSON.
+    """
+
+    return json.dumps(value, separators=(",", ":"), sort_keys=True, ensure_ascii=False).encode()
+
+
+class Snapshots:
+    """
+    Content-addressed snapshots of the resume tables and, optionally, of a rendered PDF.
+    Rows, per-table row lists, manifests and PDFs are objects stored once by SHA-256 in 'snapshots.db'
+    next to the profile's database, so content repeated across snapshots costs nothing.
+    A snapshot points at a manifest naming one row list per table, each row list names its rows.
+    :return None: None
+    """
+
+    @resilience.retrying()
+    def __init__(self, tenant: str = connect.DEFAULT_TENANT) -> None:
+        self.tenant: str = tenant
+        self.path: str = os.path.join(os.path.dirname(connect.path(tenant)), "snapshots.db")
+        self.conn: Connection = sqlite3.connect(self.path, check_same_thread=False,
+                                                cached_statements=connect.STATEMENT_CACHE)
+        self.conn.set_trace_callback(metrics.trace_statement)
+        self.conn.executescript(SCHEMA)
+        self.cursor: Cursor = self.conn.cursor()
+
+    def close(self) -> None:
+        """
+        Closes the store.
+        :return None: None
+        """
+
+        self.conn.close()
+
+    def stored(self, hashes: Iterable[str]) -> set[str]:
+        """
+        Which objects the store holds already.
+        :param Iterable[str] hashes: Content addresses.
+        :return set[str]: Stored addresses.
+        """
+
+        hashes = list(hashes)
+        found: set[str] = set()
+        for start in range(0, len(hashes), LOOKUP):
+            chunk: list[str] = hashes[start:start + LOOKUP]
+            found.update(row[0] for row in trace.fetch(
+                self.cursor, f"SELECT `hash` FROM `object` WHERE `hash` IN ({', '.join('?' * len(chunk))});",
+                tuple(chunk)))
+        return found
+
+    def put(self, objects: dict[str, bytes], snapshot: int) -> int:
+        """
+        Stores the objects not stored yet, compressed.
+        :param dict[str, bytes] objects: Content by address.
+        :param int snapshot: Snapshot adding them.
+        :return int: Compressed bytes added.
+        """
+
+        missing: set[str] = set(objects) - self.stored(objects)
+        added: int = 0
+        rows: list[tuple] = []
+        for address in missing:
+            data: bytes = zlib.compress(objects[address])
+            added += len(data)
+            rows.append((address, len(objects[address]), len(data), snapshot, data))
+        trace.executemany(
+            self.cursor,
+            "INSERT OR IGNORE INTO `object` (`hash`, `size`, `stored`, `snapshot`, `data`) VALUES (?, ?, ?, ?, ?);",
+            rows)
+        return added
+
+    def get(self, address: str) -> bytes:
+        """
+        Reads an object.
+        :param str address: Content address.
+        :return bytes: Object content.
+        """
+
+        rows: list[tuple] = trace.fetch(self.cursor, "SELECT `data` FROM `object` WHERE `hash` = ?;", (address,))
+        if not rows:
+            raise KeyError(f"Missing snapshot object: {address}")
+        return zlib.decompress(rows[0][0])
+
+    @metrics.instrument
+    def take(self, name: str, pdf: bytes | None = None, template: str = "") -> dict:
+        """
+        Records every resume table, and a rendered PDF if given, as a new snapshot.
+        :param str name: Label, e.g. the company applied to.
+        :param bytes | None pdf: Rendered resume, see 'render'.
+        :param str template: Template of the PDF.
+        :return dict: Snapshot report, see 'report'.
+        """
+
+        objects: dict[str, bytes] = {}
+        manifest: dict[str, str] = {}
+        source = Transfer(self.tenant)
+        try:
+            # One read transaction, so the tables match each other.
+            trace.execute(source.cursor, "BEGIN DEFERRED")
+            for table in TABLES:
+                columns: list[str] = list(source.columns(table))
+                rows: list[str] = []
+                for row in source.rows(table):
+                    data: bytes = encode([row[column] for column in columns])
+                    address: str = digest(data)
+                    objects[address] = data
+                    rows.append(address)
+                data = encode({"table": table, "columns": columns, "rows": rows})
+                manifest[table] = digest(data)
+                objects[manifest[table]] = data
+        finally:
+            source.conn.rollback()
+            source.conn.close()
+
+        data = encode({"tables": manifest})
+        address = digest(data)
+        objects[address] = data
+        pdf_address: str | None = None
+        if pdf is not None:
+            pdf_address = digest(pdf)
+            objects[pdf_address] = pdf
+
+        created: str = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        snapshot: int = trace.execute(
+            self.cursor,
+            "INSERT INTO `snapshot` (`name`, `created`, `manifest`, `template`, `pdf`) VALUES (?, ?, ?, ?, ?);",
+            (name, created, address, template, pdf_address)).lastrowid
+        self.put(objects, snapshot)
+        self.conn.commit()
+        return self.report(snapshot)[0]
+
+    def manifest(self, snapshot: int) -> tuple[dict[str, str], str | None]:
+        """
+        Reads the manifest of a snapshot.
+        :param int snapshot: Snapshot id.
+        :return tuple[dict[str, str], str | None]: Row list address per table, and the PDF address if any.
+        """
+
+        rows: list[tuple] = trace.fetch(
+            self.cursor, "SELECT `manifest`, `pdf` FROM `snapshot` WHERE `id` = ?;", (int(snapshot),))
+        if not rows:
+            raise KeyError(f"Unknown snapshot: {snapshot}")
+        return json.loads(self.get(rows[0][0]))["tables"], rows[0][1]
+
+    def records(self, snapshot: int) -> Iterator[tuple[str, dict[str, str | int | None]]]:
+        """
+        Reads the rows of a snapshot, parents first.
+        :param int snapshot: Snapshot id.
+        :return Iterator[tuple[str, dict]]: Table and row, as read by 'Transfer.write'.
+        """
+
+        tables, _ = self.manifest(snapshot)
+        for table in TABLES:
+            if table not in tables:
+                continue
+            listing: dict = json.loads(self.get(tables[table]))
+            for address in listing["rows"]:
+                yield table, dict(zip(listing["columns"], json.loads(self.get(address))))
+
+    def pdf(self, snapshot: int) -> bytes | None:
+        """
+        Reads the PDF stored with a snapshot.
+        :param int snapshot: Snapshot id.
+        :return bytes | None: PDF, None when the snapshot has none.
+        """
+
+        _, address = self.manifest(snapshot)
+        return self.get(address) if address is not None else None
+
+    def restore(self, snapshot: int, tenant: str | None = None, conn: Connection | None = None) -> dict:
+        """
+        Replaces the resume tables of a profile with a snapshot in one transaction, a failed restore changes nothing.
+        :param int snapshot: Snapshot id.
+        :param str | None tenant: Profile written, the snapshot's own by default.
+        :param Connection | None conn: Database written instead of a profile, left open, see 'checkout'.
+        :return dict: Rows per table, total rows, seconds and rows per second, see 'transfer.report'.
+        """
+
+        tables: tuple[str, ...] = tuple(table for table in TABLES if table in self.manifest(snapshot)[0])
+        start: float = time.perf_counter()
+        counts: dict[str, int] = dict.fromkeys(tables, 0)
+
+        def counted() -> Iterator[tuple[str, dict[str, str | int | None]]]:
+            for table, row in self.records(snapshot):
+                counts[table] += 1
+                yield table, row
+
+        target = Transfer(tenant if tenant is not None else self.tenant, conn=conn)
+        try:
+            target.write(counted(), replace=True, tables=tables, atomic=True)
+        finally:
+            if conn is None:
+                target.conn.close()
+        return transfer.report(counts, time.perf_counter() - start)
+
+    @contextmanager
+    def checkout(self, snapshot: int) -> Iterator[Connection]:
+        """
+        Restores a snapshot into a temporary database, removed on exit, e.g. to re-render a past version
+        without touching any profile.
+        :param int snapshot: Snapshot id.
+        :return Iterator[Connection]: Connection to the temporary database.
+        """
+
+        with tempfile.TemporaryDirectory(prefix="pylaform-snapshot-") as directory:
+            conn: Connection = connect.scratch(directory)
+            try:
+                self.restore(snapshot, conn=conn)
+                yield conn
+            finally:
+                conn.close()
+
+    def report(self, snapshot: int | None = None) -> list[dict[str, str | int | None]]:
+        """
+        Sizes of snapshots: 'logical' bytes a full copy would take, 'added' compressed bytes first stored by
+        the snapshot, i.e. what keeping it costs, and the number of rows.
+        :param int | None snapshot: Snapshot id, all snapshots by default.
+        :return list[dict[str, str | int | None]]: One report per snapshot, oldest first.
+        """
+
+        query: str = "SELECT `id`, `name`, `created`, `template`, `pdf` FROM `snapshot`"
+        rows: list[tuple] = (trace.fetch(self.cursor, query + " WHERE `id` = ?;", (int(snapshot),))
+                             if snapshot is not None else trace.fetch(self.cursor, query + " ORDER BY `id`;"))
+        if snapshot is not None and not rows:
+            raise KeyError(f"Unknown snapshot: {snapshot}")
+        added: dict[int, tuple[int, int]] = dict(
+            (row[0], (row[1], row[2])) for row in trace.fetch(
+                self.cursor, "SELECT `snapshot`, SUM(`stored`), COUNT(*) FROM `object` GROUP BY `snapshot`;"))
+        result: list[dict[str, str | int | None]] = []
+        for snapshot_id, name, created, template, pdf in rows:
+            tables, _ = self.manifest(snapshot_id)
+            addresses: set[str] = set(tables.values())
+            count: int = 0
+            for address in tables.values():
+                listing: dict = json.loads(self.get(address))
+                addresses.update(listing["rows"])
+                count += len(listing["rows"])
+            if pdf is not None:
+                addresses.add(pdf)
+            logical: int = sum(row[0] for row in self.sizes(addresses))
+            result.append({
+                "id": snapshot_id,
+                "name": name,
+                "created": created,
+                "template": template,
+                "rows": count,
+                "pdf": pdf is not None,
+                "logical": logical,
+                "added": added.get(snapshot_id, (0, 0))[0],
+                "objects": added.get(snapshot_id, (0, 0))[1],
+            })
+        return result
+
+    def sizes(self, addresses: Iterable[str]) -> list[tuple[int]]:
+        """
+        Uncompressed sizes of objects.
+        :param Iterable[str] addresses: Content addresses.
+        :return list[tuple[int]]: One size per stored object.
+        """
+
+        addresses = list(addresses)
+        result: list[tuple[int]] = []
+        for start in range(0, len(addresses), LOOKUP):
+            chunk: list[str] = addresses[start:start + LOOKUP]
+            result.extend(trace.fetch(
+                self.cursor, f"SELECT `size` FROM `object` WHERE `hash` IN ({', '.join('?' * len(chunk))});",
+                tuple(chunk)))
+        return result
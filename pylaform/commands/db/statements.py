@@ -0,0 +1,189 @@
+import re
+from typing import Iterable, Iterator
+
+from . import connect
+
+# Most values bound to one IN list. Padded by 'bucket' it stays far below SQLite's 32766 variables.
+CHUNK: int = 1024
+
+# Columns writable per table, anything else posted is rejected before it reaches SQL.
+COLUMNS: dict[str, tuple[str, ...]] = {
+    "identification": ("value",),
+    "certification": ("certification", "year"),
+    "employer": ("employer", "location"),
+    "position": ("position", "startdate", "enddate"),
+    "skill": ("category", "subcategory", "employer", "position", "shortdesc", "longdesc"),
+    "summary": ("shortdesc", "longdesc"),
+    "school": ("school", "location"),
+    "focus": ("focus", "startdate", "enddate"),
+    "achievement": ("employer", "position", "shortdesc", "longdesc"),
+    "glossary": ("term", "url", "description"),
+}
+
+# Named statements of Get and Post, values are always bound.
+STATEMENTS: dict[str, str] = {
+    "table_versions": "SELECT `name`, `version` FROM `table_version`;",
+    "name.employer": "SELECT `employer` FROM `employer` WHERE `id` = ?;",
+    "name.position": "SELECT `position` FROM `position` WHERE `id` = ?;",
+    "get.certifications": "SELECT `id`, `certification`, `year`, `state` FROM `certification`;",
+    "get.education": """
+        SELECT f.id, f.focus, f.startdate, f.enddate, f.state,
+               s.id, s.school, s.location, s.state
+        FROM `school` AS s
+        JOIN `focus` AS f on s.id = f.school
+        ORDER BY f.startdate DESC;
+        """,
+    "get.identification": "SELECT `id`, `attr`, `value`, `state` FROM `identification`;",
+    "get.summary": "SELECT `id`, `shortdesc`, `longdesc`, `state` FROM `summary` ORDER BY `summaryorder`;",
+    "get.skills": """
+        SELECT s.id, s.category, s.subcategory, e.employer, p.position, s.shortdesc, s.longdesc, s.state
+        FROM `skill` s, `position` p, `employer` e
+        WHERE p.id = s.position and e.id = s.employer
+        ORDER BY `categoryorder`, `skillorder`;
+        """,
+    "get.glossary": "SELECT `id`, `term`, `url`, `description`, `state` FROM `glossary` ORDER BY `term`;",
+    "get.positions": """
+        SELECT e.id, e.employer, e.location, e.state,
+               p.id, p.position, p.startdate, p.enddate, p.state
+        FROM `employer` AS e
+        JOIN `position` AS p on e.id = p.employer
+        ORDER BY p.startdate DESC;
+        """,
+    "get.achievements": """
+        SELECT e.id, e.employer, e.state as employer_state,
+               p.id as position_id, p.position, p.state as position_state,
+               a.id as achievement_id, a.shortdesc, a.longdesc, a.state as achievement_state
+        FROM `achievement` a
+        JOIN `position` p ON a.position = p.id AND a.employer = p.employer
+        JOIN `employer` e ON a.employer = e.id;
+        """,
+    "insert.certification": "INSERT INTO `certification` (`certification`, `year`, `state`) VALUES (?, ?, ?);",
+    "insert.employer": "INSERT INTO `employer` (`employer`, `location`, `state`) VALUES (?, ?, ?);",
+    "insert.position": """
+        INSERT INTO `position` (`employer`, `position`, `startdate`, `enddate`, `state`)
+        VALUES (?, ?, ?, ?, ?);
+        """,
+    "insert.skill": """
+        INSERT INTO `skill` (`employer`, `position`, `shortdesc`, `longdesc`, `category`, `subcategory`,
+                             `categoryorder`, `skillorder`, `state`)
+        VALUES (?, ?, ?, ?, ?, ?, 1, 1, ?);
+        """,
+    "insert.summary": "INSERT INTO `summary` (`shortdesc`, `longdesc`, `summaryorder`, `state`) VALUES (?, ?, 1, ?);",
+    "insert.school": "INSERT INTO `school` (`school`, `location`, `state`) VALUES (?, ?, ?);",
+    "insert.focus": """
+        INSERT INTO `focus` (`school`, `focus`, `startdate`, `enddate`, `state`)
+        VALUES (?, ?, ?, ?, ?);
+        """,
+    "insert.achievement": """
+        INSERT INTO `achievement` (`position`, `employer`, `shortdesc`, `longdesc`, `state`)
+        VALUES (?, ?, ?, ?, ?);
+        """,
+    "insert.glossary": "INSERT INTO `glossary` (`term`, `url`, `description`, `state`) VALUES (?, ?, ?, ?);",
+    "exists.employer": "SELECT `id` FROM `employer` WHERE `employer` = ?;",
+    "search": """
+        SELECT `rowid`, `title`, snippet(`search`, -1, char(2), char(3), '...', 16),
+               bm25(`search`, 2.0, 1.0) AS `score`
+        FROM `search`
+        WHERE `search` MATCH ?
+        ORDER BY `score`
+        LIMIT ?;
+        """,
+}
+
+# Per-table statements, completed with the table name and a list of placeholders.
+TEMPLATES: dict[str, str] = {
+    "rows": "SELECT * FROM `{table}`;",
+    "ids": "SELECT `{table}`, `id` FROM `{table}` WHERE `{table}` IN ({marks}) ORDER BY `id`;",
+    "children": "SELECT `id` FROM `{table}` WHERE `{column}` IN ({marks});",
+    "delete": "DELETE FROM `{table}` WHERE `id` IN ({marks});",
+    "associated": "SELECT `{column}` FROM `{table}` WHERE `id` = ?;",
+    "others": "SELECT `id` FROM `{table}` WHERE `{column}` = ? AND `id` != ? LIMIT 1;",
+}
+
+# Registered texts, so every use of a statement shares one entry of the connection's statement cache.
+for table, columns in COLUMNS.items():
+    for column in columns:
+        STATEMENTS[f"update.{table}.{column}"] = (
+            f"UPDATE `{table}` SET `{column}` = ?, `state` = ? WHERE `id` = ?;")
+
+
+def sql(name: str) -> str:
+    """
+    Returns a registered statement.
+    :param str name: Statement name, key of 'STATEMENTS'.
+    :return str: SQL text with '?' placeholders.
+    """
+
+    try:
+        return STATEMENTS[name]
+    except KeyError:
+        raise ValueError(f"Unknown statement: {name}") from None
+
+
+def update(table: str, column: str) -> str:
+    """
+    Returns the statement updating one column and the state of a row.
+    :param str table: Database table.
+    :param str column: Column, one of 'COLUMNS[table]'.
+    :return str: SQL text binding value, state and id.
+    """
+
+    if column not in COLUMNS.get(table, ()):
+        raise ValueError(f"Unknown column for {table}: {column}")
+    return STATEMENTS[f"update.{table}.{column}"]
+
+
+def chunks(values: Iterable) -> Iterator[tuple]:
+    """
+    Splits values for IN lists into tuples of at most 'CHUNK', one statement each.
+    :param Iterable values: Bound values.
+    :return Iterator[tuple]: Sorted chunks, none without values.
+    """
+
+    ordered: list = sorted(values)
+    for start in range(0, len(ordered), CHUNK):
+        yield tuple(ordered[start:start + CHUNK])
+
+
+def bucket(values: tuple) -> tuple:
+    """
+    Pads values for an IN list up to the next power of two by repeating the last one,
+    so lists of similar length share a prepared statement.
+    :param tuple values: Bound values, at least one.
+    :return tuple: Padded values.
+    """
+
+    size: int = 1
+    while size < len(values):
+        size *= 2
+    return values + values[-1:] * (size - len(values))
+
+
+def template(name: str, table: str, column: str = "", values: tuple = ()) -> tuple[str, tuple]:
+    """
+    Completes a per-table statement for a known table and column.
+    :param str name: Template name, key of 'TEMPLATES'.
+    :param str table: Database table, one of 'connect.TABLES'.
+    :param str column: Column named by the template, if any.
+    :param tuple values: Values bound to the IN list, if any, at most 'CHUNK', see 'chunks'.
+    :return tuple[str, tuple]: SQL text and the values to bind to its IN list.
+    """
+
+    if table not in connect.TABLES:
+        raise ValueError(f"Unknown table: {table}")
+    if column and column not in connect.TABLES and column not in COLUMNS.get(table, ()):
+        raise ValueError(f"Unknown column for {table}: {column}")
+    if len(values) > CHUNK:
+        raise ValueError(f"Too many values for one IN list: {len(values)}")
+    padded: tuple = bucket(values) if values else ()
+    return TEMPLATES[name].format(table=table, column=column, marks=", ".join("?" * len(padded))), padded
+
+
+def match(text: str) -> str:
+    """
+    Turns typed text into an FTS5 query matching every word as a prefix, so operators and quotes stay literal.
+    :param str text: Search box input.
+    :return str: FTS5 query, empty without words.
+    """
+
+    return " ".join(f'"{word}"*' for word in re.findall(r"\w+", text))
@@ -0,0 +1,241 @@
+import functools
+import logging
+import os
+import re
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+from sqlite3 import Cursor
+from typing import Callable
+
+from ...utilities import metrics
+
+logger = logging.getLogger("pylaform.sql")
+
+# Change summary of the running 'writes' call.
+written: ContextVar[dict | None] = ContextVar("written", default=None)
+
+WRITE = re.compile(r"^\s*(INSERT\s+(?:OR\s+\w+\s+)?INTO|UPDATE(?:\s+OR\s+\w+)?|DELETE\s+FROM)\s+[`\"\[]?(\w+)",
+                   re.IGNORECASE)
+
+# Change summary key per statement verb.
+KINDS: dict[str, str] = {"INSERT": "inserted", "UPDATE": "updated", "DELETE": "deleted"}
+
+STATEMENT_DURATION = metrics.registry.histogram(
+    "pylaform_sql_statement_duration_seconds", "Duration of single SQL statements by method.", ("method",))
+SLOW_STATEMENTS = metrics.registry.counter(
+    "pylaform_sql_slow_statements_total", "SQL statements slower than the slow-query threshold.", ("method",))
+
+
+def normalise(statement: str) -> str:
+    """
+    Collapse whitespace and replace literals so equivalent statements group together.
+    :param str statement: SQL statement.
+    :return str: Normalised statement.
+    """
+
+    statement = re.sub(r"'(?:[^']|'')*'", "?", statement)
+    statement = re.sub(r"\b\d+(?:\.\d+)?\b", "?", statement)
+    return re.sub(r"\s+", " ", statement).strip()
+
+
+class Tracer:
+    """
+    Instrumented execution layer for every SQL statement of Get/Post/Delete.
+    Records normalised text, parameters, duration and rows, keeps a slow-query log
+    and optionally captures 'EXPLAIN QUERY PLAN' for slow statements.
+    :return None: None
+    """
+
+    def __init__(self, threshold: float = 0.05, explain: bool = False, history: int = 500) -> None:
+        self.threshold: float = threshold
+        self.explain: bool = explain
+        self.recent: deque[dict] = deque(maxlen=history)
+        self.slow: deque[dict] = deque(maxlen=history)
+        self.lock = threading.Lock()
+
+    def run(self, cursor: Cursor, statement: str, parameters: tuple | dict | list, fetch: bool,
+            many: bool = False) -> Cursor | list[tuple]:
+        """
+        Execute and record one statement.
+        :param Cursor cursor: Cursor to execute on.
+        :param str statement: SQL statement.
+        :param tuple | dict | list parameters: Bound parameters, one set per row when 'many'.
+        :param bool fetch: Fetch all rows and return them instead of the cursor.
+        :param bool many: Execute once per parameter set through 'executemany'.
+        :return Cursor | list[tuple]: Cursor, or fetched rows.
+        """
+
+        method: list | None = metrics.current_method.get()
+        label: str = method[0] if method is not None else "other"
+        changes: dict | None = written.get()
+        target: re.Match | None = WRITE.match(statement) if changes is not None else None
+        error: str = ""
+        rows: int = -1
+        start: float = time.perf_counter()
+        try:
+            if many:
+                cursor.executemany(statement, parameters)
+            else:
+                cursor.execute(statement, parameters)
+            if target is not None:
+                table: str = target.group(2).lower()
+                kind: str = KINDS[target.group(1).split()[0].upper()]
+                changes["tables"].add(table)
+                changes[kind] += max(cursor.rowcount, 0)
+                if kind == "deleted":
+                    changes["removed"][table] = changes["removed"].get(table, 0) + max(cursor.rowcount, 0)
+            if fetch:
+                result: Cursor | list[tuple] = cursor.fetchall()
+                rows = len(result)
+            else:
+                result = cursor
+                rows = cursor.rowcount
+            return result
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            elapsed: float = time.perf_counter() - start
+            STATEMENT_DURATION.observe(elapsed, method=label)
+            record: dict = {
+                "at": time.time(),
+                "method": label,
+                "statement": normalise(statement),
+                # Batches would pin every row in the history.
+                "parameters": f"<{len(parameters)} rows>" if many else parameters,
+                "seconds": elapsed,
+                "rows": rows,
+                "error": error,
+            }
+            with self.lock:
+                self.recent.append(record)
+            if elapsed >= self.threshold:
+                self.log_slow(cursor, statement, parameters[0] if many and parameters else parameters, record)
+
+    def log_slow(self, cursor: Cursor, statement: str, parameters: tuple | dict, record: dict) -> None:
+        """
+        Add a statement to the slow-query log.
+        :param Cursor cursor: Cursor the statement ran on.
+        :param str statement: SQL statement.
+        :param tuple | dict parameters: Bound parameters.
+        :param dict record: Trace record.
+        :return None: None
+        """
+
+        SLOW_STATEMENTS.inc(method=record["method"])
+        if self.explain and not record["error"]:
+            try:
+                # Own cursor, the caller may still be reading from theirs.
+                record["plan"] = [row[-1] for row in cursor.connection.execute(
+                    "EXPLAIN QUERY PLAN " + statement, parameters).fetchall()]
+            except Exception as e:
+                record["plan"] = [f"{type(e).__name__}: {e}"]
+        with self.lock:
+            self.slow.append(record)
+        logger.warning("Slow query (%.1f ms, %s rows) in %s: %s",
+                       record["seconds"] * 1000, record["rows"], record["method"], record["statement"])
+
+    def report(self) -> dict:
+        """
+        Snapshot of the trace buffers.
+        :return dict: Threshold, recent statements and slow-query log.
+        """
+
+        with self.lock:
+            return {
+                "threshold": self.threshold,
+                "explain": self.explain,
+                "recent": list(self.recent),
+                "slow": list(self.slow),
+            }
+
+
+tracer = Tracer(threshold=float(os.environ.get("PYLAFORM_SLOW_QUERY_MS", 50)) / 1000,
+                explain=os.environ.get("PYLAFORM_EXPLAIN_SLOW", "0") == "1")
+
+
+def execute(cursor: Cursor, statement: str, parameters: tuple | dict = ()) -> Cursor:
+    """
+    Execute a statement through the tracer.
+    :param Cursor cursor: Cursor to execute on.
+    :param str statement: SQL statement.
+    :param tuple | dict parameters: Bound parameters.
+    :return Cursor: Cursor after execution.
+    """
+
+    return tracer.run(cursor, statement, parameters, False)
+
+
+def executemany(cursor: Cursor, statement: str, parameters: list[tuple]) -> Cursor:
+    """
+    Execute a statement once per parameter set through the tracer.
+    :param Cursor cursor: Cursor to execute on.
+    :param str statement: SQL statement.
+    :param list[tuple] parameters: Bound parameters per row.
+    :return Cursor: Cursor after execution.
+    """
+
+    return tracer.run(cursor, statement, parameters, False, True)
+
+
+def fetch(cursor: Cursor, statement: str, parameters: tuple | dict = ()) -> list[tuple]:
+    """
+    Execute a query through the tracer and fetch every row.
+    :param Cursor cursor: Cursor to execute on.
+    :param str statement: SQL statement.
+    :param tuple | dict parameters: Bound parameters.
+    :return list[tuple]: Result rows.
+    """
+
+    return tracer.run(cursor, statement, parameters, True)
+
+
+def summary() -> dict:
+    """
+    Empty change summary of one write call.
+    :return dict: Written tables, rows inserted, updated and deleted, rows removed per table,
+                  fields left unchanged, names resolved to IDs and the queries needed to resolve them.
+    """
+
+    return {"tables": set(), "inserted": 0, "updated": 0, "deleted": 0, "unchanged": 0,
+            "removed": {}, "lookups": 0, "lookup_queries": 0}
+
+
+def report(kind: str, count: int) -> None:
+    """
+    Add to the change summary of the running write call, if any.
+    :param str kind: Summary key, e.g. 'unchanged' for posted fields matching the stored rows.
+    :param int count: Amount to add.
+    :return None: None
+    """
+
+    changes: dict | None = written.get()
+    if changes is not None:
+        changes[kind] += count
+
+
+def writes(func: Callable) -> Callable:
+    """
+    Decorator making a write method return its change summary, see 'summary()'.
+    :param Callable func: Post/Delete method.
+    :return Callable: Wrapped method returning the change summary.
+    """
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs) -> dict:
+        changes: dict | None = written.get()
+        if changes is not None:
+            # Nested write, report to the outer call.
+            func(*args, **kwargs)
+            return changes
+        changes = summary()
+        token = written.set(changes)
+        try:
+            func(*args, **kwargs)
+        finally:
+            written.reset(token)
+        return changes
+
+    return wrapper
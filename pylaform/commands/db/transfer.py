@@ -0,0 +1,224 @@
+import csv
+import json
+import os
+import sys
+import time
+from sqlite3 import Connection, Cursor
+from typing import Iterable, Iterator, TextIO
+
+from . import connect, trace
+from .connect import TABLES
+from ...utilities import metrics, resilience
+
+FORMATS: tuple[str, ...] = ("jsonl", "csv")
+
+
+class Transfer:
+    """
+    Streams resume tables to and from JSON Lines or CSV.
+    JSON Lines is one file holding a 'table' key per row, CSV is one '<table>.csv' per table in a directory.
+    :return None: None
+    """
+
+    @resilience.retrying()
+    def __init__(self, tenant: str = connect.DEFAULT_TENANT, batch: int = 5000, conn: Connection | None = None) -> None:
+        # Write through a given connection, e.g. to a scratch database, left open for the caller.
+        self.conn: Connection = conn if conn is not None else connect.db(tenant)
+        self.cursor: Cursor = self.conn.cursor()
+        self.batch: int = max(1, batch)
+
+    def columns(self, table: str) -> dict[str, bool]:
+        """
+        Columns of a table.
+        :param str table: One of 'TABLES'.
+        :return dict[str, bool]: Whether each column accepts NULL, by name.
+        """
+
+        if table not in TABLES:
+            raise ValueError(f"Unknown table: {table}")
+        return {row[1]: not row[3] for row in trace.fetch(self.cursor, f"PRAGMA table_info(`{table}`)")}
+
+    def rows(self, table: str) -> Iterator[dict[str, str | int | None]]:
+        """
+        Reads a table one batch at a time.
+        :param str table: One of 'TABLES'.
+        :return Iterator[dict[str, str | int | None]]: Rows by column name.
+        """
+
+        names: list[str] = list(self.columns(table))
+        # Own cursor, the caller may write while reading.
+        cursor: Cursor = trace.execute(self.conn.cursor(), f"SELECT * FROM `{table}` ORDER BY `id`")
+        while chunk := cursor.fetchmany(self.batch):
+            for row in chunk:
+                yield dict(zip(names, row))
+
+    @metrics.instrument
+    def export(self, target: str, form: str = "jsonl", tables: Iterable[str] = TABLES) -> dict:
+        """
+        Writes tables to JSON Lines ('-' for stdout) or to a directory of CSV files.
+        :param str target: File, '-' or directory.
+        :param str form: One of 'FORMATS'.
+        :param Iterable[str] tables: Tables to write.
+        :return dict: Rows per table, total rows, seconds and rows per second.
+        """
+
+        start: float = time.perf_counter()
+        counts: dict[str, int] = {}
+        if form == "csv":
+            os.makedirs(target, exist_ok=True)
+            for table in tables:
+                with open(os.path.join(target, f"{table}.csv"), "w", newline="") as file:
+                    writer = csv.DictWriter(file, fieldnames=list(self.columns(table)))
+                    writer.writeheader()
+                    counts[table] = 0
+                    for row in self.rows(table):
+                        writer.writerow(row)
+                        counts[table] += 1
+        elif form == "jsonl":
+            file: TextIO = sys.stdout if target == "-" else open(target, "w")
+            try:
+                for table in tables:
+                    counts[table] = 0
+                    for row in self.rows(table):
+                        file.write(json.dumps({"table": table, **row}) + "\n")
+                        counts[table] += 1
+            finally:
+                if file is not sys.stdout:
+                    file.close()
+        else:
+            raise ValueError(f"Unknown format: {form}")
+
+        return report(counts, time.perf_counter() - start)
+
+    def read(self, source: str, form: str = "jsonl", tables: Iterable[str] = TABLES
+             ) -> Iterator[tuple[str, dict[str, str | int | None]]]:
+        """
+        Reads rows lazily from JSON Lines ('-' for stdin) or a directory of CSV files.
+        :param str source: File, '-' or directory.
+        :param str form: One of 'FORMATS'.
+        :param Iterable[str] tables: Tables to read, others are skipped.
+        :return Iterator[tuple[str, dict]]: Table and row.
+        """
+
+        tables = tuple(tables)
+        if form == "csv":
+            for table in tables:
+                file_path: str = os.path.join(source, f"{table}.csv")
+                if not os.path.exists(file_path):
+                    continue
+                nullable: dict[str, bool] = self.columns(table)
+                with open(file_path, newline="") as file:
+                    for row in csv.DictReader(file):
+                        # CSV has no NULL, empty nullable cells are read as one.
+                        yield table, {key: None if value == "" and nullable.get(key) else value
+                                      for key, value in row.items()}
+        elif form == "jsonl":
+            file: TextIO = sys.stdin if source == "-" else open(source)
+            try:
+                for line in file:
+                    if line.strip():
+                        row: dict = json.loads(line)
+                        table: str = row.pop("table", "")
+                        if table in tables:
+                            yield table, row
+            finally:
+                if file is not sys.stdin:
+                    file.close()
+        else:
+            raise ValueError(f"Unknown format: {form}")
+
+    @trace.writes
+    @metrics.instrument
+    def write(self, records: Iterable[tuple[str, dict[str, str | int | None]]], replace: bool = False,
+              tables: Iterable[str] = TABLES, atomic: bool = False) -> dict:
+        """
+        Inserts rows in batches of 'self.batch', one transaction per batch. Rows keep their IDs
+        and replace stored rows with the same ID.
+        :param Iterable[tuple[str, dict]] records: Table and row, e.g. from 'read'.
+        :param bool replace: Empty the tables first, in the transaction of the first batch.
+        :param Iterable[str] tables: Tables emptied by 'replace'.
+        :param bool atomic: Commit once at the end instead of per batch, a failure leaves the tables untouched.
+        :return dict: Change summary, see 'trace.summary()'.
+        """
+
+        try:
+            if replace:
+                for table in tables:
+                    self.columns(table)
+                    trace.execute(self.cursor, f"DELETE FROM `{table}`")
+
+            key: tuple[str, tuple[str, ...]] | None = None
+            pending: list[tuple] = []
+            for table, row in records:
+                names: tuple[str, ...] = tuple(row)
+                if (table, names) != key or len(pending) >= self.batch:
+                    self.flush(key, pending, not atomic)
+                    key, pending = (table, names), []
+                pending.append(tuple(row.values()))
+            self.flush(key, pending, not atomic)
+        except BaseException:
+            # Drop the unfinished batch, or everything when atomic.
+            self.conn.rollback()
+            raise
+        self.conn.commit()
+
+    def flush(self, key: tuple[str, tuple[str, ...]] | None, pending: list[tuple], commit: bool = True) -> None:
+        """
+        Inserts and commits one batch.
+        :param tuple | None key: Table and column names of the batch.
+        :param list[tuple] pending: Row values.
+        :param bool commit: Commit the batch, see 'write'.
+        :return None: None
+        """
+
+        if key is None or not pending:
+            return
+        table, names = key
+        known: dict[str, bool] = self.columns(table)
+        unknown: list[str] = [name for name in names if name not in known]
+        if unknown:
+            raise ValueError(f"Unknown columns for {table}: {', '.join(unknown)}")
+        trace.executemany(
+            self.cursor,
+            f"""
+            INSERT OR REPLACE INTO `{table}`
+            ({", ".join(f"`{name}`" for name in names)})
+            VALUES ({", ".join("?" * len(names))});
+            """, pending)
+        if commit:
+            self.conn.commit()
+
+    @metrics.instrument
+    def load(self, source: str, form: str = "jsonl", replace: bool = False, tables: Iterable[str] = TABLES) -> dict:
+        """
+        Imports rows from JSON Lines or CSV, see 'read' and 'write'.
+        :param str source: File, '-' or directory.
+        :param str form: One of 'FORMATS'.
+        :param bool replace: Empty the imported tables first.
+        :param Iterable[str] tables: Tables to import.
+        :return dict: Rows per table, total rows, seconds and rows per second.
+        """
+
+        tables = tuple(tables)
+        start: float = time.perf_counter()
+        counts: dict[str, int] = dict.fromkeys(tables, 0)
+
+        def counted() -> Iterator[tuple[str, dict[str, str | int | None]]]:
+            for table, row in self.read(source, form, tables):
+                counts[table] += 1
+                yield table, row
+
+        self.write(counted(), replace, tables)
+        return report(counts, time.perf_counter() - start)
+
+
+def report(counts: dict[str, int], seconds: float) -> dict:
+    """
+    Summarise a transfer.
+    :param dict[str, int] counts: Rows per table.
+    :param float seconds: Duration.
+    :return dict: Rows per table, total rows, seconds and rows per second.
+    """
+
+    rows: int = sum(counts.values())
+    return {"tables": counts, "rows": rows, "seconds": seconds, "rows_per_second": rows / seconds if seconds else 0.0}
@@ -1,10 +1,34 @@
+from concurrent.futures import Future
 from sqlite3 import Cursor, Connection
-from tenacity import retry, stop_after_delay
 from werkzeug.datastructures.structures import ImmutableMultiDict
 
-from . import connect, delete, query
+from . import connect, delete, query, statements, trace
+from .writer import Writer, mutation
+from ...utilities import metrics, resilience
 from ...utilities.commands import transform_get_id
 
+# Database table, column and, for names stored as ids, the named table behind each posted attribute.
+FIELDS: dict[str, dict[str, tuple[str, str, str]]] = {
+    "identification": {"*": ("identification", "value", "")},
+    "certifications": {"certification": ("certification", "certification", ""),
+                       "year": ("certification", "year", "")},
+    "positions": {"employer": ("employer", "employer", ""), "location": ("employer", "location", ""),
+                  "position": ("position", "position", ""), "startdate": ("position", "startdate", ""),
+                  "enddate": ("position", "enddate", "")},
+    "skills": {"category": ("skill", "category", ""), "subcategory": ("skill", "subcategory", ""),
+               "employer": ("skill", "employer", "employer"), "position": ("skill", "position", "position"),
+               "shortdesc": ("skill", "shortdesc", ""), "longdesc": ("skill", "longdesc", "")},
+    "summary": {"shortdesc": ("summary", "shortdesc", ""), "longdesc": ("summary", "longdesc", "")},
+    "education": {"school": ("school", "school", ""), "location": ("school", "location", ""),
+                  "focus": ("focus", "focus", ""), "startdate": ("focus", "startdate", ""),
+                  "enddate": ("focus", "enddate", "")},
+    "achievements": {"employer": ("achievement", "employer", "employer"),
+                     "position": ("achievement", "position", "position"),
+                     "shortdesc": ("achievement", "shortdesc", ""), "longdesc": ("achievement", "longdesc", "")},
+    "glossary": {"term": ("glossary", "term", ""), "url": ("glossary", "url", ""),
+                 "description": ("glossary", "description", "")},
+}
+
 
 class Post:
     """
@@ -13,44 +37,125 @@ class Post:
     :return None: None
     """
 
-    @retry(stop=(stop_after_delay(10)))
-    def __init__(self) -> None:
-        self.conn: Connection = connect.db()
+    @resilience.retrying()
+    def __init__(self, tenant: str = connect.DEFAULT_TENANT, writer: Writer | None = None) -> None:
+        self.tenant: str = tenant
+        self.writer: Writer = writer if writer is not None else Writer.open(tenant)
+        self.conn: Connection = self.writer.conn
         self.cursor: Cursor = self.conn.cursor()
-        self.query = query.Get()
-        self.delete = delete.Delete()
+        # Reads see the writes of earlier mutations of the same group commit.
+        self.query = query.Get(tenant, self.conn)
+        self.writer.on_rollback(self.query.purge_cache)
+        self.delete = delete.Delete(self.writer)
+
+    def submit(self, form: str, form_data: ImmutableMultiDict) -> Future:
+        """
+        Queues the update of a form without waiting for it.
+        :param str form: Name of the form, key of 'FIELDS'.
+        :param ImmutableMultiDict form_data: Form data from template.
+        :return Future: Change summary once committed, see 'trace.summary()'.
+        """
+
+        if form not in FIELDS:
+            raise ValueError(f"Unknown form: {form}")
+        return self.writer.submit(getattr(self, "update_" + form), form_data)
+
+    def close(self) -> None:
+        """
+        Hands back the writer.
+        :return None: None
+        """
+
+        self.writer.rollbacks.remove(self.query.purge_cache)
+        self.writer.close()
+
+    def current(self, form: str,
+                form_data: ImmutableMultiDict) -> dict[tuple[str, str], tuple[str, bool, tuple[str, str]]]:
+        """
+        Looks up the stored value and state of every posted field of existing rows.
+        :param str form: Name of the form, key of 'FIELDS'.
+        :param ImmutableMultiDict form_data: Form data from template.
+        :return dict: Stored value, state and row per '(id, attr)'.
+        """
+
+        fields: dict[str, tuple[str, str, str]] = FIELDS[form]
+        result: dict[tuple[str, str], tuple[str, bool, tuple[str, str]]] = {}
+        for key in form_data:
+            item_split: list[str] = str(key).split("_")
+            if "_enabled" in key or len(item_split) < 2 or not item_split[0].isdigit():
+                continue
+            spec: tuple[str, str, str] | None = fields.get(item_split[1], fields.get("*"))
+            if spec is None:
+                continue
+            table, column, names = spec
+            row: dict[str, str | int] | None = self.query.rows(table).get(int(item_split[0]))
+            if row is None:
+                continue
+            value: str | int | None = row[column]
+            if names:
+                # Forms post the name of the nested row.
+                named: dict[str, str | int] | None = self.query.rows(names).get(value)
+                value = named[names] if named is not None else value
+            result[(item_split[0], item_split[1])] = ("" if value is None else str(value), bool(row["state"]),
+                                                      (table, item_split[0]))
+
+        return result
+
+    def transform(self, form: str, form_data: ImmutableMultiDict) -> list[dict[str, str | bool]]:
+        """
+        Transforms form data, keeping only fields that differ from the stored rows.
+        :param str form: Name of the form, key of 'FIELDS'.
+        :param ImmutableMultiDict form_data: Form data from template.
+        :return list[dict[str, str | bool]]: Changed fields, new rows and deletes.
+        """
+
+        current: dict[tuple[str, str], tuple[str, bool, tuple[str, str]]] = self.current(form, form_data)
+        result: list[dict[str, str | bool]] = transform_get_id(form_data, current)
+        trace.report("unchanged", len(current) - sum(1 for item in result if (item["id"], item["attr"]) in current))
+        return result
 
-    def update_identification(self, form_data: ImmutableMultiDict) -> None:
+    def prefetch(self, form_data: list[dict[str, str | bool]], tables: dict[str, str]) -> None:
+        """
+        Resolves every posted name to its ID with one query per table, later lookups are served from cache.
+        :param list[dict[str, str | bool]] form_data: Transformed form data.
+        :param dict[str, str] tables: Table searched per posted attribute.
+        :return None: None
+        """
+
+        for attr, table in tables.items():
+            names: list[str] = [item["value"] for item in form_data if item["attr"] == attr]
+            if names:
+                self.query.resolve_ids(table, names)
+
+    @mutation
+    @trace.writes
+    @metrics.instrument
+    def update_identification(self, form_data: ImmutableMultiDict) -> dict:
         """
         Updates the identification table.
         :param ImmutableMultiDict form_data: Form data from template.
-        :return: None
+        :return dict: Change summary, see 'trace.summary()'.
         """
 
         # Transform from template.
-        form_data: list[dict[str, str | bool]] = transform_get_id(form_data)
+        form_data: list[dict[str, str | bool]] = self.transform("identification", form_data)
         for item in form_data:
-            self.cursor.execute(
-                f"""
-                UPDATE `identification`
-                SET `value` = '{item["value"]}',
-                `state` = {int(item["state"])}
-                WHERE `id` = {item["id"]};
-                """)
-            
-        # Commit changes.
-        self.conn.commit()
-        return
-
-    def update_certifications(self, transform_form_data: ImmutableMultiDict) -> None:
+            trace.execute(
+                self.cursor,
+                statements.update("identification", "value"), (item["value"], int(item["state"]), int(item["id"])))
+
+    @mutation
+    @trace.writes
+    @metrics.instrument
+    def update_certifications(self, transform_form_data: ImmutableMultiDict) -> dict:
         """
         Updates the certification table.
         :param ImmutableMultiDict transform_form_data: Form data from template.
-        :return: list
+        :return dict: Change summary, see 'trace.summary()'.
         """
 
         # Transform from template.
-        transform_form_data: list[dict[str, str | bool]] = transform_get_id(transform_form_data)
+        transform_form_data: list[dict[str, str | bool]] = self.transform("certifications", transform_form_data)
         counter: str = ""
         result: dict[str, str | int] = {}
         for item in transform_form_data:
@@ -73,37 +178,31 @@ class Post:
                     
                 # Detect last iteration.
                 if len(result) == 3:
-                    self.cursor.execute(
-                        f"""
-                        INSERT INTO `certification`
-                        (`certification`, `year`, `state`)
-                        VALUES ('{result["certification"]}', '{result["year"]}', '{result["state"]}');
-                        """)
+                    trace.execute(
+                        self.cursor,
+                        statements.sql("insert.certification"),
+                        (result["certification"], result["year"], result["state"]))
                     
             # Update certifications.
             else:
-                self.cursor.execute(
-                    f"""
-                    UPDATE `certification`
-                    SET {item["attr"]} = '{item["value"]}',
-                    `state` = {item["state"]}
-                    WHERE `id` = {item["id"]}
-                    """
-                )
-
-        # Commit changes.
-        self.conn.commit()
-        return
-
-    def update_positions(self, form_data: ImmutableMultiDict) -> None:
+                trace.execute(
+                    self.cursor,
+                    statements.update("certification", item["attr"]),
+                    (item["value"], int(item["state"]), int(item["id"])))
+
+    @mutation
+    @trace.writes
+    @metrics.instrument
+    def update_positions(self, form_data: ImmutableMultiDict) -> dict:
         """
         Updates the employment and positions tables.
         :param ImmutableMultiDict form_data: Form data from template.
-        :return None: None
+        :return dict: Change summary, see 'trace.summary()'.
         """
         
         # Transform from template.
-        transform_form_data: list[dict[str, str | bool]] = transform_get_id(form_data)
+        transform_form_data: list[dict[str, str | bool]] = self.transform("positions", form_data)
+        self.prefetch(transform_form_data, {"employer": "employer"})
         counter: str = ""
         result: dict[str, str | int] = {}
         for item in transform_form_data:
@@ -114,6 +213,7 @@ class Post:
             # Delete position, and employer (if necessary).
             if "delete" in item["attr"]:
                 self.delete.delete_association(item["id"], "employer", "position")
+                self.query.forget_ids("employer", "position")
             
             # Create employer.
             elif "new" in item["id"] and ("employer" in item["attr"] or "location" in item["attr"]):
@@ -133,22 +233,12 @@ class Post:
                             item["value"] = "0001-01-01"
                             
                     # Check for employer.
-                    check_employer = self.cursor.execute(
-                        f"""
-                        SELECT *
-                        FROM `employer`
-                        WHERE `employer` = '{result["employer"]}'
-                        """)
-                    if len(check_employer.fetchall()) == 0:  # If no employer.
-                        self.cursor.execute(
-                            f"""
-                                INSERT INTO `employer`
-                                (`employer`, `location`, `state`)
-                                VALUES ('{result["employer"]}', '{result["location"]}', '{result["state"]}');
-                            """)
-
-                        # Commit changes.
-                        self.conn.commit()
+                    if self.query.query_id(result["employer"], "employer") == 0:  # If no employer.
+                        trace.execute(
+                            self.cursor,
+                            statements.sql("insert.employer"),
+                            (result["employer"], result["location"], result["state"]))
+                        self.query.remember_id("employer", result["employer"], self.cursor.lastrowid)
 
             # Create position.
             elif "new" in item["id"]:
@@ -173,13 +263,12 @@ class Post:
                         if item["value"] == "hidden":
                             item["value"] = "0001-01-01"
                         result["employer"] = self.query.query_id(result["employer"], "employer")
-                    self.cursor.execute(
-                        f"""
-                        INSERT INTO `position`
-                        (`employer`, `position`, `startdate`, `enddate`, `state`)
-                        VALUES ('{result["employer"]}', '{result["position"]}', 
-                                '{result["startdate"]}', '{result["enddate"]}', '{result["state"]}');
-                        """)
+                    trace.execute(
+                        self.cursor,
+                        statements.sql("insert.position"),
+                        (result["employer"], result["position"], result["startdate"], result["enddate"],
+                         result["state"]))
+                    self.query.remember_id("position", result["position"], self.cursor.lastrowid)
 
             # Update employer and position.
             else:
@@ -193,51 +282,40 @@ class Post:
                             item["value"] = "0001-01-01"
                     if item["attr"] == "employer":
                         # Check for employer.
-                        check_employer = self.cursor.execute(
-                            f"""
-                            SELECT *
-                            FROM `employer`
-                            WHERE `employer` = '{item["id"]}'
-                            """)
-                        if len(check_employer.fetchall()) == 0:  # If no employer.
-                            self.cursor.execute(
-                                f"""
-                                INSERT INTO `employer`
-                                (`employer`, `location`, `state`)
-                                VALUES ('{result["employer"]}', '{result["location"]}', '{result["state"]}');
-                                """)
+                        check_employer = trace.fetch(
+                            self.cursor,
+                            statements.sql("exists.employer"), (item["id"],))
+                        if len(check_employer) == 0:  # If no employer.
+                            trace.execute(
+                                self.cursor,
+                                statements.sql("insert.employer"),
+                                (result["employer"], result["location"], result["state"]))
                 # Detect if enough data to update employers.
                 if "location" in item["attr"] or "employer" in item["attr"]:
-                    self.cursor.execute(
-                        f"""
-                        UPDATE `employer`
-                        SET {item["attr"]} = '{item["value"]}',
-                        state = {item["state"]}
-                        WHERE id = {int(item["id"])}
-                        """)
+                    trace.execute(
+                        self.cursor,
+                        statements.update("employer", item["attr"]),
+                        (item["value"], int(item["state"]), int(item["id"])))
                 # Detect if enough data to update positions.
                 elif "delete" not in item['attr'] and "new" not in item['attr']:
-                    self.cursor.execute(
-                        f"""
-                         UPDATE `position`
-                         SET {item["attr"]} = '{item["value"]}',
-                         state = {item["state"]}
-                         WHERE id = {int(item["id"])}
-                         """)
-
-        # Commit changes.
-        self.conn.commit()
-        return
-
-    def update_skills(self, form_data: ImmutableMultiDict) -> None:
+                    trace.execute(
+                        self.cursor,
+                        statements.update("position", item["attr"]),
+                        (item["value"], int(item["state"]), int(item["id"])))
+
+    @mutation
+    @trace.writes
+    @metrics.instrument
+    def update_skills(self, form_data: ImmutableMultiDict) -> dict:
         """
         Updates the skills table.
         :param ImmutableMultiDict form_data: Form data from template.
-        :return None: None
+        :return dict: Change summary, see 'trace.summary()'.
         """
 
         # Transform from template.
-        transform_form_data: list[dict[str, str | bool]] = transform_get_id(form_data)
+        transform_form_data: list[dict[str, str | bool]] = self.transform("skills", form_data)
+        self.prefetch(transform_form_data, {"employer": "employer", "position": "position"})
         counter: str = ""
         result: dict[str, str | int] = {}
         for item in transform_form_data:
@@ -273,39 +351,29 @@ class Post:
                 # Detect last iteration.
                 if len(result) == 7:
                     # TODO: Implement ordering support.
-                    self.cursor.execute(
-                        f"""
-                        INSERT INTO `skill`
-                                    (`employer`, `position`, `shortdesc`,
-                                    `longdesc`, `category`, `subcategory`,
-                                    `categoryorder`, `skillorder`, `state`)
-                        VALUES      ('{result["employer"]}', '{result["position"]}', '{result["shortdesc"]}',
-                                    '{result["longdesc"]}', '{result["category"]}', '{result["subcategory"]}',
-                                    '1', '1', '{result["state"]}');
-                        """)
+                    trace.execute(
+                        self.cursor,
+                        statements.sql("insert.skill"),
+                        (result["employer"], result["position"], result["shortdesc"], result["longdesc"],
+                         result["category"], result["subcategory"], result["state"]))
             # Update skill.
             else:
-                self.cursor.execute(
-                    f"""
-                        UPDATE `skill`
-                        SET `{item["attr"]}` = '{item["value"]}',
-                        `state` = {item["state"]}
-                        WHERE `id` = {int(item["id"])}
-                    """)
-        
-        # Commit changes.
-        self.conn.commit()
-        return
-
-    def update_summary(self, form_data: ImmutableMultiDict) -> None:
+                trace.execute(
+                    self.cursor,
+                    statements.update("skill", item["attr"]), (item["value"], int(item["state"]), int(item["id"])))
+
+    @mutation
+    @trace.writes
+    @metrics.instrument
+    def update_summary(self, form_data: ImmutableMultiDict) -> dict:
         """
         Updates the summary table.
         :param ImmutableMultiDict form_data: Form data from template.
-        :return None: None
+        :return dict: Change summary, see 'trace.summary()'.
         """
 
         # Transform from template.
-        transform_form_data: list[dict[str, str | bool]] = transform_get_id(form_data)
+        transform_form_data: list[dict[str, str | bool]] = self.transform("summary", form_data)
         counter: str = ""
         result: dict[str, str | int] = {}
         for item in transform_form_data:
@@ -327,35 +395,28 @@ class Post:
                         result.update({"longdesc": item["value"], "state": int(item["state"])})
                 # Detect last iteration.
                 if len(result) == 3:
-                    self.cursor.execute(
-                        f"""
-                        INSERT INTO `summary`
-                        (`shortdesc`, `longdesc`, `summaryorder`, `state`)
-                        VALUES ('{result["shortdesc"]}', '{result["longdesc"]}', '1', '{result["state"]}');
-                        """)
+                    trace.execute(
+                        self.cursor,
+                        statements.sql("insert.summary"), (result["shortdesc"], result["longdesc"], result["state"]))
             # Update summary.
             else:
-                self.cursor.execute(
-                    f"""
-                    UPDATE `summary`
-                    SET `{item['attr']}` = '{item['value']}',
-                    `state` = {item['state']}
-                    WHERE `id` = {item['id']}
-                    """)
-
-        # Commit changes.
-        self.conn.commit()
-        return
-
-    def update_education(self, form_data: ImmutableMultiDict) -> None:
+                trace.execute(
+                    self.cursor,
+                    statements.update("summary", item["attr"]), (item["value"], int(item["state"]), int(item["id"])))
+
+    @mutation
+    @trace.writes
+    @metrics.instrument
+    def update_education(self, form_data: ImmutableMultiDict) -> dict:
         """
         Updates the education and focus tables.
         :param ImmutableMultiDict form_data: Form data from template.
-        :return None: None
+        :return dict: Change summary, see 'trace.summary()'.
         """
 
         # Transform from template.
-        transform_form_data: list[dict[str, str | bool]] = transform_get_id(form_data)
+        transform_form_data: list[dict[str, str | bool]] = self.transform("education", form_data)
+        self.prefetch(transform_form_data, {"school": "school"})
         counter: str = ""
         result: dict[str, str | int] = {}
         for item in transform_form_data:
@@ -366,6 +427,7 @@ class Post:
             # Delete focus, and school (if necessary).
             if "delete" in item["attr"]:
                 self.delete.delete_association(item["id"], "school", "focus")
+                self.query.forget_ids("school")
                 
             # Create school.
             elif "new" in item["id"] and ("school" in item["attr"] or "location" in item["attr"]):
@@ -384,22 +446,11 @@ class Post:
                         if item["value"] == "hidden":
                             item["value"] = "0001-01-01"
                     # Check for school.
-                    check_school = self.cursor.execute(
-                        f"""
-                        SELECT *
-                        FROM `school`
-                        WHERE `school` = '{result["school"]}'
-                        """)
-                    if len(check_school.fetchall()) == 0:  # If no school.
-                        self.cursor.execute(
-                            f"""
-                            INSERT INTO `school`
-                                        (`school`, `location`, `state`)
-                            VALUES      ('{result["school"]}', '{result["location"]}', '{result["state"]}');
-                            """)
-
-                        # Commit changes.
-                        self.conn.commit()
+                    if self.query.query_id(result["school"], "school") == 0:  # If no school.
+                        trace.execute(
+                            self.cursor,
+                            statements.sql("insert.school"), (result["school"], result["location"], result["state"]))
+                        self.query.remember_id("school", result["school"], self.cursor.lastrowid)
             
             # Create focus.
             elif "new" in item["id"]:
@@ -424,14 +475,10 @@ class Post:
                         if item["value"] == "hidden":
                             item["value"] = "0001-01-01"
                         result["school"] = self.query.query_id(result["school"], "school")
-                    self.cursor.execute(
-                        f"""
-                        INSERT INTO `focus`
-                                    (`school`, `focus`,
-                                    `startdate`, `enddate`, `state`)
-                        VALUES      ('{result["school"]}', '{result["focus"]}',
-                                    '{result["startdate"]}', '{result["enddate"]}', '{result["state"]}');
-                        """)
+                    trace.execute(
+                        self.cursor,
+                        statements.sql("insert.focus"),
+                        (result["school"], result["focus"], result["startdate"], result["enddate"], result["state"]))
 
             # Update focus.
             else:
@@ -443,36 +490,28 @@ class Post:
                         item["value"] = "0001-01-01"
                 # Detect if enough data to update school.
                 if "location" in item["attr"] or "school" in item["attr"]:
-                    self.cursor.execute(
-                        f"""
-                                UPDATE `school`
-                                SET {item["attr"]} = "{item["value"]}",
-                                `state` = {item["state"]}
-                                WHERE `id` = {int(item["id"])}
-                            """)
+                    trace.execute(
+                        self.cursor,
+                        statements.update("school", item["attr"]), (item["value"], int(item["state"]), int(item["id"])))
                 # Detect if enough data to update focus.
                 elif "delete" not in item["attr"] and "new" not in item["attr"]:
-                    self.cursor.execute(
-                        f"""
-                             UPDATE `focus`
-                             SET {item["attr"]} = "{item["value"]}",
-                             `state` = {item["state"]}
-                             WHERE `id` = {int(item["id"])}
-                         """)
-
-        # Commit changes.
-        self.conn.commit()
-        return
-
-    def update_achievements(self, form_data: ImmutableMultiDict) -> None:
+                    trace.execute(
+                        self.cursor,
+                        statements.update("focus", item["attr"]), (item["value"], int(item["state"]), int(item["id"])))
+
+    @mutation
+    @trace.writes
+    @metrics.instrument
+    def update_achievements(self, form_data: ImmutableMultiDict) -> dict:
         """
         Updates the achievements table.
         :param ImmutableMultiDict form_data: Form data from template.
-        :return None: None
+        :return dict: Change summary, see 'trace.summary()'.
         """
 
         # Transform from template.
-        transform_form_data: list[dict[str, str | bool]] = transform_get_id(form_data)
+        transform_form_data: list[dict[str, str | bool]] = self.transform("achievements", form_data)
+        self.prefetch(transform_form_data, {"employer": "employer", "position": "position"})
         counter: str = ""
         result: dict[str, str | int] = {}
         for item in transform_form_data:
@@ -502,14 +541,11 @@ class Post:
                         result.update({"longdesc": item["value"], "state": int(item["state"])})
                 # Detect last iteration.
                 if len(result) == 5:
-                    self.cursor.execute(
-                        f"""
-                        INSERT INTO `achievement`
-                                    (`position`, `employer`, 
-                                    `shortdesc`, `longdesc`, `state`)
-                        VALUES      ('{result["employer"]}', '{result["position"]}',
-                                    '{result["shortdesc"]}', '{result["longdesc"]}', '{result["state"]}');
-                        """)
+                    trace.execute(
+                        self.cursor,
+                        statements.sql("insert.achievement"),
+                        (result["position"], result["employer"], result["shortdesc"], result["longdesc"],
+                         result["state"]))
                     
             # Update achievement.
             else:
@@ -519,27 +555,23 @@ class Post:
                         item["value"] = str(self.query.query_id(item["value"], "position"))
                     case "employer":
                         item["value"] = str(self.query.query_id(item["value"], "employer"))
-                self.cursor.execute(
-                    f"""
-                         UPDATE `achievement`
-                         SET {item['attr']} = '{item['value']}',
-                         state = {item['state']}
-                         WHERE id = {int(item['id'])}
-                     """)
-
-        # Commit changes.
-        self.conn.commit()
-        return
-
-    def update_glossary(self, form_data: ImmutableMultiDict) -> None:
+                trace.execute(
+                    self.cursor,
+                    statements.update("achievement", item["attr"]),
+                    (item["value"], int(item["state"]), int(item["id"])))
+
+    @mutation
+    @trace.writes
+    @metrics.instrument
+    def update_glossary(self, form_data: ImmutableMultiDict) -> dict:
         """
         Updates the glossary table.
         :param ImmutableMultiDict form_data: Form data from template.
-        :return None: None
+        :return dict: Change summary, see 'trace.summary()'.
         """
 
         # Transform from template.
-        transform_form_data: list[dict[str, str | bool]] = transform_get_id(form_data)
+        transform_form_data: list[dict[str, str | bool]] = self.transform("glossary", form_data)
         counter: str = ""
         result: dict[str, str | int] = {}
         for item in transform_form_data:
@@ -563,25 +595,13 @@ class Post:
                         result.update({"description": item["value"], "state": int(item["state"])})
                 # Detect last iteration.
                 if len(result) == 4:
-                    self.cursor.execute(
-                        f"""
-                       INSERT INTO `glossary`
-                                   (`term`, `url`,
-                                   `description`, `state`)
-                       VALUES      ('{result["term"]}', '{result["url"]}',
-                                   '{result["description"]}', '{result["state"]}');
-                       """)
+                    trace.execute(
+                        self.cursor,
+                        statements.sql("insert.glossary"),
+                        (result["term"], result["url"], result["description"], result["state"]))
                     
             # Update term.
             else:
-                self.cursor.execute(
-                    f"""
-                    UPDATE `glossary`
-                    SET `{item["attr"]}` = '{item["value"]}',
-                    `state` = {item["state"]}
-                    WHERE id = {item["id"]}
-                    """)
-        
-        # Commit changes.
-        self.conn.commit()
-        return
+                trace.execute(
+                    self.cursor,
+                    statements.update("glossary", item["attr"]), (item["value"], int(item["state"]), int(item["id"])))
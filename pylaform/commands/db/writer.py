@@ -0,0 +1,228 @@
+import contextvars
+import functools
+import os
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from sqlite3 import Connection, Cursor
+from typing import Callable
+
+from . import connect, trace
+from ...utilities import metrics
+
+QUEUE_LATENCY = metrics.registry.histogram(
+    "pylaform_write_queue_seconds", "Time mutations waited in the write queue.", ())
+BATCH_SIZE = metrics.registry.histogram(
+    "pylaform_write_batch_size", "Mutations committed together per group commit.", (),
+    (1, 2, 4, 8, 16, 32, 64, 128, 256))
+COMMIT_DURATION = metrics.registry.histogram(
+    "pylaform_write_commit_seconds", "Duration of group commits, from BEGIN to COMMIT.", ())
+MUTATIONS = metrics.registry.counter(
+    "pylaform_write_mutations_total", "Mutations run by the writer by result.", ("result",))
+
+# Writers by database file, shared by every Post/Delete of the process.
+writers: dict[str, "Writer"] = {}
+opening = threading.Lock()
+
+
+class Writer:
+    """
+    Single thread owning the write connection of one database. Queued mutations run one after the
+    other, each in its own savepoint, and everything queued meanwhile is committed together.
+    :return None: None
+    """
+
+    def __init__(self, tenant: str = connect.DEFAULT_TENANT,
+                 batch: int = int(os.environ.get("PYLAFORM_WRITE_BATCH", 64))) -> None:
+        self.tenant: str = tenant
+        self.batch: int = max(1, batch)
+        self.conn: Connection = connect.db(tenant)
+        self.cursor: Cursor = self.conn.cursor()
+        # Readers keep reading the last commit while the writer works.
+        trace.fetch(self.cursor, "PRAGMA journal_mode=WAL")
+        self.jobs: queue.Queue = queue.Queue()
+        self.rollbacks: list[Callable[[], None]] = []
+        self.users: int = 0
+        self.thread = threading.Thread(target=self.work, name=f"pylaform-writer-{tenant}", daemon=True)
+        self.thread.start()
+
+    @classmethod
+    def open(cls, tenant: str = connect.DEFAULT_TENANT) -> "Writer":
+        """
+        Returns the writer of a profile's database, starting it if needed. Hand back through 'close'.
+        :param str tenant: Profile name, see 'connect.valid'.
+        :return Writer: Shared writer.
+        """
+
+        database: str = connect.path(tenant)
+        with opening:
+            writer: Writer | None = writers.get(database)
+            if writer is None:
+                writer = writers[database] = cls(tenant)
+            writer.users += 1
+            return writer
+
+    def close(self) -> None:
+        """
+        Hands back a writer from 'open', stopping it once nobody uses it. Queued mutations still run.
+        :return None: None
+        """
+
+        with opening:
+            self.users -= 1
+            if self.users > 0:
+                return
+            for database, writer in list(writers.items()):
+                if writer is self:
+                    del writers[database]
+        self.jobs.put(None)
+        if threading.current_thread() is not self.thread:
+            self.thread.join()
+
+    def on_rollback(self, callback: Callable[[], None]) -> None:
+        """
+        Registers a callback run after rolled back mutations, e.g. to drop caches built from them.
+        :param Callable callback: Callback without arguments.
+        :return None: None
+        """
+
+        self.rollbacks.append(callback)
+
+    def submit(self, func: Callable, *args, **kwargs) -> Future:
+        """
+        Queues a mutation. It runs on the writer thread, in the context of the caller.
+        :param Callable func: Mutation writing through 'self.conn', must not commit.
+        :param args: Positional arguments.
+        :param kwargs: Keyword arguments.
+        :return Future: Result of the mutation once committed, or its error.
+        """
+
+        future: Future = Future()
+        call: Callable = functools.partial(contextvars.copy_context().run, func, *args, **kwargs)
+        self.jobs.put((time.perf_counter(), call, future))
+        return future
+
+    def work(self) -> None:
+        """
+        Writer thread: takes the next mutation plus everything queued behind it and commits them together.
+        :return None: None
+        """
+
+        while True:
+            job: tuple | None = self.jobs.get()
+            jobs: list[tuple] = []
+            stopping: bool = job is None
+            while job is not None:
+                jobs.append(job)
+                if len(jobs) >= self.batch:
+                    break
+                try:
+                    job = self.jobs.get_nowait()
+                except queue.Empty:
+                    break
+                stopping = job is None
+            if jobs:
+                try:
+                    self.group(jobs)
+                except Exception as e:
+                    # The thread must outlive any error, later submits would wait forever.
+                    print(f"Error in database writer: {e}")
+                    self.fail(jobs, e)
+            if stopping:
+                self.conn.close()
+                return
+
+    def group(self, jobs: list[tuple]) -> None:
+        """
+        Runs mutations in one transaction, rolling back failed ones to their savepoint.
+        :param list[tuple] jobs: Queue time, call and future per mutation.
+        :return None: None
+        """
+
+        start: float = time.perf_counter()
+        BATCH_SIZE.observe(len(jobs))
+        done: list[tuple[Future, object]] = []
+        rolled_back: bool = False
+        try:
+            trace.execute(self.cursor, "BEGIN IMMEDIATE")
+            for queued, call, future in jobs:
+                QUEUE_LATENCY.observe(time.perf_counter() - queued)
+                if not future.set_running_or_notify_cancel():
+                    continue
+                trace.execute(self.cursor, "SAVEPOINT mutation")
+                try:
+                    result: object = call()
+                except Exception as e:
+                    trace.execute(self.cursor, "ROLLBACK TO mutation")
+                    trace.execute(self.cursor, "RELEASE mutation")
+                    rolled_back = True
+                    MUTATIONS.inc(result="error")
+                    future.set_exception(e)
+                    continue
+                trace.execute(self.cursor, "RELEASE mutation")
+                done.append((future, result))
+            self.conn.commit()
+        except Exception as e:
+            # Not only sqlite3.Error, e.g. tracing or metrics, the whole group is lost either way.
+            print(f"Error committing to database: {e}")
+            try:
+                if self.conn.in_transaction:
+                    self.conn.rollback()
+            except sqlite3.Error as rollback:
+                print(f"Error rolling back database: {rollback}")
+            self.rolled_back()
+            self.fail(jobs, e)
+            return
+        finally:
+            COMMIT_DURATION.observe(time.perf_counter() - start)
+
+        if rolled_back:
+            self.rolled_back()
+        # Callers only hear back once their writes are durable.
+        for future, result in done:
+            MUTATIONS.inc(result="ok")
+            future.set_result(result)
+
+    def fail(self, jobs: list[tuple], error: Exception) -> None:
+        """
+        Fails every mutation of a group not answered yet.
+        :param list[tuple] jobs: Queue time, call and future per mutation.
+        :param Exception error: Error handed to the callers.
+        :return None: None
+        """
+
+        for _, _, future in jobs:
+            if not future.done():
+                MUTATIONS.inc(result="error")
+                future.set_exception(error)
+
+    def rolled_back(self) -> None:
+        """
+        Runs the rollback callbacks, a failing callback does not stop the others.
+        :return None: None
+        """
+
+        for callback in self.rollbacks:
+            try:
+                callback()
+            except Exception as e:
+                print(f"Error in rollback callback: {e}")
+
+
+def mutation(func: Callable) -> Callable:
+    """
+    Decorator running a method of an object holding a 'writer' on the writer thread and waiting for its commit.
+    Calls made on the writer thread, e.g. a Post method deleting rows, run directly in the running mutation.
+    :param Callable func: Post/Delete method.
+    :return Callable: Wrapped method.
+    """
+
+    @functools.wraps(func)
+    def wrapper(self, *args, **kwargs):
+        if threading.current_thread() is self.writer.thread:
+            return func(self, *args, **kwargs)
+        return self.writer.submit(func, self, *args, **kwargs).result()
+
+    return wrapper
@@ -1,4 +1,5 @@
 from datetime import datetime
+from pylaform.commands.db import connect
 from pylaform.commands.db.query import Get
 from pylaform.utilities.commands import listify, unique
 from pylatex import escape_latex, NoEscape
@@ -11,8 +12,8 @@ class Commands:
     :return: None
     """
 
-    def __init__(self) -> None:
-        self.queries = Get()
+    def __init__(self, queries: Get | None = None, tenant: str = connect.DEFAULT_TENANT) -> None:
+        self.queries = queries if queries is not None else Get(tenant)
 
     @staticmethod
     def format_date(date_date: datetime | str) -> str:
@@ -88,7 +89,7 @@ class Commands:
         """
 
         glossary: list[dict[str, str | bool]] = listify(self.queries.get_glossary())
-        search_terms: list[str] = unique([sub["term"] for sub in glossary])
+        search_terms: list[str] = unique(sub["term"] for sub in glossary)
         updated_text: str = r"" + text
         for term in search_terms:
             if re.search(f" {term} ", text):
@@ -1,6 +1,9 @@
+from pylaform.commands.db import connect
 from pylaform.commands.db.query import Get
 from pylaform.commands.latex import Commands
-from pylaform.utilities.commands import contact_flatten, listify, slim, unique
+from collections import Counter
+
+from pylaform.utilities.commands import contact_flatten, distinct, listify, slim, unique
 from pylatex import Itemize, NewLine, Section, Subsection, Tabular, Tabularx, Document
 from pylatex.utils import bold, italic, NoEscape
 
@@ -11,9 +14,10 @@ class Common:
     :return None: None
     """
 
-    def __init__(self) -> None:
-        self.resume_data = Get()
-        self.cmd = Commands()
+    def __init__(self, queries: Get | None = None, cmd: Commands | None = None,
+                 tenant: str = connect.DEFAULT_TENANT) -> None:
+        self.resume_data = queries if queries is not None else Get(tenant)
+        self.cmd = cmd if cmd is not None else Commands(self.resume_data)
 
     def modern_contact_header(self, doc: Document) -> None:
         """
@@ -117,20 +121,14 @@ class Common:
 
         # Remove all items designated to be hidden
         unique_categories: list[dict[str, str, str, int, str, int, str, str]] = unique(
-            [{"id": sub["id"], "attr": sub["attr"], "value": sub["value"], "state": sub["state"]}
-             for sub in self.resume_data.get_skills()])
+            {"id": sub["id"], "attr": sub["attr"], "value": sub["value"], "state": sub["state"]}
+            for sub in self.resume_data.get_skills())
         skills: list[dict[str, str | bool]] = slim(self.resume_data.get_skills())
 
         category_item_count = []
-        skill_item_count = []
         for item in unique_categories:
             category_item_count.append(item["attr"])
-        for item in skills:
-            skill_item_count.append(item["subcategory"])
-        unique_list = unique(skill_item_count)
-        counts_dict = {}
-        for item in unique_list:
-            counts_dict.update({item: Common.count_instances(skill_item_count, item)})
+        counts_dict: Counter[str] = Counter(item["subcategory"] for item in skills)
 
         # Start writing.
         with ((doc.create(Section("Skills", False)))):
@@ -165,9 +163,9 @@ class Common:
 
         doc.append(NoEscape(r"\section{\sc Experience}"))
 
-        categories = unique([sub["category"] for sub in slim(self.resume_data.get_skills())])
-        subcategories = unique([{"subcategory": sub["subcategory"], "category": sub["category"]}
-                                for sub in listify(self.resume_data.get_skills())])
+        categories = unique(sub["category"] for sub in slim(self.resume_data.get_skills()))
+        subcategories = unique({"subcategory": sub["subcategory"], "category": sub["category"]}
+                               for sub in listify(self.resume_data.get_skills()))
         for category in categories:
             doc.append(bold(category))
             for subcategory in subcategories:
@@ -201,7 +199,7 @@ class Common:
                     sub_category.append(employer["employer"])
                     employer_name = self.resume_data.query_name(employer["employer"], "employer")
                     with doc.create(Subsection(employer_name, False)):
-                        for position in unique(listify(self.resume_data.get_positions())):
+                        for position in distinct(listify(self.resume_data.get_positions())):
                             if employer["employer"] == position["employer"]:
                                 position_name = self.resume_data.query_name(position["position"], "position")
                                 with doc.create(Subsection(position_name, False)) as position_sub:
@@ -215,7 +213,7 @@ class Common:
                                         + end_date
                                         + r"}}"))
                                     position_sub.append(NewLine())
-                                    for achievement in unique(listify(self.resume_data.get_achievements())):
+                                    for achievement in distinct(listify(self.resume_data.get_achievements())):
                                         if position["employer"] == achievement["employer"] and (
                                                 position["position"] == achievement["position"]):
                                             with doc.create(Itemize()) as itemize:
@@ -232,13 +230,17 @@ class Common:
 
         # Start writing.
         doc.append(NoEscape(r"\section{\sc Employment}"))
-        companies = unique([sub["employer"] for sub in listify(self.resume_data.get_achievements())])
+        companies = unique(sub["employer"] for sub in listify(self.resume_data.get_achievements()))
         for employer in companies:
             employer_name = self.resume_data.query_name(employer, "employer")
             doc.append(bold(employer_name))
             doc.append(NewLine())
+            achievements: list[dict[str, str | bool]] = listify(self.resume_data.get_achievements())
             for position in listify(self.resume_data.get_positions()):
-                if employer == position["employer"]:
+                # Positions without achievements, e.g. left out of a tailored selection, would leave an empty list.
+                if employer == position["employer"] and any(
+                        employer == achievement["employer"] and position["position"] == achievement["position"]
+                        for achievement in achievements):
                     position_name = self.resume_data.query_name(position["position"], "position")
                     end_date = "Present" if self.cmd.format_date(
                         position["enddate"]) == "" else self.cmd.format_date(position["enddate"])
@@ -252,7 +254,7 @@ class Common:
                         + f"{end_date}"
                         + r"}}"))
                     doc.append(NoEscape(r"\begin{list2}"))
-                    for achievement in listify(self.resume_data.get_achievements()):
+                    for achievement in achievements:
                         if employer == achievement["employer"] and position["position"] == achievement["position"]:
                             doc.append(NoEscape(
                                 r"\item " + self.cmd.glossary_inject(achievement["longdesc"], "retro")))
@@ -0,0 +1,57 @@
+from sqlite3 import Connection, Cursor
+
+from pylaform.commands.db import connect, memory, trace
+from pylaform.commands.db.query import Get
+from pylaform.commands.latex import Commands
+from pylaform.utilities import resilience
+from .common import Common
+
+
+class GenerationContext:
+    """
+    Dependencies of one render, reading every table from the same snapshot through one connection.
+    Enter it around the reads, the deferred read transaction is released on exit.
+    :return None: None
+    """
+
+    @resilience.retrying()
+    def __init__(self, tenant: str = connect.DEFAULT_TENANT, selection: dict[str, set[int]] | None = None,
+                 conn: Connection | None = None) -> None:
+        self.tenant: str = tenant
+        # Read a given connection instead of the profile, e.g. a restored snapshot, left open for the caller.
+        self.borrowed: bool = conn is not None
+        # In-memory generations never change, reading one is already a snapshot.
+        self.pinned: bool = conn is None and memory.enabled()
+        self.conn: Connection = (conn if conn is not None else memory.copy(tenant).current() if self.pinned
+                                 else connect.db(tenant))
+        self.cursor: Cursor = self.conn.cursor()
+        # Tailored renders only see the selected rows, see 'Get.selection'.
+        self.queries = Get(tenant, self.conn, selection)
+        self.cmd = Commands(self.queries)
+        self.common = Common(self.queries, self.cmd)
+        self.versions: dict[str, int] = {}
+        self.depth: int = 0
+
+    def __enter__(self) -> "GenerationContext":
+        if self.depth == 0:
+            if not self.pinned:
+                trace.execute(self.cursor, "BEGIN DEFERRED")
+            # The first read pins the snapshot, later saves stay invisible until exit.
+            self.versions = self.queries.table_versions()
+        self.depth += 1
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.depth -= 1
+        if self.depth == 0 and self.conn.in_transaction:
+            # Nothing was written, rolling back only releases the snapshot.
+            self.conn.rollback()
+
+    def close(self) -> None:
+        """
+        Closes the connection of the render, in-memory generations close once unused.
+        :return None: None
+        """
+
+        if not self.pinned and not self.borrowed:
+            self.conn.close()
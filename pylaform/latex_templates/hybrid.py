@@ -1,9 +1,10 @@
-from pylaform.commands.db.query import Get
-from pylaform.commands.latex import Commands
+from pylaform.commands.db import connect
+from pylaform.utilities import metrics, profiling, resilience, sandbox
 from pylatex import Command, Document, Package
 from pylatex.utils import NoEscape
-from tenacity import retry, stop_after_delay
-from .common import Common
+import os
+import time
+from .context import GenerationContext
 
 
 class Generator:
@@ -12,10 +13,17 @@ class Generator:
     :return: None
     """
 
-    def __init__(self) -> None:
-        self.resume_data = Get()
-        self.cmd = Commands()
-        self.common = Common()
+    def __init__(self, tenant: str = connect.DEFAULT_TENANT, context: GenerationContext | None = None,
+                 directory: str | None = None) -> None:
+        self.tenant: str = tenant
+        # Receives the .tex and .pdf, the profile's data directory unless given.
+        self.directory: str = directory if directory is not None else connect.directory(tenant)
+        # Close the context after the render only when it is ours.
+        self.owned: bool = context is None
+        self.context = context if context is not None else GenerationContext(tenant)
+        self.resume_data = self.context.queries
+        self.cmd = self.context.cmd
+        self.common = self.context.common
         self.doc = Document()
 
     def run(self) -> None:
@@ -105,28 +113,49 @@ class Generator:
         # self.doc.append(NoEscape(r"\setlist[itemize]{itemjoin=\hspace*{0.5em},itemjoin*=\hspace*{0.5em}}"))
 
         # Start Page
-        # Contact Information
-        self.common.retro_contact_header(self.doc)
+        # Read every section from one snapshot.
+        try:
+            with self.context:
+                # Contact Information
+                with profiling.phase("contact_information"):
+                    self.common.retro_contact_header(self.doc)
 
-        # Summary
-        self.common.retro_summary_details(self.doc)
+                # Summary
+                with profiling.phase("summary"):
+                    self.common.retro_summary_details(self.doc)
 
-        # Skills
-        self.common.retro_skills(self.doc)
+                # Skills
+                with profiling.phase("skills"):
+                    self.common.retro_skills(self.doc)
 
-        # Work History
-        self.common.retro_work_history(self.doc)
+                # Work History
+                with profiling.phase("work_history"):
+                    self.common.retro_work_history(self.doc)
+        finally:
+            if self.owned:
+                self.context.close()
 
         # End Page
         self.doc.append(NoEscape(r"\end{resume}"))
-        self.generate()
 
-    @retry(stop=(stop_after_delay(10)))
+        with profiling.phase("compile"):
+            # Failing compilers stop compiling for a while, errors in the document do not, see 'sandbox.unhealthy'.
+            resilience.breaker(f"latex.hybrid.{self.tenant}", sandbox.unhealthy).call(self.generate)
+
+    @resilience.retrying()
     def generate(self) -> None:
         """
-        Hammer PyLatex until it soulpos gives in.
+        Compiles the document, transient I/O errors are tried again.
         :return None: None
         """
 
-        self.doc.generate_pdf("data/hybrid", clean_tex=True)
-        self.doc.generate_tex("data/hybrid")
+        start: float = time.perf_counter()
+        try:
+            output: str = os.path.join(self.directory, "hybrid")
+            sandbox.compile_pdf(self.doc, output, "hybrid")
+        except Exception:
+            metrics.LATEX_ATTEMPTS.inc(template="hybrid", result="error")
+            raise
+        finally:
+            metrics.LATEX_DURATION.observe(time.perf_counter() - start, template="hybrid")
+        metrics.LATEX_ATTEMPTS.inc(template="hybrid", result="ok")
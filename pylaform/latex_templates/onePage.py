@@ -1,9 +1,10 @@
-from pylaform.commands.db.query import Get
-from pylaform.commands.latex import Commands
+from pylaform.commands.db import connect
+from pylaform.utilities import metrics, profiling, resilience, sandbox
 from pylatex import Document, Package
 from pylatex.utils import NoEscape
-from tenacity import retry, stop_after_delay
-from .common import Common
+import os
+import time
+from .context import GenerationContext
 
 
 class Generator:
@@ -12,10 +13,17 @@ class Generator:
     :return: None
     """
     
-    def __init__(self) -> None:
-        self.resume_data = Get()
-        self.cmd = Commands()
-        self.common = Common()
+    def __init__(self, tenant: str = connect.DEFAULT_TENANT, context: GenerationContext | None = None,
+                 directory: str | None = None) -> None:
+        self.tenant: str = tenant
+        # Receives the .tex and .pdf, the profile's data directory unless given.
+        self.directory: str = directory if directory is not None else connect.directory(tenant)
+        # Close the context after the render only when it is ours.
+        self.owned: bool = context is None
+        self.context = context if context is not None else GenerationContext(tenant)
+        self.resume_data = self.context.queries
+        self.cmd = self.context.cmd
+        self.common = self.context.common
 
         # Margins
         self.doc = Document(geometry_options={
@@ -49,30 +57,50 @@ class Generator:
         self.doc.append(NoEscape(r"\setlist[itemize]{itemjoin=\hspace*{0.5em},itemjoin*=\hspace*{0.5em}}"))
         
         # Start page
-        # Contact Information
-        self.common.modern_contact_header(self.doc)
+        # Read every section from one snapshot.
+        try:
+            with self.context:
+                # Contact Information
+                with profiling.phase("contact_information"):
+                    self.common.modern_contact_header(self.doc)
+
+                # Summary
+                with profiling.phase("summary"):
+                    self.common.modern_summary_details(self.doc)
+
+                # Skills
+                with profiling.phase("skills"):
+                    self.common.modern_skills(self.doc)
+
+                # Work History
+                with profiling.phase("work_history"):
+                    self.common.modern_work_history(self.doc)
+        finally:
+            if self.owned:
+                self.context.close()
 
-        # Summary
-        self.common.modern_summary_details(self.doc)
-        
-        # Skills
-        self.common.modern_skills(self.doc)
-        
-        # Work History
-        self.common.modern_work_history(self.doc)
-        
         # End page
         self.doc.create(NoEscape(r"\end{document}"))
 
         # Generate the page
-        self.generate()
+        with profiling.phase("compile"):
+            # Failing compilers stop compiling for a while, errors in the document do not, see 'sandbox.unhealthy'.
+            resilience.breaker(f"latex.one-page.{self.tenant}", sandbox.unhealthy).call(self.generate)
 
-    @retry(stop=(stop_after_delay(10)))
+    @resilience.retrying()
     def generate(self) -> None:
         """
-        Hammer PyLatex until it soulpos gives in.
+        Compiles the document, transient I/O errors are tried again.
         :return None: None
         """
-        
-        self.doc.generate_pdf("data/one-page", clean_tex=True)
-        self.doc.generate_tex("data/one-page")
+
+        start: float = time.perf_counter()
+        try:
+            output: str = os.path.join(self.directory, "one-page")
+            sandbox.compile_pdf(self.doc, output, "one-page")
+        except Exception:
+            metrics.LATEX_ATTEMPTS.inc(template="one-page", result="error")
+            raise
+        finally:
+            metrics.LATEX_DURATION.observe(time.perf_counter() - start, template="one-page")
+        metrics.LATEX_ATTEMPTS.inc(template="one-page", result="ok")
@@ -0,0 +1,44 @@
+import os
+import tempfile
+
+from pylaform.commands.db import connect
+from . import hybrid, onePage
+from .context import GenerationContext
+
+GENERATORS = {
+    "hybrid": hybrid.Generator,
+    "one-page": onePage.Generator,
+}
+
+
+def scratch() -> str | None:
+    """
+    Parent of the private compile directories: PYLAFORM_SCRATCH, else /dev/shm when writable, else the system default.
+    :return str | None: Directory, None for the system default.
+    """
+
+    configured: str | None = os.environ.get("PYLAFORM_SCRATCH")
+    if configured:
+        return configured
+    if os.path.isdir("/dev/shm") and os.access("/dev/shm", os.W_OK):
+        return "/dev/shm"
+    return None
+
+
+def render(template: str, snapshot: GenerationContext | None = None, tenant: str = connect.DEFAULT_TENANT) -> bytes:
+    """
+    Compiles a resume in a private temporary directory and returns the PDF, nothing is written to 'data/'.
+    :param str template: One of 'GENERATORS'.
+    :param GenerationContext | None snapshot: Snapshot to read from, left open for the caller. A new one otherwise.
+    :param str tenant: Profile name, ignored with a snapshot.
+    :return bytes: PDF document.
+    """
+
+    if template not in GENERATORS:
+        raise ValueError(f"Unknown template: {template}")
+    if snapshot is not None:
+        tenant = snapshot.tenant
+    with tempfile.TemporaryDirectory(prefix="pylaform-", dir=scratch()) as directory:
+        GENERATORS[template](tenant, snapshot, directory).run()
+        with open(os.path.join(directory, template + ".pdf"), "rb") as pdf:
+            return pdf.read()
@@ -0,0 +1,130 @@
+import math
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from typing import Iterator
+
+
+class Rejected(Exception):
+    """
+    Raised when compile work cannot be admitted.
+    :return None: None
+    """
+
+    def __init__(self, reason: str, retry_after: int) -> None:
+        super().__init__(reason)
+        self.reason: str = reason
+        self.retry_after: int = retry_after
+
+
+class Admission:
+    """
+    Concurrency limiter for compile work with a bounded, per-client fair wait queue.
+    Waiting clients are served round-robin so one client cannot starve the others.
+    :return None: None
+    """
+
+    def __init__(self, concurrency: int = 2, queue: int = 8, per_client: int = 2, timeout: float = 30.0) -> None:
+        self.concurrency: int = max(1, concurrency)
+        self.queue: int = max(0, queue)
+        self.per_client: int = max(1, per_client)
+        self.timeout: float = timeout
+        self.lock = threading.Lock()
+        self.running: int = 0
+        self.active: dict[str, int] = {}
+        self.waiting: OrderedDict[str, deque[threading.Event]] = OrderedDict()
+        self.waiting_count: int = 0
+        self.average: float = 5.0
+
+    def retry_after(self) -> int:
+        """
+        Estimate when a rejected client should try again.
+        :return int: Seconds to wait.
+        """
+
+        return max(1, math.ceil(self.average * (self.waiting_count + 1) / self.concurrency))
+
+    def acquire(self, client: str) -> None:
+        """
+        Wait for a compile slot.
+        :param str client: Client identifier used for fairness.
+        :return None: None
+        """
+
+        with self.lock:
+            if self.active.get(client, 0) + len(self.waiting.get(client, ())) >= self.per_client:
+                raise Rejected("Too many compile requests from this client.", self.retry_after())
+            if self.running < self.concurrency and self.waiting_count == 0:
+                self._grant(client)
+                return
+            if self.waiting_count >= self.queue:
+                raise Rejected("Compile queue is full.", self.retry_after())
+
+            ticket = threading.Event()
+            self.waiting.setdefault(client, deque()).append(ticket)
+            self.waiting_count += 1
+
+        if ticket.wait(self.timeout):
+            return
+
+        with self.lock:
+            # Granted between the timeout and the lock.
+            if ticket.is_set():
+                return
+            self.waiting[client].remove(ticket)
+            if not self.waiting[client]:
+                del self.waiting[client]
+            self.waiting_count -= 1
+            raise Rejected("Timed out waiting for a compile slot.", self.retry_after())
+
+    def release(self, client: str, elapsed: float) -> None:
+        """
+        Return a compile slot and hand it to the next waiting client.
+        :param str client: Client identifier used for fairness.
+        :param float elapsed: Seconds the slot was held.
+        :return None: None
+        """
+
+        with self.lock:
+            self.average = 0.8 * self.average + 0.2 * elapsed
+            self.running -= 1
+            self.active[client] -= 1
+            if self.active[client] == 0:
+                del self.active[client]
+
+            # Round-robin across waiting clients.
+            if self.waiting:
+                next_client, tickets = next(iter(self.waiting.items()))
+                ticket = tickets.popleft()
+                del self.waiting[next_client]
+                if tickets:
+                    self.waiting[next_client] = tickets
+                self.waiting_count -= 1
+                self._grant(next_client)
+                ticket.set()
+
+    @contextmanager
+    def slot(self, client: str) -> Iterator[None]:
+        """
+        Hold a compile slot for the duration of the block.
+        :param str client: Client identifier used for fairness.
+        :return Iterator[None]: Context manager.
+        """
+
+        self.acquire(client)
+        start: float = time.monotonic()
+        try:
+            yield
+        finally:
+            self.release(client, time.monotonic() - start)
+
+    def _grant(self, client: str) -> None:
+        """
+        Mark a slot as taken. Caller must hold the lock.
+        :param str client: Client identifier used for fairness.
+        :return None: None
+        """
+
+        self.running += 1
+        self.active[client] = self.active.get(client, 0) + 1
@@ -1,7 +1,11 @@
 import re
+from typing import Hashable, Iterable, Iterator
 
 from werkzeug.datastructures.structures import ImmutableMultiDict
 
+# Stored values of the 'Present' and (hidden) date fields.
+DATES: dict[str, str] = {"": "9999-01-01", "hidden": "0001-01-01"}
+
 
 def fatten(full_list: list[dict[str, str | int | bool]]) -> dict[str, list[dict[str, str | bool]], str, list[str]]:
     """
@@ -10,31 +14,32 @@ def fatten(full_list: list[dict[str, str | int | bool]]) -> dict[str, list[dict[
     :return dict: Payload passed to templates.
     """
 
-    result: list[dict[str, str | int | bool]] = []
-    attrs: list[str] = []
-    for item in full_list:
-        sub_result: dict[str, str | int | bool] = {}
-        attrs.append(item["attr"])
-        for sub_key in item:
-            sub_result.update({sub_key: item[sub_key]})
-        result.append(sub_result)
+    result: list[dict[str, str | int | bool]] = [dict(item) for item in full_list]
+    attrs: list[str] = [item["attr"] for item in full_list]
 
     return {"payload": listify(result), "attrs": attrs}
 
 
-def slim(full_list: list[dict[str, str | int | bool]]) -> list[dict[str, str | bool]]:
+def slim(full_list: Iterable[dict[str, str | int | bool]]) -> list[dict[str, str | bool]]:
     """
     Extracts 'id/attr/value/state' and drops items with false states for latex writing.
-    :param list[dict[str, str | int | bool]] full_list: Decompiled attribute list.
+    :param Iterable[dict[str, str | int | bool]] full_list: Decompiled attribute list.
     :return dict: Payload passed to templates.
     """
 
-    bloated = [{"id": sub["id"], "attr": sub["attr"], "value": sub["value"], "state": sub["state"]}
-               for sub in full_list]
-    for item in bloated:
-        if not item["state"]:
-            bloated.remove(item)
-    return listify(bloated)
+    return listify(enabled(full_list))
+
+
+def enabled(full_list: Iterable[dict[str, str | int | bool]]) -> Iterator[dict[str, str | int | bool]]:
+    """
+    Lazily extracts 'id/attr/value/state' of the items with true states.
+    :param Iterable[dict[str, str | int | bool]] full_list: Decompiled attribute list.
+    :return Iterator[dict[str, str | int | bool]]: Enabled items.
+    """
+
+    for sub in full_list:
+        if sub["state"]:
+            yield {"id": sub["id"], "attr": sub["attr"], "value": sub["value"], "state": sub["state"]}
 
 
 def contact_flatten(full_list: list[dict[str, str | int | bool]]) -> dict[any, dict[str, any]]:
@@ -53,16 +58,24 @@ def contact_flatten(full_list: list[dict[str, str | int | bool]]) -> dict[any, d
     return result
 
 
-def listify(full_list: list[dict[str, str | int | bool]]) -> list[dict[str, str | bool]]:
+def listify(full_list: Iterable[dict[str, str | int | bool]]) -> list[dict[str, str | bool]]:
     """
     Converts decompiled attribute list into structured list for latex and flask templates.
-    :param list[dict[str, str | bool]] full_list: Decompiled attribute list.
+    :param Iterable[dict[str, str | bool]] full_list: Decompiled attribute list.
     :return list: Compiled attribute list.
     """
 
-    attrs: list[str] = unique([sub["attr"] for sub in full_list])
+    if not isinstance(full_list, list):
+        full_list = list(full_list)
+    attrs: list[str] = unique(sub["attr"] for sub in full_list)
     attrs_per_id: int = 0
 
+    # Count the attributes of every id once.
+    id_attrs: dict[str | int, set[str]] = {}
+    for sub in full_list:
+        if sub["attr"] != "":
+            id_attrs.setdefault(sub["id"], set()).add(sub["attr"])
+
     # Setup variables.
     sub_mask_group_count: list[str] = []
     result: list[dict[str, str | bool]] = []
@@ -78,7 +91,7 @@ def listify(full_list: list[dict[str, str | int | bool]]) -> list[dict[str, str
                      or re.sub(r'\D', '', str(item["id"])) != re.sub(r'\D', '', str(count)))):
             # Split current ID for nested detection.
             if isinstance(item["id"], int):
-                item_split = str(item["id"])
+                item_split = [str(item["id"])]
             else:
                 item_split = item["id"].split("_")
             if item["id"] not in sub_mask and len(item_split) == 1:
@@ -86,8 +99,8 @@ def listify(full_list: list[dict[str, str | int | bool]]) -> list[dict[str, str
 
         # Get list of attributes associated with current ID.
         if isinstance(item["id"], int):
-            attrs_per_id = len(unique([sub["attr"] if sub["id"] == item["id"] else "" for sub in full_list]))
-            item_split = str(item["id"])
+            attrs_per_id = len(id_attrs.get(item["id"], ()))
+            item_split = [str(item["id"])]
         else:
             item_split = item["id"].split("_")
 
@@ -122,11 +135,14 @@ def listify(full_list: list[dict[str, str | int | bool]]) -> list[dict[str, str
     return result
 
 
-def transform_get_id(form_data: ImmutableMultiDict) -> list[dict[str, str | bool]]:
+def transform_get_id(form_data: ImmutableMultiDict,
+                     current: dict[tuple[str, str], tuple[str, bool, tuple[str, str]]] | None = None
+                     ) -> list[dict[str, str | bool]]:
     """
     Transforms data by stripping id data and creating a new dictionary field for nested and regular items.
     Used for DB actions: INSERT INTO, DELETE FROM, UPDATE.
     :param ImmutableMultiDict form_data: Data response from templates.
+    :param dict | None current: Stored value, state and row per '(id, attr)', only changed fields are kept when given.
     :return list:
     """
 
@@ -138,22 +154,82 @@ def transform_get_id(form_data: ImmutableMultiDict) -> list[dict[str, str | bool
         if "_enabled" not in item:
             result.append({"id": item_split[0], "attr": item_split[1], "value": form_data[item], "state": False})
 
+    if current is None:
+        return result
+    return changed(result, current)
+
+
+def changed(form_data: list[dict[str, str | bool]],
+            current: dict[tuple[str, str], tuple[str, bool, tuple[str, str]]]) -> list[dict[str, str | bool]]:
+    """
+    Drops updates matching the stored row. New rows, deletes and unknown fields are always kept.
+    A row has one state, enabled when any of its posted checkboxes is.
+    :param list[dict[str, str | bool]] form_data: Output of 'transform_get_id'.
+    :param dict current: Stored value, state and row per '(id, attr)'.
+    :return list[dict[str, str | bool]]: Changed fields.
+    """
+
+    states: dict[tuple[str, str], bool] = {}
+    for item in form_data:
+        stored = current.get((item["id"], item["attr"]))
+        if stored is not None:
+            states[stored[2]] = states.get(stored[2], False) or item["state"]
+
+    result: list[dict[str, str | bool]] = []
+    for item in form_data:
+        stored = current.get((item["id"], item["attr"]))
+        if stored is None:
+            result.append(item)
+            continue
+        item["state"] = states[stored[2]]
+        value: str = str(item["value"])
+        # Same 'Present' and (hidden) cleanup as the writes.
+        if "date" in item["attr"]:
+            value = DATES.get(value, value)
+        if value != stored[0] or item["state"] != stored[1]:
+            result.append(item)
+
     return result
 
 
-def unique(list1: list) -> list:
+def canonical(value: any) -> Hashable:
     """
-    Returns only unique values from a list.
-    :param list list1: source list.
-    :return list: Dedupped list.
+    Hashable key of a value, equal for equal dictionaries, lists and sets.
+    :param any value: Value to key.
+    :return Hashable: Canonical key.
     """
 
-    unique_list: list = []
+    if isinstance(value, dict):
+        return frozenset((key, canonical(sub)) for key, sub in value.items())
+    if isinstance(value, (list, tuple)):
+        return tuple(canonical(sub) for sub in value)
+    if isinstance(value, (set, frozenset)):
+        return frozenset(canonical(sub) for sub in value)
+    return value
 
+
+def distinct(list1: Iterable) -> Iterator:
+    """
+    Lazily yields the first occurrence of every non-empty value.
+    :param Iterable list1: source values.
+    :return Iterator: Dedupped values, in order.
+    """
+
+    seen: set = set()
     for x in list1:
         if x == "":
             continue
-        if x not in unique_list:
-            unique_list.append(x)
+        key: Hashable = canonical(x)
+        if key not in seen:
+            seen.add(key)
+            yield x
+
+
+def unique(list1: Iterable) -> list:
+    """
+    Returns only unique values from a list.
+    :param Iterable list1: source list.
+    :return list: Dedupped list.
+    """
 
-    return unique_list
+    return list(distinct(list1))
@@ -0,0 +1,270 @@
+import functools
+import threading
+import time
+from contextvars import ContextVar
+from typing import Callable
+
+from tenacity import RetryCallState
+
+# Method currently running SQL, as [label, statement count].
+current_method: ContextVar[list | None] = ContextVar("current_method", default=None)
+
+
+class Metric:
+    """
+    Base for labelled metrics rendered in the Prometheus text exposition format.
+    :return None: None
+    """
+
+    kind: str = "untyped"
+
+    def __init__(self, name: str, description: str, labels: tuple[str, ...] = ()) -> None:
+        self.name: str = name
+        self.description: str = description
+        self.labels: tuple[str, ...] = labels
+        self.lock = threading.Lock()
+
+    def key(self, labels: dict[str, str]) -> tuple[str, ...]:
+        """
+        Orders label values by the declared label names.
+        :param dict[str, str] labels: Label values.
+        :return tuple[str, ...]: Ordered label values.
+        """
+
+        return tuple(str(labels.get(label, "")) for label in self.labels)
+
+    def format_labels(self, key: tuple[str, ...], extra: str = "") -> str:
+        """
+        Render label values for one sample.
+        :param tuple[str, ...] key: Ordered label values.
+        :param str extra: Additional rendered label such as 'le'.
+        :return str: Rendered label set.
+        """
+
+        pairs: list[str] = [
+            f'{label}="' + value.replace("\\", r"\\").replace('"', r'\"').replace("\n", r"\n") + '"'
+            for label, value in zip(self.labels, key)]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+    def samples(self) -> list[str]:
+        """
+        Render every sample of the metric.
+        :return list[str]: Exposition lines.
+        """
+
+        return []
+
+    def exposition(self) -> str:
+        """
+        Render the metric with its HELP and TYPE headers.
+        :return str: Exposition text.
+        """
+
+        lines: list[str] = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} {self.kind}"]
+        return "\n".join(lines + self.samples())
+
+
+class Counter(Metric):
+    """
+    Monotonic labelled counter.
+    :return None: None
+    """
+
+    kind = "counter"
+
+    def __init__(self, name: str, description: str, labels: tuple[str, ...] = ()) -> None:
+        super().__init__(name, description, labels)
+        self.values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        """
+        Increment the counter.
+        :param float amount: Increment.
+        :param str labels: Label values.
+        :return None: None
+        """
+
+        key = self.key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def value(self, **labels: str) -> float:
+        """
+        Current value of the counter.
+        :param str labels: Label values.
+        :return float: Counter value.
+        """
+
+        return self.values.get(self.key(labels), 0)
+
+    def samples(self) -> list[str]:
+        with self.lock:
+            values = dict(self.values)
+        return [f"{self.name}{self.format_labels(key)} {value}" for key, value in sorted(values.items())]
+
+
+class Histogram(Metric):
+    """
+    Labelled histogram with cumulative buckets.
+    :return None: None
+    """
+
+    kind = "histogram"
+    default_buckets: tuple[float, ...] = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+    def __init__(self, name: str, description: str, labels: tuple[str, ...] = (),
+                 buckets: tuple[float, ...] = default_buckets) -> None:
+        super().__init__(name, description, labels)
+        self.buckets: tuple[float, ...] = tuple(sorted(buckets))
+        self.values: dict[tuple[str, ...], list[float]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        """
+        Record one observation.
+        :param float value: Observed value.
+        :param str labels: Label values.
+        :return None: None
+        """
+
+        key = self.key(labels)
+        with self.lock:
+            # Bucket counts, then sum and count.
+            sample = self.values.setdefault(key, [0] * (len(self.buckets) + 2))
+            for i, bucket in enumerate(self.buckets):
+                if value <= bucket:
+                    sample[i] += 1
+            sample[-2] += value
+            sample[-1] += 1
+
+    def samples(self) -> list[str]:
+        with self.lock:
+            values = {key: list(sample) for key, sample in self.values.items()}
+        lines: list[str] = []
+        for key, sample in sorted(values.items()):
+            for i, bucket in enumerate(self.buckets):
+                le: str = 'le="' + str(bucket) + '"'
+                lines.append(f"{self.name}_bucket{self.format_labels(key, le)} {sample[i]}")
+            le = 'le="+Inf"'
+            lines.append(f"{self.name}_bucket{self.format_labels(key, le)} {sample[-1]}")
+            lines.append(f"{self.name}_sum{self.format_labels(key)} {sample[-2]}")
+            lines.append(f"{self.name}_count{self.format_labels(key)} {sample[-1]}")
+        return lines
+
+
+class Registry:
+    """
+    Collection of metrics exposed on '/metrics'.
+    :return None: None
+    """
+
+    def __init__(self) -> None:
+        self.metrics: dict[str, Metric] = {}
+
+    def counter(self, name: str, description: str, labels: tuple[str, ...] = ()) -> Counter:
+        """
+        Register a counter.
+        :param str name: Metric name.
+        :param str description: Metric help text.
+        :param tuple[str, ...] labels: Label names.
+        :return Counter: Registered counter.
+        """
+
+        return self.metrics.setdefault(name, Counter(name, description, labels))
+
+    def histogram(self, name: str, description: str, labels: tuple[str, ...] = (),
+                  buckets: tuple[float, ...] = Histogram.default_buckets) -> Histogram:
+        """
+        Register a histogram.
+        :param str name: Metric name.
+        :param str description: Metric help text.
+        :param tuple[str, ...] labels: Label names.
+        :param tuple[float, ...] buckets: Upper bounds of the buckets.
+        :return Histogram: Registered histogram.
+        """
+
+        return self.metrics.setdefault(name, Histogram(name, description, labels, buckets))
+
+    def exposition(self) -> str:
+        """
+        Render every registered metric.
+        :return str: Prometheus text exposition.
+        """
+
+        return "\n".join(metric.exposition() for metric in self.metrics.values()) + "\n"
+
+
+registry = Registry()
+
+REQUEST_DURATION = registry.histogram(
+    "pylaform_request_duration_seconds", "Flask request latency by route.", ("route", "method", "status"))
+SQL_STATEMENTS = registry.counter(
+    "pylaform_sql_statements_total", "SQL statements executed by Get/Post/Delete method.", ("method",))
+SQL_DURATION = registry.histogram(
+    "pylaform_sql_duration_seconds", "Time spent in Get/Post/Delete methods that ran SQL.", ("method",))
+CACHE_REQUESTS = registry.counter(
+    "pylaform_cache_requests_total", "Cache lookups by cache and result.", ("cache", "result"))
+LATEX_DURATION = registry.histogram(
+    "pylaform_latex_compile_duration_seconds", "LaTeX compile duration by template.", ("template",),
+    (0.5, 1, 2.5, 5, 10, 20, 30, 60, 120))
+LATEX_ATTEMPTS = registry.counter(
+    "pylaform_latex_compile_attempts_total", "LaTeX compile attempts by template and result.", ("template", "result"))
+RETRIES = registry.counter(
+    "pylaform_retries_total", "Retries triggered by tenacity decorators.", ("function",))
+
+
+def cache_lookup(cache: str, hit: bool) -> None:
+    """
+    Count a cache hit or miss.
+    :param str cache: Name of the cache.
+    :param bool hit: Whether the lookup was served from cache.
+    :return None: None
+    """
+
+    CACHE_REQUESTS.inc(cache=cache, result="hit" if hit else "miss")
+
+
+def count_retry(retry_state: RetryCallState) -> None:
+    """
+    Tenacity 'before_sleep' hook counting retries per wrapped function.
+    :param RetryCallState retry_state: Tenacity call state.
+    :return None: None
+    """
+
+    RETRIES.inc(function=getattr(retry_state.fn, "__qualname__", str(retry_state.fn)))
+
+
+def trace_statement(statement: str) -> None:
+    """
+    SQLite trace callback counting statements against the method running them.
+    :param str statement: Executed statement.
+    :return None: None
+    """
+
+    method: list | None = current_method.get()
+    if method is not None:
+        method[1] += 1
+    SQL_STATEMENTS.inc(method=method[0] if method is not None else "other")
+
+
+def instrument(func: Callable) -> Callable:
+    """
+    Decorator labelling SQL statements with the running method and timing methods that ran SQL.
+    :param Callable func: Get/Post/Delete method.
+    :return Callable: Wrapped method.
+    """
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        method: list = [func.__qualname__, 0]
+        token = current_method.set(method)
+        start: float = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            current_method.reset(token)
+            if method[1]:
+                SQL_DURATION.observe(time.perf_counter() - start, method=method[0])
+
+    return wrapper
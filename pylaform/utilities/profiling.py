@@ -0,0 +1,224 @@
+import cProfile
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Callable, Iterable, Iterator
+from urllib.parse import parse_qs
+
+# Profile running in the current context, if any.
+active: ContextVar["Profile | None"] = ContextVar("active_profile", default=None)
+
+# Only one profile at a time, tracemalloc is process wide.
+busy = threading.Lock()
+
+
+def allowed() -> bool:
+    """
+    Whether requests may ask for profiling. Off unless PYLAFORM_PROFILING=1.
+    :return bool: Profiling is allowed.
+    """
+
+    return os.environ.get("PYLAFORM_PROFILING", "0") == "1"
+
+
+def directory() -> str:
+    """
+    Directory receiving saved profiles.
+    :return str: Profiles directory.
+    """
+
+    return os.environ.get("PYLAFORM_PROFILES", os.path.join(os.path.abspath(os.curdir), "data", "profiles"))
+
+
+class Sampler(threading.Thread):
+    """
+    Samples the stack of one thread into flamegraph-ready collapsed stacks.
+    :return None: None
+    """
+
+    def __init__(self, target: int, interval: float = 0.005) -> None:
+        super().__init__(name="pylaform-profile-sampler", daemon=True)
+        self.target: int = target
+        self.interval: float = interval
+        self.stacks: Counter[str] = Counter()
+        self.halt = threading.Event()
+
+    def run(self) -> None:
+        while not self.halt.wait(self.interval):
+            frame = sys._current_frames().get(self.target)
+            names: list[str] = []
+            while frame is not None:
+                code = frame.f_code
+                names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                frame = frame.f_back
+            if names:
+                self.stacks[";".join(reversed(names))] += 1
+
+    def stop(self) -> None:
+        """
+        Stop sampling.
+        :return None: None
+        """
+
+        self.halt.set()
+        self.join()
+
+
+class Profile:
+    """
+    cProfile, tracemalloc and stack sampling around one request or 'Generator.run()'.
+    Saved to the profiles directory as stats, a collapsed stack and peak memory per phase.
+    :return None: None
+    """
+
+    def __init__(self, name: str, output: str | None = None) -> None:
+        self.name: str = "".join(c if c.isalnum() or c in "-_." else "_" for c in name).strip("_") or "profile"
+        self.output: str = output or directory()
+        self.path: str = ""
+        self.profiler = cProfile.Profile()
+        self.sampler = Sampler(threading.get_ident())
+        self.phases: dict[str, dict[str, float]] = {}
+        self.stack: list[list] = []
+        self.carried: int = 0
+        self.started_tracemalloc: bool = False
+        self.start: float = 0.0
+        self.token = None
+
+    def __enter__(self) -> "Profile":
+        self.started_tracemalloc = not tracemalloc.is_tracing()
+        if self.started_tracemalloc:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        self.token = active.set(self)
+        self.start = time.perf_counter()
+        self.sampler.start()
+        self.profiler.enable()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.profiler.disable()
+        self.sampler.stop()
+        elapsed: float = time.perf_counter() - self.start
+        peak: int = max(tracemalloc.get_traced_memory()[1], self.carried)
+        if self.started_tracemalloc:
+            tracemalloc.stop()
+        active.reset(self.token)
+        self.save(elapsed, peak)
+
+    def enter_phase(self, name: str) -> None:
+        """
+        Start measuring a phase.
+        :param str name: Phase name.
+        :return None: None
+        """
+
+        # Remember the peak reached so far for the enclosing phase.
+        peak: int = tracemalloc.get_traced_memory()[1]
+        if self.stack:
+            self.stack[-1][1] = max(self.stack[-1][1], peak)
+        else:
+            self.carried = max(self.carried, peak)
+        self.stack.append([name, 0, time.perf_counter()])
+        tracemalloc.reset_peak()
+
+    def exit_phase(self) -> None:
+        """
+        Finish measuring the current phase.
+        :return None: None
+        """
+
+        name, carried, start = self.stack.pop()
+        peak: int = max(tracemalloc.get_traced_memory()[1], carried)
+        if self.stack:
+            self.stack[-1][1] = max(self.stack[-1][1], peak)
+        else:
+            self.carried = max(self.carried, peak)
+        phase: dict[str, float] = self.phases.setdefault(name, {"calls": 0, "seconds": 0.0, "peak_bytes": 0})
+        phase["calls"] += 1
+        phase["seconds"] += time.perf_counter() - start
+        phase["peak_bytes"] = max(phase["peak_bytes"], peak)
+
+    def save(self, elapsed: float, peak: int) -> None:
+        """
+        Write stats, collapsed stacks and memory report.
+        :param float elapsed: Profiled wall time in seconds.
+        :param int peak: Peak traced memory in bytes.
+        :return None: None
+        """
+
+        self.path = os.path.join(self.output, f"{datetime.now():%Y%m%d-%H%M%S-%f}-{self.name}")
+        os.makedirs(self.path, exist_ok=True)
+        self.profiler.dump_stats(os.path.join(self.path, "stats.prof"))
+        with open(os.path.join(self.path, "stats.txt"), "w") as file:
+            pstats.Stats(self.profiler, stream=file).sort_stats("cumulative").print_stats(50)
+        with open(os.path.join(self.path, "stacks.collapsed"), "w") as file:
+            for stack, count in self.sampler.stacks.most_common():
+                file.write(f"{stack} {count}\n")
+        with open(os.path.join(self.path, "memory.json"), "w") as file:
+            json.dump({"name": self.name, "seconds": elapsed, "peak_bytes": peak, "phases": self.phases}, file, indent=2)
+
+
+@contextmanager
+def profile(name: str, enabled: bool = True, output: str | None = None) -> Iterator[Profile | None]:
+    """
+    Profile the block when enabled and no other profile is running.
+    :param str name: Profile name.
+    :param bool enabled: Whether profiling was requested.
+    :param str | None output: Profiles directory, defaults to 'directory()'.
+    :return Iterator[Profile | None]: Running profile, or None when skipped.
+    """
+
+    if not enabled or not busy.acquire(blocking=False):
+        yield None
+        return
+    try:
+        with Profile(name, output) as running:
+            yield running
+    finally:
+        busy.release()
+
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+    """
+    Mark a phase of the running profile. Costs nothing when not profiling.
+    :param str name: Phase name.
+    :return Iterator[None]: Context manager.
+    """
+
+    running: Profile | None = active.get()
+    if running is None:
+        yield
+        return
+    running.enter_phase(name)
+    try:
+        yield
+    finally:
+        running.exit_phase()
+
+
+class ProfilingMiddleware:
+    """
+    WSGI middleware profiling requests that carry the 'X-Pylaform-Profile' header or '?profile=1'.
+    Requests are only honoured while profiling is allowed.
+    :return None: None
+    """
+
+    def __init__(self, wsgi_app: Callable) -> None:
+        self.wsgi_app: Callable = wsgi_app
+
+    def __call__(self, environ: dict, start_response: Callable) -> Iterable[bytes]:
+        requested: bool = allowed() and (
+            environ.get("HTTP_X_PYLAFORM_PROFILE", "") not in ("", "0")
+            or parse_qs(environ.get("QUERY_STRING", "")).get("profile", ["0"])[0] not in ("", "0"))
+        name: str = environ.get("REQUEST_METHOD", "GET") + environ.get("PATH_INFO", "/").replace("/", "-")
+        with profile(name, requested):
+            return self.wsgi_app(environ, start_response)
@@ -0,0 +1,234 @@
+import errno
+import os
+import random
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable
+
+from tenacity import RetryCallState, retry, stop_after_attempt, stop_after_delay
+
+from . import metrics
+from .admission import Rejected
+
+FAILURES = metrics.registry.counter(
+    "pylaform_failures_total", "Errors seen by retrying functions by function and kind.", ("function", "kind"))
+GIVE_UPS = metrics.registry.counter(
+    "pylaform_retry_give_ups_total", "Retrying functions that ran out of attempts.", ("function",))
+CIRCUIT_CHANGES = metrics.registry.counter(
+    "pylaform_circuit_changes_total", "Circuit breaker state changes by circuit and new state.", ("circuit", "state"))
+CIRCUIT_REJECTIONS = metrics.registry.counter(
+    "pylaform_circuit_rejections_total", "Calls refused by an open circuit breaker.", ("circuit",))
+
+ATTEMPTS: int = int(os.environ.get("PYLAFORM_RETRY_ATTEMPTS", 5))
+DEADLINE: float = float(os.environ.get("PYLAFORM_RETRY_DEADLINE", 10))
+
+# SQLite result codes worth waiting for, extended codes are reduced to their primary code.
+TRANSIENT_SQLITE: set[int] = {sqlite3.SQLITE_BUSY, sqlite3.SQLITE_LOCKED, sqlite3.SQLITE_IOERR}
+# Operating system errors that clear up by themselves.
+TRANSIENT_ERRNO: set[int] = {errno.EAGAIN, errno.EBUSY, errno.EINTR, errno.EIO, errno.ETIMEDOUT,
+                             errno.EMFILE, errno.ENFILE}
+
+
+def transient(error: BaseException) -> bool:
+    """
+    Sorts an error into transient (lock busy, I/O) or permanent (SQL error, LaTeX compile error, missing file).
+    Only transient errors are retried.
+    :param BaseException error: Raised error.
+    :return bool: True when trying again may succeed.
+    """
+
+    if isinstance(error, sqlite3.OperationalError):
+        code: int | None = getattr(error, "sqlite_errorcode", None)
+        if code is not None:
+            return code & 0xff in TRANSIENT_SQLITE
+        return "locked" in str(error) or "busy" in str(error)
+    if isinstance(error, sqlite3.Error):
+        return False
+    if isinstance(error, OSError):
+        return error.errno in TRANSIENT_ERRNO
+    return False
+
+
+def classify(retry_state: RetryCallState) -> bool:
+    """
+    Tenacity 'retry' predicate counting each error by kind before deciding.
+    :param RetryCallState retry_state: Tenacity call state.
+    :return bool: True when the call should be retried.
+    """
+
+    error: BaseException | None = retry_state.outcome.exception() if retry_state.outcome else None
+    if error is None:
+        return False
+    kind: str = "transient" if transient(error) else "permanent"
+    FAILURES.inc(function=getattr(retry_state.fn, "__qualname__", str(retry_state.fn)), kind=kind)
+    return kind == "transient"
+
+
+def give_up(retry_state: RetryCallState) -> None:
+    """
+    Tenacity 'retry_error_callback' counting exhausted retries, then raising the last error.
+    :param RetryCallState retry_state: Tenacity call state.
+    :return None: None
+    """
+
+    GIVE_UPS.inc(function=getattr(retry_state.fn, "__qualname__", str(retry_state.fn)))
+    raise retry_state.outcome.exception()
+
+
+def backoff(base: float = 0.05, cap: float = 2.0) -> Callable[[RetryCallState], float]:
+    """
+    Exponential backoff with full jitter, so waiting callers do not retry in lockstep.
+    :param float base: First delay in seconds.
+    :param float cap: Longest delay in seconds.
+    :return Callable: Tenacity 'wait' strategy.
+    """
+
+    def wait(retry_state: RetryCallState) -> float:
+        return random.uniform(0, min(cap, base * 2 ** (retry_state.attempt_number - 1)))
+
+    return wait
+
+
+def retrying(attempts: int = ATTEMPTS, deadline: float = DEADLINE, base: float = 0.05, cap: float = 2.0) -> Callable:
+    """
+    Retry decorator for transient errors, bounded by attempts and time. Permanent errors raise at once.
+    :param int attempts: Most calls in total.
+    :param float deadline: Seconds after which no new attempt starts.
+    :param float base: First delay in seconds, see 'backoff'.
+    :param float cap: Longest delay in seconds.
+    :return Callable: Decorator.
+    """
+
+    return retry(retry=classify,
+                 stop=stop_after_attempt(attempts) | stop_after_delay(deadline),
+                 wait=backoff(base, cap),
+                 before_sleep=metrics.count_retry,
+                 retry_error_callback=give_up)
+
+
+class CircuitOpen(Rejected):
+    """
+    Raised while a circuit breaker refuses calls, answered like other rejected compile work.
+    :return None: None
+    """
+
+
+class CircuitBreaker:
+    """
+    Stops calling a failing dependency. After 'threshold' consecutive failures the circuit opens
+    and calls fail fast for 'reset' seconds, then a single trial call decides whether it closes again.
+    Only errors 'trips' accepts count as failures, others are raised like a result of a working dependency.
+    A call is one failure however often it was retried inside, so wrap the retrying function.
+    :return None: None
+    """
+
+    def __init__(self, name: str, threshold: int = 3, reset: float = 30.0,
+                 trips: Callable[[Exception], bool] = lambda error: True) -> None:
+        self.name: str = name
+        self.trips: Callable[[Exception], bool] = trips
+        self.threshold: int = max(1, threshold)
+        self.reset: float = reset
+        self.lock = threading.Lock()
+        self.state: str = "closed"
+        self.failures: int = 0
+        self.opened: float = 0.0
+        self.trial: bool = False
+
+    def change(self, state: str) -> None:
+        """
+        Moves to a new state. Caller must hold the lock.
+        :param str state: One of 'closed', 'open', 'half-open'.
+        :return None: None
+        """
+
+        if state != self.state:
+            self.state = state
+            CIRCUIT_CHANGES.inc(circuit=self.name, state=state)
+
+    def before(self) -> None:
+        """
+        Admits a call or refuses it while open.
+        :return None: None
+        """
+
+        with self.lock:
+            if self.state == "open":
+                remaining: float = self.opened + self.reset - time.monotonic()
+                if remaining > 0:
+                    CIRCUIT_REJECTIONS.inc(circuit=self.name)
+                    raise CircuitOpen(f"{self.name} is failing, not trying again yet.", max(1, int(remaining) + 1))
+                self.change("half-open")
+            if self.state == "half-open":
+                # One trial at a time, everyone else keeps failing fast.
+                if self.trial:
+                    CIRCUIT_REJECTIONS.inc(circuit=self.name)
+                    raise CircuitOpen(f"{self.name} is being tried again.", max(1, int(self.reset)))
+                self.trial = True
+
+    def after(self, ok: bool) -> None:
+        """
+        Records the result of an admitted call.
+        :param bool ok: Whether the call succeeded.
+        :return None: None
+        """
+
+        with self.lock:
+            self.trial = False
+            if ok:
+                self.failures = 0
+                self.change("closed")
+                return
+            self.failures += 1
+            if self.state == "half-open" or self.failures >= self.threshold:
+                self.opened = time.monotonic()
+                self.change("open")
+
+    def call(self, func: Callable, *args, **kwargs):
+        """
+        Calls through the breaker.
+        :param Callable func: Protected call.
+        :param args: Positional arguments.
+        :param kwargs: Keyword arguments.
+        :return: Result of the call.
+        """
+
+        self.before()
+        try:
+            result = func(*args, **kwargs)
+        except Exception as e:
+            self.after(not self.trips(e))
+            raise
+        except BaseException:
+            # Interrupts say nothing about the dependency, only free the trial.
+            with self.lock:
+                self.trial = False
+            raise
+        self.after(True)
+        return result
+
+
+# Breakers by name, shared across requests, least recently used first.
+breakers: OrderedDict[str, CircuitBreaker] = OrderedDict()
+opening = threading.Lock()
+# Most breakers kept, one per template and profile, dropping the least recently used beyond it.
+CAPACITY: int = int(os.environ.get("PYLAFORM_CIRCUIT_CAPACITY", 1024))
+
+
+def breaker(name: str, trips: Callable[[Exception], bool] = lambda error: True) -> CircuitBreaker:
+    """
+    Returns the named circuit breaker, see 'PYLAFORM_CIRCUIT_THRESHOLD', 'PYLAFORM_CIRCUIT_RESET' and 'CAPACITY'.
+    :param str name: Protected dependency, e.g. 'latex.hybrid'.
+    :param Callable trips: Errors counted as failures of the dependency, used when the breaker is created.
+    :return CircuitBreaker: Shared breaker.
+    """
+
+    with opening:
+        if name not in breakers:
+            breakers[name] = CircuitBreaker(name, int(os.environ.get("PYLAFORM_CIRCUIT_THRESHOLD", 3)),
+                                            float(os.environ.get("PYLAFORM_CIRCUIT_RESET", 30)), trips)
+            while len(breakers) > max(1, CAPACITY):
+                breakers.popitem(last=False)
+        breakers.move_to_end(name)
+        return breakers[name]
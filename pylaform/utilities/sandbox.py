@@ -0,0 +1,207 @@
+import errno
+import os
+import re
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+
+from pylatex import Document
+from pylatex.errors import CompilerError
+
+from . import metrics, resilience
+
+try:
+    import resource
+except ImportError:  # Not on POSIX, compiles run without rlimits.
+    resource = None
+
+LATEX_TIMEOUTS = metrics.registry.counter(
+    "pylaform_latex_timeouts_total", "LaTeX compiles stopped at the wall-clock timeout by template.", ("template",))
+LATEX_KILLS = metrics.registry.counter(
+    "pylaform_latex_kills_total", "LaTeX compiles ended by a signal by template and signal.", ("template", "signal"))
+LATEX_PASSES = metrics.registry.counter(
+    "pylaform_latex_passes_total", "LaTeX engine passes of successful compiles by template.", ("template",))
+
+# Compilers tried in order, like PyLaTeX's 'generate_pdf'.
+COMPILERS: tuple[tuple[str, ...], ...] = (("latexmk", "--pdf"), ("pdflatex",))
+# Auxiliary files removed after a successful compile.
+EXTENSIONS: tuple[str, ...] = ("aux", "log", "out", "fls", "fdb_latexmk")
+# Line latexmk prints before each engine pass.
+PASS = re.compile(rb"Run number \d+ of rule '(?:pdf|xe|lua)?latex'")
+
+
+def setting(name: str, default: int) -> int:
+    """
+    Reads an integer limit from the environment.
+    :param str name: Environment variable.
+    :param int default: Value when unset.
+    :return int: Limit.
+    """
+
+    return int(os.environ.get(name, default))
+
+
+# Applies the rlimits given as arguments, then replaces itself with the compiler. Runs in a fresh interpreter,
+# unlike 'preexec_fn' it is safe while other threads of the app hold locks.
+LIMITS: str = """
+import os, resource, signal, sys
+cpu, memory, output = map(int, sys.argv[1:4])
+# Python ignores these and exec keeps ignored signals, the compiler gets the defaults like with subprocess.
+signal.signal(signal.SIGPIPE, signal.SIG_DFL)
+signal.signal(signal.SIGXFSZ, signal.SIG_DFL)
+resource.setrlimit(resource.RLIMIT_CPU, (cpu, cpu + 1))
+resource.setrlimit(resource.RLIMIT_AS, (memory, memory))
+resource.setrlimit(resource.RLIMIT_FSIZE, (output, output))
+os.execv(sys.argv[4], sys.argv[4:])
+"""
+
+
+def limits(command: list[str], cpu: int, memory: int, output: int) -> list[str]:
+    """
+    Wraps a compiler command line so rlimits apply before it starts.
+    :param list[str] command: Compiler command line.
+    :param int cpu: CPU seconds, SIGXCPU at the limit and SIGKILL a second later.
+    :param int memory: Address space in bytes.
+    :param int output: Largest file the compiler may write in bytes, bounding the captured log too.
+    :return list[str]: Command line to run, unchanged without rlimit support.
+    """
+
+    # Resolved here, so a missing compiler still raises FileNotFoundError and the next one is tried.
+    executable: str | None = shutil.which(command[0])
+    if executable is None:
+        raise FileNotFoundError(errno.ENOENT, os.strerror(errno.ENOENT), command[0])
+    if resource is None:
+        return [executable, *command[1:]]
+    return [sys.executable, "-I", "-c", LIMITS, str(cpu), str(memory), str(output), executable, *command[1:]]
+
+
+def tail(log, size: int) -> str:
+    """
+    Reads the end of a captured log.
+    :param log: Binary file holding the compiler output.
+    :param int size: Most bytes kept.
+    :return str: Decoded end of the log.
+    """
+
+    log.seek(0, os.SEEK_END)
+    log.seek(max(0, log.tell() - size))
+    return log.read().decode(errors="replace")
+
+
+def passes(log, command: list[str]) -> int:
+    """
+    Counts the engine passes of a finished compile, latexmk reruns pdflatex until references settle.
+    :param log: Binary file holding the compiler output.
+    :param list[str] command: Compiler command line.
+    :return int: Passes, 1 for a plain engine run.
+    """
+
+    if os.path.basename(command[0]) != "latexmk":
+        return 1
+    log.seek(0)
+    return sum(1 for line in log if PASS.search(line))
+
+
+def kill(process: subprocess.Popen) -> None:
+    """
+    Kills a compiler and every process it started, e.g. pdflatex runs of latexmk.
+    :param subprocess.Popen process: Compiler started in its own session.
+    :return None: None
+    """
+
+    try:
+        if resource is not None:
+            os.killpg(process.pid, signal.SIGKILL)
+        else:
+            process.kill()
+    except ProcessLookupError:
+        pass
+    process.wait()
+
+
+def run(command: list[str], cwd: str, template: str) -> str:
+    """
+    Runs one compiler with a wall-clock timeout and rlimits, see 'PYLAFORM_LATEX_*'.
+    :param list[str] command: Compiler command line.
+    :param str cwd: Working directory.
+    :param str template: Template name for metrics.
+    :return str: End of the compiler output.
+    """
+
+    timeout: int = setting("PYLAFORM_LATEX_TIMEOUT", 60)
+    size: int = setting("PYLAFORM_LATEX_LOG", 64 * 1024)
+    wrapped: list[str] = limits(command, setting("PYLAFORM_LATEX_CPU", 30),
+                                setting("PYLAFORM_LATEX_MEMORY", 1024) * 1024 * 1024,
+                                setting("PYLAFORM_LATEX_OUTPUT", 64) * 1024 * 1024)
+    with tempfile.TemporaryFile() as log:
+        process = subprocess.Popen(wrapped, cwd=cwd, stdin=subprocess.DEVNULL, stdout=log, stderr=subprocess.STDOUT,
+                                   start_new_session=resource is not None)
+        try:
+            code: int = process.wait(timeout)
+        except subprocess.TimeoutExpired as e:
+            kill(process)
+            LATEX_TIMEOUTS.inc(template=template)
+            LATEX_KILLS.inc(template=template, signal=signal.SIGKILL.name)
+            e.output = tail(log, size)
+            raise
+        except BaseException:
+            kill(process)
+            raise
+        output: str = tail(log, size)
+        if code == 0:
+            LATEX_PASSES.inc(passes(log, command), template=template)
+    if code < 0:
+        LATEX_KILLS.inc(template=template, signal=signal.Signals(-code).name)
+    if code != 0:
+        print(f"Error compiling {template}: {output}")
+        raise subprocess.CalledProcessError(code, command, output)
+    return output
+
+
+def unhealthy(error: Exception) -> bool:
+    """
+    Circuit breaker predicate for compiles: whether an error means the compiler is failing rather than the document.
+    Timeouts, compilers killed by a signal or an rlimit, a missing compiler and transient errors left after retries
+    trip the breaker. A LaTeX error in the document, a non-zero exit, does not, retrying it would fail the same way.
+    :param Exception error: Error raised by 'compile_pdf'.
+    :return bool: True when the error counts against the compiler.
+    """
+
+    if isinstance(error, subprocess.TimeoutExpired | CompilerError):
+        return True
+    if isinstance(error, subprocess.CalledProcessError):
+        return error.returncode < 0
+    return resilience.transient(error)
+
+
+def compile_pdf(doc: Document, filepath: str, template: str) -> None:
+    """
+    Writes 'filepath.tex' and compiles it to 'filepath.pdf' in a sandboxed compiler, keeping the .tex.
+    :param Document doc: Document to compile.
+    :param str filepath: Output path without extension.
+    :param str template: Template name for metrics.
+    :return None: None
+    """
+
+    filepath = os.path.abspath(filepath)
+    directory: str = os.path.dirname(filepath)
+    doc.generate_tex(filepath)
+    for compiler in COMPILERS:
+        try:
+            run([*compiler, "--interaction=nonstopmode", "-no-shell-escape", filepath + ".tex"], directory, template)
+        except FileNotFoundError:
+            # Compiler not installed, try the next one.
+            continue
+        break
+    else:
+        raise CompilerError("No LaTex compiler was found\n"
+                            "Either specify a LaTex compiler or make sure you have latexmk or pdfLaTex installed.")
+
+    for extension in EXTENSIONS:
+        try:
+            os.remove(f"{filepath}.{extension}")
+        except OSError as e:
+            if e.errno != errno.ENOENT:
+                raise
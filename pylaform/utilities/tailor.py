@@ -0,0 +1,176 @@
+import math
+import os
+import re
+import threading
+from collections import Counter, OrderedDict
+
+from ..commands.db import connect
+from ..commands.db.query import Get
+from . import metrics
+
+try:
+    import numpy
+except ImportError:  # Optional, ranking falls back to sparse dictionaries.
+    numpy = None
+
+# Cached lists ranked against a job description, with the database table and the columns read per row.
+SOURCES: dict[str, tuple[str, tuple[str, ...]]] = {
+    "achievements": ("achievement", ("shortdesc", "longdesc")),
+    "skills": ("skill", ("shortdesc", "longdesc", "category", "subcategory")),
+}
+
+# Words too common in job descriptions to say anything about relevance.
+STOPWORDS: frozenset[str] = frozenset((
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "in", "is", "it", "of", "on", "or", "our",
+    "that", "the", "this", "to", "we", "will", "with", "you", "your"))
+
+WORD = re.compile(r"[a-z0-9][a-z0-9+#]*")
+
+# Indexes by database file, with the table versions they were built from, least recently used first.
+indexes: OrderedDict[str, tuple[tuple[int, ...], "Index"]] = OrderedDict()
+building = threading.Lock()
+# Most indexes kept, as many as open profiles in the tenant cache.
+CAPACITY: int = int(os.environ.get("PYLAFORM_TENANT_CACHE", 128))
+
+
+def tokens(text: str | None) -> list[str]:
+    """
+    Splits text into lower case terms, dropping stopwords and single characters.
+    :param str | None text: Any text.
+    :return list[str]: Terms in order.
+    """
+
+    return [word for word in WORD.findall((text or "").lower()) if len(word) > 1 and word not in STOPWORDS]
+
+
+class Index:
+    """
+    TF-IDF vectors of the achievements and skills of one content version, L2-normalised so a dot product is
+    the cosine. With NumPy the vectors are kept as flat sparse arrays and every row is scored at once.
+    :return None: None
+    """
+
+    def __init__(self, documents: list[tuple[str, int, str]]) -> None:
+        self.keys: list[tuple[str, int]] = [(source, row_id) for source, row_id, _ in documents]
+        counts: list[Counter[str]] = [Counter(tokens(text)) for _, _, text in documents]
+        frequency: Counter[str] = Counter(term for count in counts for term in count)
+        self.terms: dict[str, int] = {term: i for i, term in enumerate(sorted(frequency))}
+        # Smoothed inverse document frequency, terms in every row still weigh a little.
+        total: int = len(documents)
+        self.idf: list[float] = [math.log((1 + total) / (1 + frequency[term])) + 1 for term in sorted(frequency)]
+        self.vectors: list[dict[int, float]] = [self.vector(count) for count in counts]
+
+        if numpy is not None:
+            rows: list[int] = [row for row, vector in enumerate(self.vectors) for _ in vector]
+            self.rows = numpy.array(rows, dtype=numpy.int32)
+            self.indices = numpy.array([term for vector in self.vectors for term in vector], dtype=numpy.int32)
+            self.data = numpy.array([weight for vector in self.vectors for weight in vector.values()],
+                                    dtype=numpy.float32)
+
+    def vector(self, count: Counter[str]) -> dict[int, float]:
+        """
+        Weighs term counts by inverse document frequency and normalises them, unknown terms are dropped.
+        :param Counter[str] count: Term counts.
+        :return dict[int, float]: Weight per term index.
+        """
+
+        weights: dict[int, float] = {self.terms[term]: n * self.idf[self.terms[term]]
+                                     for term, n in count.items() if term in self.terms}
+        norm: float = math.sqrt(sum(weight * weight for weight in weights.values()))
+        return {term: weight / norm for term, weight in weights.items()} if norm else {}
+
+    def scores(self, text: str) -> list[float]:
+        """
+        Cosine similarity of every row with a text.
+        :param str text: Job description.
+        :return list[float]: Score per row, in 'keys' order, a NumPy array when available.
+        """
+
+        query: dict[int, float] = self.vector(Counter(tokens(text)))
+        if numpy is not None:
+            dense = numpy.zeros(len(self.terms), dtype=numpy.float32)
+            dense[list(query)] = list(query.values())
+            return numpy.bincount(self.rows, weights=self.data * dense[self.indices], minlength=len(self.keys))
+        return [sum(weight * query.get(term, 0.0) for term, weight in vector.items()) for vector in self.vectors]
+
+    def rank(self, text: str, limits: dict[str, int]) -> dict[str, list[tuple[int, float]]]:
+        """
+        Best matching rows per list.
+        :param str text: Job description.
+        :param dict[str, int] limits: Most rows kept per list, e.g. {'achievements': 12}.
+        :return dict[str, list[tuple[int, float]]]: Row id and score per list, best first, without zero scores.
+        """
+
+        scores = self.scores(text)
+        if numpy is not None:
+            order = numpy.argsort(-scores, kind="stable").tolist()
+        else:
+            order = sorted(range(len(scores)), key=lambda row: -scores[row])
+        ranked: dict[str, list[tuple[int, float]]] = {source: [] for source in limits}
+        missing: int = sum(limits.values())
+        for row in order:
+            score: float = float(scores[row])
+            if score <= 0 or missing == 0:
+                break
+            source, row_id = self.keys[row]
+            if len(ranked.get(source, ())) < limits.get(source, 0):
+                ranked[source].append((row_id, score))
+                missing -= 1
+        return ranked
+
+
+def index(queries: Get) -> Index:
+    """
+    Returns the index of the shown achievements and skills, built once per content version.
+    :param Get queries: Queries of the profile.
+    :return Index: Shared index.
+    """
+
+    version: tuple[int, ...] = tuple(value for source in SOURCES for value in queries.version(source))
+    with building:
+        database: str = connect.path(queries.tenant)
+        cached: tuple[tuple[int, ...], Index] | None = indexes.get(database)
+        metrics.cache_lookup("tailor", cached is not None and cached[0] == version)
+        if cached is not None and cached[0] == version:
+            indexes.move_to_end(database)
+            return cached[1]
+        documents: list[tuple[str, int, str]] = []
+        for source, (table, columns) in SOURCES.items():
+            # Hidden rows stay hidden, tailoring only picks among the shown ones.
+            for row_id, row in queries.rows(table).items():
+                if not row["state"]:
+                    continue
+                documents.append((source, row_id, " ".join(str(row[column] or "") for column in columns)))
+        built: Index = Index(documents)
+        indexes[database] = (version, built)
+        indexes.move_to_end(database)
+        while len(indexes) > max(1, CAPACITY):
+            indexes.popitem(last=False)
+        return built
+
+
+def tailor(queries: Get, text: str, achievements: int = 12, skills: int = 15) -> dict[str, list[tuple[int, float]]]:
+    """
+    Ranks achievements and skills against a job description.
+    :param Get queries: Queries of the profile.
+    :param str text: Job description.
+    :param int achievements: Most achievements kept.
+    :param int skills: Most skills kept.
+    :return dict[str, list[tuple[int, float]]]: Row id and score per list, best first.
+    """
+
+    limits: dict[str, int] = {"achievements": achievements, "skills": skills}
+    if not tokens(text):
+        return {source: [] for source in limits}
+    return index(queries).rank(text, limits)
+
+
+def selection(ranked: dict[str, list[tuple[int, float]]]) -> dict[str, set[int]]:
+    """
+    Turns a ranking into the row ids kept by a tailored render, see 'Get.selection'.
+    A list without any match is left out and rendered in full, an empty set would drop every row.
+    :param dict[str, list[tuple[int, float]]] ranked: Result of 'tailor'.
+    :return dict[str, set[int]]: Row ids per cached list.
+    """
+
+    return {source: {row_id for row_id, _ in rows} for source, rows in ranked.items() if rows}
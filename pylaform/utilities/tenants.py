@@ -0,0 +1,158 @@
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+from . import metrics
+from .views import ViewCache
+from ..commands.db.query import Get
+from ..commands.db.update import Post
+
+OPENED = metrics.registry.counter(
+    "pylaform_tenants_opened_total", "Profiles opened into the tenant cache.", ())
+EVICTED = metrics.registry.counter(
+    "pylaform_tenants_evicted_total", "Profiles dropped from the tenant cache by reason.", ("reason",))
+
+
+class Tenant:
+    """
+    Open connections, caches and rendered views of one profile.
+    :return None: None
+    """
+
+    def __init__(self, name: str, render_html: bool = True) -> None:
+        self.name: str = name
+        self.query = Get(name)
+        self.update = Post(name)
+        self.views = ViewCache(render_html)
+        self.leases: int = 0
+        self.used: float = time.monotonic()
+        self.evicted: bool = False
+
+    def close(self) -> None:
+        """
+        Closes the connections of the profile, the writer once its queued mutations ran.
+        :return None: None
+        """
+
+        self.update.close()
+        self.query.close()
+
+
+class Tenants:
+    """
+    Bounded LRU cache of open profiles with idle eviction.
+    Profiles are opened outside the lock, requests for the same profile wait for the one opening it.
+    Profiles still held by a request when evicted are closed once released.
+    :return None: None
+    """
+
+    def __init__(self, capacity: int = 128, idle: float = 300.0, render_html: bool = True) -> None:
+        self.capacity: int = max(1, capacity)
+        self.idle: float = idle
+        self.render_html: bool = render_html
+        self.open: OrderedDict[str, Tenant] = OrderedDict()
+        self.opening: dict[str, Future] = {}
+        self.lock = threading.Lock()
+
+    def acquire(self, name: str) -> Tenant:
+        """
+        Hold a profile for the duration of a request, opening it if needed.
+        :param str name: Profile name, see 'connect.valid'.
+        :return Tenant: Open profile, hand back through 'release'.
+        """
+
+        while True:
+            with self.lock:
+                tenant: Tenant | None = self.open.get(name)
+                pending: Future | None = self.opening.get(name)
+                if tenant is None and pending is None:
+                    pending = self.opening[name] = Future()
+                    break
+                if tenant is not None:
+                    closing: list[Tenant] = self.lease(tenant)
+            if tenant is not None:
+                for stale in closing:
+                    stale.close()
+                return tenant
+            # Opened by another request, look again once it is published.
+            pending.result()
+
+        try:
+            # Copying, migrating and connecting may take seconds, other profiles keep being served.
+            tenant = Tenant(name, self.render_html)
+        except BaseException as e:
+            with self.lock:
+                del self.opening[name]
+            pending.set_exception(e)
+            raise
+        with self.lock:
+            del self.opening[name]
+            self.open[name] = tenant
+            OPENED.inc()
+            closing = self.lease(tenant)
+        pending.set_result(tenant)
+        for stale in closing:
+            stale.close()
+        return tenant
+
+    def lease(self, tenant: Tenant) -> list[Tenant]:
+        """
+        Hold an open profile for a request and evict others. Call with the lock held.
+        :param Tenant tenant: Profile in the cache.
+        :return list[Tenant]: Dropped profiles nobody holds, to close outside the lock.
+        """
+
+        self.open.move_to_end(tenant.name)
+        tenant.leases += 1
+        tenant.used = time.monotonic()
+        return self.evict()
+
+    def release(self, tenant: Tenant) -> None:
+        """
+        Hand back a profile held by 'acquire'.
+        :param Tenant tenant: Profile to release.
+        :return None: None
+        """
+
+        with self.lock:
+            tenant.leases -= 1
+            tenant.used = time.monotonic()
+            if not tenant.evicted:
+                self.open.move_to_end(tenant.name)
+            closing: bool = tenant.evicted and tenant.leases == 0
+        if closing:
+            tenant.close()
+
+    def evict(self) -> list[Tenant]:
+        """
+        Drop idle profiles and the least recently used ones beyond capacity. Call with the lock held.
+        :return list[Tenant]: Dropped profiles nobody holds, to close outside the lock.
+        """
+
+        now: float = time.monotonic()
+        dropped: list[Tenant] = []
+        while self.open:
+            name, tenant = next(iter(self.open.items()))
+            if len(self.open) > self.capacity:
+                EVICTED.inc(reason="capacity")
+            elif tenant.leases == 0 and now - tenant.used >= self.idle:
+                EVICTED.inc(reason="idle")
+            else:
+                break
+            del self.open[name]
+            tenant.evicted = True
+            if tenant.leases == 0:
+                dropped.append(tenant)
+        return dropped
+
+    def sweep(self) -> None:
+        """
+        Close idle profiles without opening one.
+        :return None: None
+        """
+
+        with self.lock:
+            closing: list[Tenant] = self.evict()
+        for stale in closing:
+            stale.close()
@@ -0,0 +1,71 @@
+import threading
+from typing import Callable
+
+from . import metrics
+
+
+class ViewCache:
+    """
+    Caches prepared template contexts, and optionally rendered pages, per table version.
+    Entries are replaced as soon as the version of their table moves on.
+    :return None: None
+    """
+
+    def __init__(self, render_html: bool = True) -> None:
+        self.render_html: bool = render_html
+        self.contexts: dict[str, tuple[tuple[int, ...], dict]] = {}
+        self.pages: dict[str, tuple[tuple[int, ...], str]] = {}
+        self.lock = threading.Lock()
+
+    def context(self, table: str, version: tuple[int, ...], build: Callable[[], dict]) -> dict:
+        """
+        Return the template context of a table, building it only when its version changed.
+        :param str table: Name of the cached table.
+        :param tuple[int, ...] version: Current version of the table.
+        :param Callable build: Builds the template context, usually through 'fatten'.
+        :return dict: Payload passed to templates.
+        """
+
+        with self.lock:
+            cached = self.contexts.get(table)
+        metrics.cache_lookup("view_context", cached is not None and cached[0] == version)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+
+        result: dict = build()
+        with self.lock:
+            self.contexts[table] = (version, result)
+        return result
+
+    def page(self, template: str, version: tuple[int, ...], build: Callable[[], str]) -> str:
+        """
+        Return the rendered HTML of a template, rendering it only when its version changed.
+        :param str template: Name of the template.
+        :param tuple[int, ...] version: Current version of the table feeding the template.
+        :param Callable build: Renders the template.
+        :return str: Rendered HTML.
+        """
+
+        if not self.render_html:
+            return build()
+
+        with self.lock:
+            cached = self.pages.get(template)
+        metrics.cache_lookup("view_page", cached is not None and cached[0] == version)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+
+        result: str = build()
+        with self.lock:
+            self.pages[template] = (version, result)
+        return result
+
+    def clear(self) -> None:
+        """
+        Drops every cached context and page.
+        :return None: None
+        """
+
+        with self.lock:
+            self.contexts = {}
+            self.pages = {}
@@ -3,10 +3,11 @@ from setuptools import setup
 setup(
     name='pylaform',
     version='0.0.1',
-    packages=['pylaform', 'pylaform.commands', 'pylaform.templates', 'pylaform.utilities'],
+    packages=['pylaform', 'pylaform.benchmarks', 'pylaform.commands', 'pylaform.templates', 'pylaform.utilities'],
     url='https://github.com/celestium-life/pylaform',
     license='MIT',
     author='Celes Hillyerd',
     author_email='celes@celestium.life',
-    description='This package is designed to help build resumes for you from a central source'
+    description='This package is designed to help build resumes for you from a central source',
+    extras_require={'test': ['pytest']}
 )
@@ -0,0 +1,55 @@
+import sqlite3
+
+import pytest
+
+import app
+from pylaform.benchmarks import synthetic
+from pylaform.utilities.tenants import Tenants
+
+
+@pytest.fixture
+def database(tmp_path, monkeypatch) -> str:
+    """
+    Synthetic resume database serving the default profile, with other profiles and data files under 'tmp_path'.
+    :return str: Database file.
+    """
+
+    path: str = str(tmp_path / "resume.db")
+    synthetic.build(path, employers=4)
+    monkeypatch.setenv("PYLAFORM_DB", path)
+    monkeypatch.setenv("PYLAFORM_TENANTS", str(tmp_path / "tenants"))
+    monkeypatch.delenv("PYLAFORM_HOT_COPY", raising=False)
+    monkeypatch.chdir(tmp_path)
+    return path
+
+
+@pytest.fixture
+def client(database, monkeypatch):
+    """
+    Test client of the web app serving the synthetic database.
+    :return FlaskClient: Client.
+    """
+
+    # Profiles opened by earlier tests point at their own databases.
+    opened: Tenants = Tenants()
+    monkeypatch.setattr(app, "tenants", opened)
+    yield app.app.test_client()
+    for tenant in list(opened.open.values()):
+        tenant.close()
+
+
+def count(path: str, table: str, where: str = "1", parameters: tuple = ()) -> int:
+    """
+    Counts rows straight from the file, past every cache.
+    :param str path: Database file.
+    :param str table: Table name.
+    :param str where: Condition.
+    :param tuple parameters: Condition parameters.
+    :return int: Matching rows.
+    """
+
+    conn: sqlite3.Connection = sqlite3.connect(path)
+    try:
+        return conn.execute(f"SELECT COUNT(*) FROM `{table}` WHERE {where}", parameters).fetchone()[0]
+    finally:
+        conn.close()
@@ -0,0 +1,67 @@
+import sqlite3
+
+import pytest
+
+from pylaform.commands.db import statements
+from pylaform.commands.db.delete import Delete
+from pylaform.commands.db.query import Get
+from .conftest import count
+
+
+@pytest.fixture
+def remover(database):
+    opened: Delete = Delete()
+    yield opened
+    opened.writer.close()
+
+
+@pytest.mark.parametrize("chunk", [statements.CHUNK, 2])
+def test_employer_delete_cascades(remover, database, monkeypatch, chunk):
+    monkeypatch.setattr(statements, "CHUNK", chunk)
+    employer: int = sqlite3.connect(database).execute("SELECT MIN(`id`) FROM `employer`").fetchone()[0]
+    others: dict[str, int] = {table: count(database, table, "`employer` != ?", (employer,))
+                              for table in ("position", "achievement", "skill")}
+    assert count(database, "position", "`employer` = ?", (employer,)) > 0
+
+    changes: dict = remover.delete_rows("employer", [employer])
+
+    assert count(database, "employer", "`id` = ?", (employer,)) == 0
+    for table in ("position", "achievement", "skill"):
+        assert count(database, table, "`employer` = ?", (employer,)) == 0
+        assert count(database, table, "`employer` != ?", (employer,)) == others[table]
+    assert count(database, "achievement", "`position` NOT IN (SELECT `id` FROM `position`)") == 0
+    assert changes["deleted"] > 0
+
+
+def test_chunks_stay_below_the_variable_limit():
+    values: range = range(40000)
+    chunks: list[tuple] = list(statements.chunks(values))
+
+    assert [value for chunk in chunks for value in chunk] == list(values)
+    for chunk in chunks:
+        text, bound = statements.template("delete", "glossary", values=chunk)
+        assert len(bound) <= 32766 and text.count("?") == len(bound)
+    with pytest.raises(ValueError):
+        statements.template("delete", "glossary", values=tuple(values))
+
+
+def test_large_cascade_plan_and_lookup(remover, database):
+    conn = sqlite3.connect(database)
+    conn.executemany("INSERT INTO `employer` (`employer`, `location`, `state`) VALUES (?, '', 1)",
+                     [(f"bulk {i}",) for i in range(20000)])
+    conn.commit()
+    ids: list[int] = [row[0] for row in conn.execute("SELECT `id` FROM `employer` WHERE `employer` LIKE 'bulk %'")]
+    conn.close()
+
+    # SQLite's default limit, some builds allow more.
+    remover.conn.setlimit(sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER, 32766)
+    plan: dict[str, set[int]] = remover.writer.submit(remover.plan, "employer", ids).result(30)
+    assert plan["employer"] == set(ids)
+
+    queries = Get()
+    queries.conn.setlimit(sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER, 32766)
+    try:
+        resolved: dict[str, int] = queries.resolve_ids("employer", [f"bulk {i}" for i in range(20000)])
+    finally:
+        queries.close()
+    assert sorted(resolved.values()) == sorted(ids)
@@ -0,0 +1,105 @@
+import sqlite3
+
+import pytest
+
+from pylaform.benchmarks.suite import form_data
+from pylaform.commands.db import query, trace
+from pylaform.commands.db.query import Get
+from pylaform.commands.db.update import Post
+
+
+@pytest.fixture
+def get(database):
+    opened: Get = Get()
+    yield opened
+    opened.close()
+
+
+def load(get: Get) -> None:
+    for cache in query.CACHES:
+        getattr(get, "get_" + cache)()
+
+
+def counted(func, *args) -> tuple:
+    """
+    Calls 'func' collecting a change summary, as inside a write.
+    """
+
+    changes: dict = trace.summary()
+    token = trace.written.set(changes)
+    try:
+        return func(*args), changes
+    finally:
+        trace.written.reset(token)
+
+
+def test_every_table_feeds_a_known_cache():
+    assert {cache for caches in query.DEPENDENCIES.values() for cache in caches} == set(query.CACHES)
+    assert query.SOURCES["positions"] == ("employer", "position")
+
+
+def test_invalidate_purges_dependent_caches_only(get):
+    load(get)
+    assert get.invalidate("employer") == 3
+    assert get.result_positions == get.result_achievements == get.result_skills == []
+    for cache in ("certifications", "education", "identification", "glossary", "summary"):
+        assert getattr(get, "result_" + cache), cache
+
+
+def test_invalidate_drops_row_and_name_caches(get):
+    get.rows("employer")
+    get.resolve_ids("employer", ["missing"])
+    get.rows("glossary")
+    get.invalidate("employer")
+    assert "employer" not in get.result_rows and "employer" not in get.result_ids
+    assert "glossary" in get.result_rows
+
+
+def test_writes_of_other_connections_reload_dependent_caches(get, database):
+    load(get)
+    glossary: list[dict] = get.result_glossary
+    conn: sqlite3.Connection = sqlite3.connect(database)
+    with conn:
+        conn.execute("UPDATE `employer` SET `employer` = 'Renamed' WHERE `id` = (SELECT MIN(`id`) FROM `employer`)")
+    conn.close()
+
+    assert "Renamed" in [item["value"] for item in get.get_positions()]
+    assert get.get_glossary() is glossary
+
+
+def test_names_resolve_in_one_query(get):
+    employers: dict[str, int] = {str(name): int(row_id) for row_id, name in get.query(
+        "SELECT `id`, `employer` FROM `employer`")}
+    names: list[str] = list(employers) + ["missing"] + list(employers)
+    resolved, changes = counted(get.resolve_ids, "employer", names)
+    assert resolved == {**employers, "missing": 0}
+    assert changes["lookups"] == len(employers) + 1 and changes["lookup_queries"] == 1
+
+    resolved, changes = counted(get.resolve_ids, "employer", names)
+    assert changes["lookup_queries"] == 0
+    assert get.query_id(next(iter(employers)), "employer") == employers[next(iter(employers))]
+
+
+def test_name_cache_follows_inserts(get, database):
+    get.resolve_ids("employer", ["New"])
+    get.remember_id("employer", "New", 99)
+    resolved, changes = counted(get.resolve_ids, "employer", ["New"])
+    assert resolved == {"New": 99} and changes["lookup_queries"] == 0
+    get.forget_ids("employer")
+    assert get.resolve_ids("employer", ["New"]) == {"New": 0}
+
+
+def test_unknown_tables_are_refused(get):
+    with pytest.raises(ValueError):
+        get.resolve_ids("glossary", ["term"])
+
+
+def test_posted_names_are_prefetched(database):
+    data = form_data(Get().get_achievements())
+    post: Post = Post()
+    try:
+        changes: dict = post.submit("achievements", data).result(10)
+    finally:
+        post.close()
+    # One query per named table however many rows name them.
+    assert changes["lookups"] > 2 and changes["lookup_queries"] <= 2
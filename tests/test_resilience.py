@@ -0,0 +1,81 @@
+import subprocess
+
+import pytest
+from pylatex.errors import CompilerError
+
+from pylaform.utilities import resilience, sandbox
+from pylaform.utilities.resilience import CircuitBreaker, CircuitOpen
+
+
+def raising(error: BaseException):
+    """
+    Returns a call raising 'error'.
+    """
+
+    def call():
+        raise error
+
+    return call
+
+
+def test_compiler_failures_trip_the_breaker():
+    assert sandbox.unhealthy(subprocess.TimeoutExpired(["pdflatex"], 30))
+    assert sandbox.unhealthy(subprocess.CalledProcessError(-9, ["pdflatex"]))
+    assert sandbox.unhealthy(CompilerError("No LaTex compiler was found"))
+    assert sandbox.unhealthy(OSError(5, "I/O error"))
+
+
+def test_document_errors_do_not_trip_the_breaker():
+    assert not sandbox.unhealthy(subprocess.CalledProcessError(1, ["pdflatex"]))
+    assert not sandbox.unhealthy(FileNotFoundError(2, "missing"))
+    assert not sandbox.unhealthy(ValueError("bad"))
+
+
+def test_breaker_opens_on_tripping_errors_only():
+    circuit = CircuitBreaker("test", threshold=2, reset=60, trips=sandbox.unhealthy)
+    for _ in range(5):
+        with pytest.raises(subprocess.CalledProcessError):
+            circuit.call(raising(subprocess.CalledProcessError(1, ["pdflatex"])))
+    assert circuit.state == "closed"
+
+    for _ in range(2):
+        with pytest.raises(subprocess.TimeoutExpired):
+            circuit.call(raising(subprocess.TimeoutExpired(["pdflatex"], 30)))
+    assert circuit.state == "open"
+    with pytest.raises(CircuitOpen):
+        circuit.call(lambda: None)
+
+
+def test_interrupts_are_not_dependency_failures():
+    circuit = CircuitBreaker("test", threshold=1, reset=60)
+    for error in (KeyboardInterrupt(), SystemExit(1), GeneratorExit()):
+        with pytest.raises(type(error)):
+            circuit.call(raising(error))
+    assert circuit.state == "closed" and circuit.failures == 0
+
+
+def test_interrupted_trial_lets_the_next_call_try():
+    circuit = CircuitBreaker("test", threshold=1, reset=0)
+    with pytest.raises(ValueError):
+        circuit.call(raising(ValueError("down")))
+    assert circuit.state == "open"
+
+    with pytest.raises(KeyboardInterrupt):
+        circuit.call(raising(KeyboardInterrupt()))
+    assert circuit.state == "half-open"
+    assert circuit.call(lambda: "up") == "up"
+    assert circuit.state == "closed"
+
+
+def test_breaker_counts_one_failure_per_retried_call():
+    calls: list[int] = []
+
+    @resilience.retrying(attempts=3, deadline=5, base=0, cap=0)
+    def flaky():
+        calls.append(1)
+        raise OSError(5, "I/O error")
+
+    circuit = CircuitBreaker("test", threshold=2, reset=60, trips=sandbox.unhealthy)
+    with pytest.raises(OSError):
+        circuit.call(flaky)
+    assert len(calls) == 3 and circuit.failures == 1 and circuit.state == "closed"
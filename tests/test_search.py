@@ -0,0 +1,67 @@
+import sqlite3
+
+import pytest
+
+from pylaform.commands.db import connect, statements
+from pylaform.commands.db.query import Get
+
+
+@pytest.fixture
+def get(database):
+    conn: sqlite3.Connection = connect.db()
+    yield Get(conn=conn)
+    conn.close()
+
+
+def hits(get: Get, text: str) -> list[tuple[str, int]]:
+    return [(hit["table"], hit["id"]) for hit in get.search(text)]
+
+
+def test_existing_rows_are_indexed(get):
+    term_id, term = get.query("SELECT `id`, `term` FROM `glossary` ORDER BY `id` LIMIT 1")[0]
+    assert ("glossary", term_id) in hits(get, term)
+    assert get.query("SELECT COUNT(*) FROM `search`")[0][0] == sum(
+        get.query(f"SELECT COUNT(*) FROM `{table}`")[0][0] for table in connect.SEARCH)
+
+
+def test_triggers_keep_the_index_in_sync(get):
+    with get.conn:
+        row_id: int = get.conn.execute(
+            "INSERT INTO `achievement` (`employer`, `position`, `shortdesc`, `longdesc`, `state`) "
+            "VALUES (1, 1, 'Quarkified pipelines', 'Zebrafish telemetry', 1)").lastrowid
+    assert hits(get, "quarkif") == [("achievement", row_id)]
+    assert hits(get, "zebrafish") == [("achievement", row_id)]
+
+    with get.conn:
+        get.conn.execute("UPDATE `achievement` SET `longdesc` = 'Okapi telemetry' WHERE `id` = ?", (row_id,))
+    assert hits(get, "zebrafish") == []
+    assert hits(get, "okapi") == [("achievement", row_id)]
+    assert hits(get, "quarkified") == [("achievement", row_id)]
+
+    with get.conn:
+        get.conn.execute("DELETE FROM `achievement` WHERE `id` = ?", (row_id,))
+    assert hits(get, "okapi") == [] and hits(get, "quarkified") == []
+
+
+def test_same_id_in_other_tables_does_not_collide(get):
+    with get.conn:
+        get.conn.execute("UPDATE `glossary` SET `term` = 'Wombat' WHERE `id` = 2")
+        get.conn.execute("UPDATE `skill` SET `shortdesc` = 'Wombat' WHERE `id` = 2")
+    assert sorted(hits(get, "wombat")) == [("glossary", 2), ("skill", 2)]
+    with get.conn:
+        get.conn.execute("DELETE FROM `skill` WHERE `id` = 2")
+    assert hits(get, "wombat") == [("glossary", 2)]
+
+
+def test_typed_operators_stay_literal(get):
+    assert statements.match('NOT "a" OR b*') == '"NOT"* "a"* "OR"* "b"*'
+    assert statements.match("  -- ") == ""
+    assert get.search("-- ") == []
+    assert get.search('NEAR( " AND') == []
+
+
+def test_snippets_are_escaped(get):
+    with get.conn:
+        get.conn.execute("UPDATE `glossary` SET `description` = '<b>Narwhal</b> & co' WHERE `id` = 2")
+    snippet: str = get.search("narwhal")[0]["snippet"]
+    assert "<b>" not in snippet and "&lt;b&gt;<mark>Narwhal</mark>&lt;/b&gt; &amp; co" in snippet
@@ -0,0 +1,104 @@
+import glob
+import json
+import os
+import sqlite3
+
+import pytest
+
+from pylaform.__main__ import main
+from pylaform.commands.db import connect
+from pylaform.commands.db.snapshots import Snapshots, digest, encode
+from .conftest import count
+
+
+@pytest.fixture
+def store(database):
+    opened: Snapshots = Snapshots()
+    yield opened
+    opened.close()
+
+
+def edit(path: str, statement: str) -> None:
+    conn: sqlite3.Connection = sqlite3.connect(path)
+    with conn:
+        conn.execute(statement)
+    conn.close()
+
+
+def corrupt(store: Snapshots, snapshot: int, table: str) -> None:
+    """
+    Points the listing of 'table' at an unknown column, so restoring its rows fails.
+    """
+
+    tables, _ = store.manifest(snapshot)
+    listing: dict = json.loads(store.get(tables[table]))
+    listing["columns"][0] = "old_column"
+    data: bytes = encode(listing)
+    tables[table] = digest(data)
+    manifest: bytes = encode({"tables": tables})
+    store.put({digest(data): data, digest(manifest): manifest}, snapshot)
+    store.cursor.execute("UPDATE `snapshot` SET `manifest` = ? WHERE `id` = ?", (digest(manifest), snapshot))
+    store.conn.commit()
+
+
+def test_unchanged_content_is_stored_once(store, database):
+    first: dict = store.take("Acme")
+    second: dict = store.take("Beta")
+    assert first["rows"] == second["rows"] > 0 and first["logical"] == second["logical"]
+    assert second["added"] == second["objects"] == 0
+
+    edit(database, "UPDATE `summary` SET `shortdesc` = 'Changed' WHERE `id` = (SELECT MIN(`id`) FROM `summary`)")
+    third: dict = store.take("Gamma")
+    # The edited row, its table listing and the manifest.
+    assert third["objects"] == 3 and third["added"] < first["added"]
+    assert [item["name"] for item in store.report()] == ["Acme", "Beta", "Gamma"]
+
+
+def test_restore_brings_back_the_snapshot(store, database):
+    store.take("Acme")
+    achievements: int = count(database, "achievement")
+    edit(database, "DELETE FROM `achievement`")
+    edit(database, "UPDATE `summary` SET `shortdesc` = 'Changed'")
+
+    result: dict = store.restore(1)
+    assert result["tables"]["achievement"] == achievements
+    assert count(database, "achievement") == achievements
+    assert count(database, "summary", "`shortdesc` = 'Changed'") == 0
+    assert count(database, "search") == sum(count(database, table) for table in connect.SEARCH)
+
+
+def test_failed_restore_into_another_tenant_changes_nothing(store, database):
+    main(["tenant", "create", "other"])
+    store.take("Acme")
+    edit(database, "DELETE FROM `achievement`")
+    store.take("Empty")
+    # Glossary is restored last, after the achievements were already replaced.
+    corrupt(store, 2, "glossary")
+
+    store.restore(1, "other")
+    other: str = connect.path("other")
+    before: dict[str, int] = {table: count(other, table) for table in ("achievement", "glossary", "search")}
+    assert before["achievement"] > 0
+
+    with pytest.raises(ValueError, match="old_column"):
+        store.restore(2, "other")
+    assert {table: count(other, table) for table in before} == before
+
+
+def test_checkout_leaves_profiles_alone(store, database, tmp_path):
+    store.take("Acme")
+    edit(database, "DELETE FROM `achievement`")
+
+    with store.checkout(1) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM `achievement`").fetchone()[0] > 0
+        directory: str = os.path.dirname(conn.execute("PRAGMA database_list").fetchone()[2])
+    assert not os.path.exists(directory)
+    assert count(database, "achievement") == 0
+    assert not glob.glob(str(tmp_path / "tenants" / "*"))
+
+
+def test_unknown_snapshot(store):
+    with pytest.raises(KeyError):
+        store.restore(7)
+    with pytest.raises(KeyError):
+        store.report(7)
@@ -0,0 +1,87 @@
+import sqlite3
+
+import pytest
+
+from pylaform.commands.db import connect
+from pylaform.commands.db.query import Get
+from pylaform.utilities import tailor
+
+
+@pytest.fixture
+def get(database):
+    opened: Get = Get()
+    yield opened
+    opened.close()
+
+
+def test_no_match_selects_nothing_to_drop(get):
+    ranked: dict[str, list[tuple[int, float]]] = tailor.tailor(get, "zzzz qqqq")
+    assert ranked == {"achievements": [], "skills": []}
+    assert tailor.selection(ranked) == {}
+    assert tailor.tailor(get, "  ,. ") == {"achievements": [], "skills": []}
+
+
+def test_empty_selection_never_renders_an_empty_resume(get):
+    full: Get = Get(selection=tailor.selection(tailor.tailor(get, "zzzz qqqq")))
+    try:
+        assert full.get_achievements() == get.get_achievements()
+        assert full.get_skills() == get.get_skills()
+    finally:
+        full.close()
+
+
+def test_list_without_matches_is_kept_in_full(get):
+    conn: sqlite3.Connection = connect.db()
+    with conn:
+        conn.execute("UPDATE `achievement` SET `shortdesc` = 'Quarkified pipelines' WHERE `id` IN (2, 3)")
+    conn.close()
+    ranked: dict[str, list[tuple[int, float]]] = tailor.tailor(get, "quarkified", achievements=12)
+    assert {row_id for row_id, _ in ranked["achievements"]} == {2, 3} and ranked["skills"] == []
+    chosen: dict[str, set[int]] = tailor.selection(ranked)
+    assert chosen == {"achievements": {2, 3}}
+
+    tailored: Get = Get(selection=chosen)
+    try:
+        assert {item["id"] for item in tailored.get_achievements()
+                if str(item["id"]).startswith("achievement_")} == {"achievement_2", "achievement_3"}
+        assert tailored.get_skills() == get.get_skills()
+    finally:
+        tailored.close()
+
+
+def test_ranking_is_best_first_and_skips_hidden_rows(get, database):
+    ranked: list[tuple[int, float]] = tailor.tailor(get, "pipeline", achievements=100)["achievements"]
+    assert [score for _, score in ranked] == sorted((score for _, score in ranked), reverse=True)
+    assert all(score > 0 for _, score in ranked)
+
+    hidden: int = ranked[0][0]
+    conn: sqlite3.Connection = sqlite3.connect(database)
+    with conn:
+        conn.execute("UPDATE `achievement` SET `state` = 0 WHERE `id` = ?", (hidden,))
+    conn.close()
+    assert hidden not in {row_id for row_id, _ in tailor.tailor(get, "pipeline", achievements=100)["achievements"]}
+
+
+def test_index_is_rebuilt_only_after_writes(get, database):
+    built: tailor.Index = tailor.index(get)
+    assert tailor.index(get) is built
+    conn: sqlite3.Connection = connect.db()
+    with conn:
+        conn.execute("UPDATE `skill` SET `shortdesc` = 'Pipeline wrangling' WHERE `id` = 2")
+    conn.close()
+    assert tailor.index(get) is not built
+    assert 2 in {row_id for row_id, _ in tailor.tailor(get, "wrangling")["skills"]}
+
+
+def test_index_cache_is_bounded(get, monkeypatch):
+    monkeypatch.setattr(tailor, "indexes", type(tailor.indexes)())
+    monkeypatch.setattr(tailor, "CAPACITY", 1)
+    tailor.index(get)
+    assert list(tailor.indexes) == [connect.path(get.tenant)]
+
+
+def test_tailored_render_needs_a_match(client):
+    response = client.post("/tailor", data={"job": "zzzz qqqq", "template": "hybrid"})
+    assert response.status_code == 400
+    page = client.post("/tailor", data={"job": "pipeline", "achievements": 2})
+    assert page.status_code == 200
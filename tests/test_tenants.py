@@ -0,0 +1,51 @@
+import os
+import sqlite3
+
+import pytest
+
+import app
+from pylaform.__main__ import main
+from pylaform.commands.db import connect
+from pylaform.utilities.tenants import Tenants
+
+
+def test_unknown_tenant_is_not_found(client, tmp_path):
+    assert client.get("/summary", headers={"X-Pylaform-Tenant": "bob"}).status_code == 404
+    assert client.get("/summary?tenant=bob").status_code == 404
+    assert not (tmp_path / "tenants" / "bob").exists()
+
+
+@pytest.mark.parametrize("name", ["../x", ".hidden", "a/b", "x" * 65])
+def test_invalid_tenant_is_refused(client, tmp_path, name):
+    assert client.get("/summary", headers={"X-Pylaform-Tenant": name}).status_code == 400
+    assert not os.path.exists(tmp_path / "tenants") or os.listdir(tmp_path / "tenants") == []
+
+
+def test_created_tenant_is_served_and_remembered(client):
+    main(["tenant", "create", "alice"])
+    assert connect.exists("alice")
+
+    response = client.get("/summary?tenant=alice")
+    assert response.status_code == 200 and "pylaform_tenant=alice" in response.headers["Set-Cookie"]
+    assert client.get("/summary").status_code == 200
+    assert list(app.tenants.open) == ["alice"]
+    assert client.get("/summary", headers={"X-Pylaform-Tenant": "default"}).status_code == 200
+    assert list(app.tenants.open) == ["alice", "default"]
+
+    with pytest.raises(SystemExit):
+        main(["tenant", "create", "alice"])
+
+
+def test_held_tenant_is_closed_once_released(database):
+    tenants: Tenants = Tenants(capacity=1)
+    main(["tenant", "create", "alice"])
+    held = tenants.acquire(connect.DEFAULT_TENANT)
+    other = tenants.acquire("alice")
+    assert held.evicted and list(tenants.open) == ["alice"]
+    # Still usable by the request holding it.
+    assert held.query.get_summary()
+    tenants.release(held)
+    with pytest.raises(sqlite3.ProgrammingError):
+        held.query.conn.execute("SELECT 1")
+    tenants.release(other)
+    other.close()
@@ -0,0 +1,89 @@
+import sqlite3
+
+import pytest
+from werkzeug.datastructures.structures import ImmutableMultiDict
+
+from pylaform.benchmarks.suite import form_data
+from pylaform.commands.db import trace
+from pylaform.commands.db.query import Get
+from pylaform.commands.db.trace import Tracer
+from pylaform.commands.db.update import Post
+
+
+@pytest.fixture
+def cursor():
+    conn: sqlite3.Connection = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE `glossary` (`id` INTEGER PRIMARY KEY, `term` TEXT)")
+    yield conn.cursor()
+    conn.close()
+
+
+def test_normalise_groups_statements_by_shape():
+    assert trace.normalise("SELECT *\n  FROM `glossary` WHERE `id` = 12 AND `term` = 'it''s'") == \
+        "SELECT * FROM `glossary` WHERE `id` = ? AND `term` = ?"
+
+
+def test_statements_are_recorded(cursor):
+    tracer = Tracer(threshold=60)
+    tracer.run(cursor, "INSERT INTO `glossary` (`term`) VALUES (?)", ("a",), False)
+    assert tracer.run(cursor, "SELECT `term` FROM `glossary` WHERE `id` = 1", (), True) == [("a",)]
+    with pytest.raises(sqlite3.OperationalError):
+        tracer.run(cursor, "SELECT `missing` FROM `glossary`", (), True)
+
+    recent: list[dict] = tracer.report()["recent"]
+    assert [record["statement"] for record in recent] == [
+        "INSERT INTO `glossary` (`term`) VALUES (?)", "SELECT `term` FROM `glossary` WHERE `id` = ?",
+        "SELECT `missing` FROM `glossary`"]
+    assert [record["rows"] for record in recent[:2]] == [1, 1]
+    assert recent[0]["parameters"] == ("a",) and recent[0]["method"] == "other"
+    assert recent[2]["error"].startswith("OperationalError")
+    assert tracer.report()["slow"] == []
+
+
+def test_slow_statements_keep_their_plan(cursor):
+    tracer = Tracer(threshold=0, explain=True)
+    tracer.run(cursor, "SELECT `term` FROM `glossary` WHERE `id` = ?", (1,), True)
+    slow: list[dict] = tracer.report()["slow"]
+    assert len(slow) == 1 and slow[0]["plan"] and "glossary" in slow[0]["plan"][0]
+
+
+def test_batches_are_not_kept_row_by_row(cursor):
+    tracer = Tracer(threshold=60)
+    tracer.run(cursor, "INSERT INTO `glossary` (`term`) VALUES (?)", [("a",), ("b",), ("c",)], False, True)
+    assert tracer.report()["recent"][0]["parameters"] == "<3 rows>"
+
+
+def test_writes_return_the_change_summary(database):
+    post: Post = Post()
+    try:
+        fields: list[tuple[str, str]] = list(form_data(Get().get_glossary()).items(multi=True))
+        edited: ImmutableMultiDict = ImmutableMultiDict(
+            [(key, value + " edited" if key.endswith("_term") else value) for key, value in fields])
+        changes: dict = post.update_glossary(edited)
+    finally:
+        post.close()
+
+    terms: int = sum(1 for key, _ in fields if key.endswith("_term"))
+    assert changes["tables"] == {"glossary"}
+    assert changes["updated"] == terms and changes["inserted"] == changes["deleted"] == 0
+    updates: list[dict] = [record for record in trace.tracer.report()["recent"]
+                           if record["statement"].startswith("UPDATE") and record["method"] == "Post.update_glossary"]
+    assert len(updates) >= terms
+
+
+def test_summary_is_only_collected_inside_writes(cursor):
+    trace.report("unchanged", 1)
+    assert trace.written.get() is None
+
+    @trace.writes
+    def outer():
+        trace.execute(cursor, "INSERT INTO `glossary` (`term`) VALUES (?)", ("a",))
+        inner()
+
+    @trace.writes
+    def inner():
+        trace.execute(cursor, "DELETE FROM `glossary`")
+
+    changes: dict = outer()
+    assert changes["tables"] == {"glossary"} and changes["inserted"] == 1 and changes["deleted"] == 1
+    assert changes["removed"] == {"glossary": 1}
@@ -0,0 +1,57 @@
+import pytest
+from werkzeug.datastructures.structures import ImmutableMultiDict
+
+from pylaform.benchmarks.suite import form_data
+from pylaform.commands.db.query import Get
+from pylaform.commands.db.update import Post
+from pylaform.utilities.commands import changed, transform_get_id
+
+
+@pytest.fixture
+def post(database):
+    opened: Post = Post()
+    yield opened
+    opened.close()
+
+
+def posted(table: str) -> ImmutableMultiDict:
+    get: Get = Get()
+    try:
+        return form_data(getattr(get, "get_" + table)())
+    finally:
+        get.close()
+
+
+@pytest.mark.parametrize("form", ["summary", "education", "certifications", "skills", "positions", "glossary"])
+def test_unchanged_form_writes_nothing(post, form):
+    data: ImmutableMultiDict = posted(form)
+    before: dict[str, int] = post.query.table_versions()
+    changes: dict = post.submit(form, data).result(10)
+
+    fields: int = sum(1 for key in data if not key.endswith("_enabled"))
+    assert changes["unchanged"] == fields
+    assert changes["tables"] == set()
+    assert changes["inserted"] == changes["updated"] == changes["deleted"] == 0
+    assert post.query.table_versions() == before
+
+
+def test_only_edited_fields_are_written(post):
+    data: ImmutableMultiDict = posted("glossary")
+    first: str = next(key for key in data if key.endswith("_term"))
+    edited = ImmutableMultiDict([(key, value + " edited" if key == first else value)
+                                 for key, value in data.items(multi=True)])
+    changes: dict = post.submit("glossary", edited).result(10)
+
+    fields: int = sum(1 for key in data if not key.endswith("_enabled"))
+    assert changes["tables"] == {"glossary"}
+    assert changes["updated"] == 1 and changes["unchanged"] == fields - 1
+
+
+def test_row_state_follows_any_checkbox():
+    current = {("1", "term"): ("a", True, ("glossary", "1")), ("1", "url"): ("b", True, ("glossary", "1"))}
+    # Only the url checkbox is posted, the row stays enabled and nothing changes.
+    data = ImmutableMultiDict([("1_term", "a"), ("1_url", "b"), ("1_url_enabled", "on")])
+    assert changed(transform_get_id(data), current) == []
+    # No checkbox at all disables the row.
+    data = ImmutableMultiDict([("1_term", "a"), ("1_url", "b")])
+    assert [item["attr"] for item in changed(transform_get_id(data), current)] == ["term", "url"]
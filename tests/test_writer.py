@@ -0,0 +1,72 @@
+import threading
+
+import pytest
+
+from pylaform.commands.db import trace, writer
+from pylaform.commands.db.writer import Writer
+from .conftest import count
+
+
+@pytest.fixture
+def shared(database):
+    opened: Writer = Writer.open()
+    yield opened
+    opened.close()
+
+
+def insert(shared: Writer, term: str) -> None:
+    shared.cursor.execute("INSERT INTO `glossary` (`term`, `description`, `url`, `state`) VALUES (?, '', '', 1)",
+                          (term,))
+
+
+def hold(shared: Writer) -> threading.Event:
+    """
+    Keeps the writer busy until the returned event is set, so the next submits share one group commit.
+    """
+
+    started, release = threading.Event(), threading.Event()
+    shared.submit(lambda: (started.set(), release.wait()))
+    started.wait(5)
+    return release
+
+
+def test_failed_mutation_rolls_back_to_its_savepoint(shared, database):
+    release = hold(shared)
+    first = shared.submit(insert, shared, "first")
+    failed = shared.submit(lambda: (insert(shared, "failed"), 1 / 0))
+    last = shared.submit(insert, shared, "last")
+    release.set()
+
+    assert first.result(5) is None and last.result(5) is None
+    assert isinstance(failed.exception(5), ZeroDivisionError)
+    assert count(database, "glossary", "`term` IN ('first', 'last')") == 2
+    assert count(database, "glossary", "`term` = 'failed'") == 0
+
+
+def test_failing_rollback_callback_keeps_the_writer_alive(shared, database):
+    shared.on_rollback(lambda: 1 / 0)
+    failed = shared.submit(lambda: 1 / 0)
+    assert isinstance(failed.exception(5), ZeroDivisionError)
+
+    assert shared.submit(insert, shared, "after").result(5) is None
+    assert count(database, "glossary", "`term` = 'after'") == 1
+
+
+def test_error_outside_sqlite_fails_the_group_only(shared, database, monkeypatch):
+    execute = trace.execute
+
+    def broken(cursor, statement, parameters=()):
+        if statement == "BEGIN IMMEDIATE":
+            monkeypatch.setattr(writer.trace, "execute", execute)
+            raise RuntimeError("tracing failed")
+        return execute(cursor, statement, parameters)
+
+    release = hold(shared)
+    monkeypatch.setattr(writer.trace, "execute", broken)
+    lost = [shared.submit(insert, shared, f"lost {i}") for i in range(3)]
+    release.set()
+
+    assert all(isinstance(future.exception(5), RuntimeError) for future in lost)
+    assert count(database, "glossary", "`term` LIKE 'lost %'") == 0
+    assert shared.submit(insert, shared, "after").result(5) is None
+    assert shared.thread.is_alive()